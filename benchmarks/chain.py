@@ -0,0 +1,43 @@
+"""
+Time JobRunner on a linear chain of generated jobs. Per job overhead should stay flat as the chain grows.
+
+    python benchmarks/chain.py 1000 10000 100000
+"""
+import os
+import sys
+import time
+
+# run from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from treetl import Job, JobRunner, JOB_STATUS
+
+
+def make_chain(length):
+    jobs, prev = [ ], None
+    for i in range(length):
+        job_type = Job.create('Step{}'.format(i), transform=lambda **kwargs: 1, **({ 'prev': prev } if prev else { }))
+        jobs.append(job_type())
+        prev = job_type
+    return jobs
+
+
+def time_chain(length, executor='serial'):
+    jobs = make_chain(length)
+
+    start = time.time()
+    runner = JobRunner(jobs, executor=executor)
+    added = time.time()
+    runner.run()
+    done = time.time()
+
+    assert runner.status == JOB_STATUS.DONE
+    return added - start, done - added
+
+
+if __name__ == '__main__':
+    lengths = [ int(a) for a in sys.argv[1:] ] or [ 1000, 10000, 100000 ]
+    print('{:>10} {:>10} {:>10} {:>14}'.format('jobs', 'add (s)', 'run (s)', 'run/job (us)'))
+    for length in lengths:
+        add, run = time_chain(length)
+        print('{:>10} {:>10.3f} {:>10.3f} {:>14.1f}'.format(length, add, run, run / length * 1e6))
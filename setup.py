@@ -35,6 +35,10 @@ setup(
 
     packages=find_packages(),
 
+    install_requires=[
+        'futures; python_version<"3"'
+    ],
+
     include_package_data=True,
     package_data={
         str(k): [ str(vi) for vi in v ]
@@ -0,0 +1,79 @@
+# jobs with async def methods. coroutine syntax needs python 3.5+, so tests import this module only once they know
+# they can run
+import asyncio
+import threading
+
+from treetl import Job
+
+
+def make_jobs(notify, b_saw_d):
+    # only set once JobD is in flight. JobB can only see it if both run at the same time
+    holder = { }
+
+    class JobA(Job):
+        async def extract(self, **kwargs):
+            holder['d_started'] = asyncio.Event()
+            self.extracted_data = 1
+            return self
+
+        def transform(self, **kwargs):
+            # sync methods are pushed off to a thread
+            self.transform_thread = threading.current_thread()
+            self.transformed_data = self.extracted_data
+            return self
+
+        async def cache(self, **kwargs):
+            notify(self, '.cache')
+            return self
+
+        async def uncache(self, **kwargs):
+            notify(self, '.uncache')
+            return self
+
+    @Job.dependency(a_param=JobA)
+    class JobB(Job):
+        async def extract(self, **kwargs):
+            try:
+                await asyncio.wait_for(holder['d_started'].wait(), 5)
+                b_saw_d.append(True)
+            except asyncio.TimeoutError:
+                b_saw_d.append(False)
+            return self
+
+        async def transform(self, a_param=None, **kwargs):
+            self.transformed_data = a_param + 1
+            return self
+
+    @Job.dependency(input_param=JobA)
+    class JobD(Job):
+        async def extract(self, **kwargs):
+            holder['d_started'].set()
+            return self
+
+        async def transform(self, input_param=None, **kwargs):
+            notify(self, '.transform')
+            self.transformed_data = input_param + 1
+            return self
+
+    async def add(in_one=None, in_two=None, **kwargs):
+        return in_one + in_two
+
+    JobE = Job.create('JobE', transform=add, in_one=JobB, in_two=JobD)
+
+    @Job.dependency(d_param=JobD)
+    class FaultyJob(Job):
+        async def transform(self, **kwargs):
+            raise ValueError()
+
+    @Job.dependency(faulty_parent=FaultyJob)
+    class VictimJob(Job):
+        async def transform(self, **kwargs):
+            notify(self, '.transform')
+            return self
+
+    return [ JobE(), JobD(), JobB(), JobA() ], [ FaultyJob(), VictimJob() ]
+
+
+async def slow_read(**kwargs):
+    await asyncio.sleep(0.2)
+    return 'async'
@@ -0,0 +1,110 @@
+import sys
+import unittest
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'coroutines need python 3.5+')
+class TestAsyncRunner(unittest.TestCase):
+
+    def setUp(self):
+        from tests._async_jobs import make_jobs
+
+        self.event_sequence = [ ]
+        self.b_saw_d = [ ]
+
+        def notify(job, msg=''):
+            self.event_sequence.append(job.__class__.__name__ + msg)
+
+        self.jobs, self.faulty_jobs = make_jobs(notify, self.b_saw_d)
+
+    def test_async_runner(self):
+        import threading
+        from treetl import AsyncJobRunner, JOB_STATUS
+
+        runner = AsyncJobRunner(self.jobs).run()
+
+        self.assertEqual(runner.status, JOB_STATUS.DONE)
+        self.assertEqual(self.jobs[0].transformed_data, 4, msg='Incorrect JobE transformed data')
+        self.assertEqual(self.b_saw_d, [ True ], msg='Sibling jobs JobB and JobD did not overlap')
+        self.assertIsNot(self.jobs[3].transform_thread, threading.current_thread(), msg='Sync method blocked loop')
+        self.assertEqual(self.event_sequence.count('JobA.cache'), 1)
+        self.assertEqual(self.event_sequence.count('JobA.uncache'), 1)
+        self.assertTrue(
+            self.event_sequence.index('JobD.transform') < self.event_sequence.index('JobA.uncache'),
+            msg='JobA uncached before JobD transformed'
+        )
+
+    def test_run_async(self):
+        import asyncio
+        from treetl import AsyncJobRunner, JOB_STATUS, ParentJobException
+
+        runner = AsyncJobRunner(self.jobs + self.faulty_jobs, max_concurrency=1)
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(runner.run_async())
+        finally:
+            loop.close()
+
+        self.assertEqual(runner.status, JOB_STATUS.FAILED)
+        self.assertEqual(runner.failed_job_roots(), [ self.faulty_jobs[0] ])
+        self.assertIsInstance(runner.job_results(self.faulty_jobs[1]).error, ParentJobException)
+        self.assertNotIn('VictimJob.transform', self.event_sequence, msg='Child of failed job was executed')
+        self.assertEqual(self.jobs[2].transformed_data, 2)
+
+    def test_runner_options(self):
+        from treetl import AsyncJobRunner, JOB_STATUS
+
+        for options in [ { 'executor': 'threads' }, { 'prefetch': 2 }, { 'background_loads': 1 } ]:
+            self.assertRaises(ValueError, AsyncJobRunner, self.jobs, **options)
+
+        runner = AsyncJobRunner(self.jobs).run(profile=True)
+        self.assertEqual(runner.status, JOB_STATUS.DONE)
+        self.assertEqual(sorted(runner.report.phases['JobA']), [ 'cache', 'extract', 'load', 'transform', 'uncache' ])
+
+    def test_durations(self):
+        import time
+        from treetl import Job, AsyncJobRunner
+
+        class Sleeper(Job):
+            def transform(self, **kwargs):
+                time.sleep(0.1)
+                return self
+
+        # time spent waiting for a slot is not part of a job's duration
+        runner = AsyncJobRunner([ Sleeper(n=i) for i in range(6) ], max_concurrency=2).run()
+        self.assertEqual(len(runner.report.durations), 6)
+        self.assertLess(max(runner.report.durations.values()), 0.18, msg=runner.report.durations)
+
+    def test_batched(self):
+        from treetl import Job, AsyncJobRunner, JOB_STATUS
+
+        batches = [ ]
+
+        def double_all(batch_kwargs):
+            batches.append(len(batch_kwargs))
+            return [ kwargs['n'] * 2 for kwargs in batch_kwargs ]
+
+        class N(Job):
+            def transform(self, **kwargs):
+                self.transformed_data = self.params['n']
+                return self
+
+        Doubled = Job.batched(4)(Job.create('Doubled', transform_batch=double_all, n=Job.same(N)))
+
+        jobs = [ Doubled(n=i) for i in range(6) ] + [ N(n=i) for i in range(6) ]
+        runner = AsyncJobRunner(jobs).run()
+        self.assertEqual(runner.status, JOB_STATUS.DONE)
+        self.assertEqual([ j.transformed_data for j in jobs[:6] ], [ i * 2 for i in range(6) ])
+        self.assertLess(len(batches), 6)
+
+    def test_coroutine_outside_async_runner(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        job_a = self.jobs[3]
+        runner = JobRunner([ job_a ]).run()
+        self.assertEqual(runner.status, JOB_STATUS.FAILED)
+        self.assertIn('AsyncJobRunner', str(runner.job_results(job_a).error.args[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import threading
+import unittest
+
+
+class TestBackgroundLoad(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+
+        self.events = [ ]
+        self.child_ran = threading.Event()
+        events, child_ran = self.events, self.child_ran
+
+        class Parent(Job):
+            def transform(self, **kwargs):
+                self.transformed_data = 1
+                return self
+
+            def load(self, **kwargs):
+                # a slow sink. the child gets to run in the meantime
+                child_ran.wait(2)
+                events.append('Parent.load')
+                return self
+
+            def uncache(self, **kwargs):
+                events.append('Parent.uncache')
+                return self
+
+        @Job.dependency(parent=Parent)
+        class Child(Job):
+            def transform(self, parent, **kwargs):
+                events.append('Child.transform')
+                child_ran.set()
+                self.transformed_data = parent + 1
+                return self
+
+        self.Parent, self.Child = Parent, Child
+
+    def test_children_do_not_wait_on_load(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        for executor in [ 'serial', 'threads' ]:
+            del self.events[:]
+            self.child_ran.clear()
+            runner = JobRunner([ self.Child() ], executor=executor, background_loads=2).run()
+
+            # run() waits for the load, and the parent's data stays cached until it is loaded
+            self.assertEqual(runner.status, JOB_STATUS.DONE, msg=executor)
+            self.assertEqual(self.events, [ 'Child.transform', 'Parent.load', 'Parent.uncache' ], msg=executor)
+
+    def test_failed_load(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        def fail(job, **kwargs):
+            self.child_ran.wait(2)
+            raise ValueError()
+
+        self.Parent.load = fail
+        child = self.Child()
+        runner = JobRunner([ child ], background_loads=1).run()
+
+        self.assertEqual(runner.status, JOB_STATUS.FAILED)
+        self.assertEqual([ j.__class__.__name__ for j in runner.failed_job_roots() ], [ 'Parent' ])
+        self.assertEqual(child.transformed_data, 2)
+
+        with self.assertRaises(ValueError):
+            JobRunner(executor='processes', background_loads=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
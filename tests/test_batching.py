@@ -0,0 +1,143 @@
+import sys
+import unittest
+
+
+class TestBatching(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+
+        self.batches = batches = [ ]
+
+        class Day(Job):
+            def transform(self, **kwargs):
+                self.transformed_data = self.params['day']
+                return self
+
+        def score_all(batch_kwargs):
+            batches.append(len(batch_kwargs))
+            return [ kwargs['day'] * 10 for kwargs in batch_kwargs ]
+
+        Score = Job.batched(size=8)(Job.create('Score', transform_batch=score_all, day=Job.same(Day)))
+
+        @Job.dependency(scores=Job.every(Score))
+        class Total(Job):
+            def transform(self, scores, **kwargs):
+                self.transformed_data = sum(scores)
+                return self
+
+        self.Day, self.Score, self.Total = Day, Score, Total
+
+    def jobs(self, days=20):
+        return [ self.Score(day=d) for d in range(days) ] + [ self.Day(day=d) for d in range(days) ] + [ self.Total() ]
+
+    def test_batched_transform(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        for executor in [ 'serial', 'threads' ]:
+            del self.batches[:]
+            jobs = self.jobs()
+            runner = JobRunner(jobs, executor=executor, max_workers=2).run()
+
+            self.assertEqual(runner.status, JOB_STATUS.DONE, msg=executor)
+            self.assertEqual([ j.transformed_data for j in jobs[:20] ], [ d * 10 for d in range(20) ], msg=executor)
+            self.assertEqual(jobs[-1].transformed_data, sum(range(20)) * 10, msg=executor)
+
+            # scores were transformed together, never more than 8 at a time
+            self.assertEqual(sum(self.batches), 20, msg=executor)
+            self.assertLess(len(self.batches), 20, msg=executor)
+            self.assertLessEqual(max(self.batches), 8, msg=executor)
+
+    @unittest.skipIf(sys.version_info < (3, 9), 'profiling needs tracemalloc.reset_peak')
+    def test_profiled_batch(self):
+        from treetl import JobRunner
+
+        jobs = self.jobs(days=8)
+        runner = JobRunner(jobs).run(profile=True)
+
+        # every job in the batch gets its share, not just the first one
+        phases = runner.report.phases
+        shares = [ phases['Score(day={})'.format(d)]['transform_batch'] for d in range(8) ]
+        self.assertEqual(len(set(shares)), 1)
+
+    def test_unbatched_transform(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        # plans run jobs one at a time, transform falls back on transform_batch
+        jobs = self.jobs(days=3)
+        plan = JobRunner(jobs).compile().run()
+        self.assertEqual(plan.status, JOB_STATUS.DONE)
+        self.assertEqual(jobs[-1].transformed_data, 30)
+        self.assertEqual(self.batches, [ 1, 1, 1 ])
+
+    def test_default_transform_batch(self):
+        from treetl import Job, JobRunner
+
+        @Job.batched()
+        @Job.dependency(day=Job.same(self.Day))
+        class Double(Job):
+            def transform(self, day, **kwargs):
+                self.transformed_data = day * 2
+                return self
+
+        jobs = [ Double(day=d) for d in range(5) ] + [ self.Day(day=d) for d in range(5) ]
+        JobRunner(jobs).run()
+        self.assertEqual([ j.transformed_data for j in jobs[:5] ], [ 0, 2, 4, 6, 8 ])
+
+    def test_failed_batch(self):
+        from treetl import Job, JobRunner, JOB_STATUS, ParentJobException
+
+        class Broken(self.Score):
+            @classmethod
+            def transform_batch(cls, jobs, batch_kwargs):
+                raise ValueError('bad batch')
+
+        @Job.dependency(scores=Job.every(Broken))
+        class Total(Job):
+            pass
+
+        jobs = [ Broken(day=d) for d in range(3) ] + [ self.Day(day=d) for d in range(3) ] + [ Total() ]
+        runner = JobRunner(jobs).run()
+
+        self.assertEqual(runner.status, JOB_STATUS.FAILED)
+        self.assertEqual(sorted(runner.failed_job_roots(), key=lambda j: j.params['day']), jobs[:3])
+        self.assertIsInstance(runner.job_results(jobs[-1]).error, ParentJobException)
+
+    def test_batched_child_of_stream(self):
+        import threading
+        from treetl import Job, JobRunner, JOB_STATUS
+
+        @Job.streaming(buffer=2)
+        class Numbers(Job):
+            def transform(self, **kwargs):
+                self.transformed_data = iter(range(50))
+                return self
+
+        # runs alongside its sibling on the stream instead of being batched on the loop thread
+        @Job.batched(4)
+        @Job.dependency(numbers=Numbers)
+        class Summed(Job):
+            def transform(self, numbers, **kwargs):
+                self.transformed_data = sum(numbers)
+                return self
+
+        @Job.dependency(numbers=Numbers)
+        class Counted(Job):
+            def transform(self, numbers, **kwargs):
+                self.transformed_data = len(list(numbers))
+                return self
+
+        summed, counted = Summed(), Counted()
+        runner = JobRunner([ summed, counted ])
+        t = threading.Thread(target=runner.run)
+        t.daemon = True
+        t.start()
+        t.join(5)
+
+        self.assertFalse(t.is_alive(), msg='Run hung on the stream')
+        self.assertEqual(runner.status, JOB_STATUS.DONE)
+        self.assertEqual((summed.transformed_data, counted.transformed_data), (sum(range(50)), 50))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+
+class TestCacheLifecycle(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+
+        self.event_sequence = [ ]
+
+        def notify(job, msg=''):
+            self.event_sequence.append(job.__class__.__name__ + msg)
+
+        class NotifyingJob(Job):
+            def transform(self, **kwargs):
+                notify(self, '.transform')
+                return self
+
+            def load(self, **kwargs):
+                notify(self, '.load')
+                return self
+
+            def cache(self, **kwargs):
+                notify(self, '.cache')
+                return self
+
+            def uncache(self, **kwargs):
+                notify(self, '.uncache')
+                return self
+
+        class JobA(NotifyingJob):
+            pass
+
+        @Job.dependency(a_data=JobA)
+        class JobB(NotifyingJob):
+            pass
+
+        @Job.dependency(b_data=JobB)
+        class JobC(NotifyingJob):
+            pass
+
+        @Job.dependency(a_data=JobA)
+        class JobD(NotifyingJob):
+            def extract(self, **kwargs):
+                raise ValueError()
+
+        self.chain = [ JobC(), JobB(), JobA() ]
+        self.JobD = JobD
+
+    def a_before_b(self, a, b):
+        return self.event_sequence.index(a) < self.event_sequence.index(b)
+
+    def test_release_after_transform(self):
+        from treetl import JobRunner
+
+        for executor in [ 'serial', 'threads' ]:
+            self.event_sequence = [ ]
+            runner = JobRunner(self.chain, executor=executor).run()
+
+            # parents go as soon as their last child has transformed, before the child loads
+            for a, b in [
+                ('JobB.transform', 'JobA.uncache'), ('JobA.uncache', 'JobB.load'),
+                ('JobC.transform', 'JobB.uncache'), ('JobB.uncache', 'JobC.load')
+            ]:
+                self.assertTrue(self.a_before_b(a, b), msg='{}: {} supposed to be before {}'.format(executor, a, b))
+
+            # JobA is let go before JobB gets cached
+            self.assertEqual(runner.report.peak_cached, 1, msg=executor)
+
+    def test_failed_child_releases(self):
+        from treetl import JobRunner
+
+        runner = JobRunner(self.chain + [ self.JobD() ]).run()
+        self.assertEqual(self.event_sequence.count('JobA.cache'), 1)
+        self.assertEqual(self.event_sequence.count('JobA.uncache'), 1, msg='Failed child never released JobA')
+        self.assertEqual(runner.report.peak_cached, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+
+class TestCriticalPath(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+
+        self.execution_order = [ ]
+
+        def notify(job):
+            self.execution_order.append(job.__class__.__name__)
+
+        class NotifyingJob(Job):
+            def transform(self, **kwargs):
+                notify(self)
+                return self
+
+        class JobShort(NotifyingJob):
+            pass
+
+        class JobLong1(NotifyingJob):
+            pass
+
+        @Job.dependency(long1=JobLong1)
+        class JobLong2(NotifyingJob):
+            pass
+
+        @Job.dependency(long2=JobLong2)
+        class JobLong3(NotifyingJob):
+            pass
+
+        self.JobLong1 = JobLong1
+        self.jobs = [ JobShort(), JobLong3(), JobLong2(), JobLong1() ]
+
+    def test_fifo_baseline(self):
+        from treetl import JobRunner
+
+        JobRunner(self.jobs, executor='threads', max_workers=1).run()
+        self.assertEqual(self.execution_order[0], 'JobShort')
+
+    def test_longest_chain_first(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        hints = { 'JobShort': 5.0, self.JobLong1: 2.0, 'JobLong2': 2.0, 'JobLong3': 2.0 }
+        for executor in [ 'serial', 'threads' ]:
+            self.execution_order = [ ]
+            runner = JobRunner(
+                self.jobs, executor=executor, max_workers=1, scheduler='critical_path', duration_hints=hints
+            ).run()
+
+            # 6s of chain below JobLong1 beats 5s of JobShort
+            self.assertEqual(runner.status, JOB_STATUS.DONE)
+            self.assertEqual(self.execution_order[0], 'JobLong1', msg=executor)
+            runner.reset_jobs()
+
+    def test_report(self):
+        from treetl import JobRunner
+
+        runner = JobRunner(self.jobs, scheduler='critical_path').run()
+        self.assertEqual(sorted(runner.report.durations), [ 'JobLong1', 'JobLong2', 'JobLong3', 'JobShort' ])
+        self.assertIn(runner.report.critical_path, [ [ 'JobLong1', 'JobLong2', 'JobLong3' ], [ 'JobShort' ] ])
+        self.assertEqual(
+            runner.report.critical_path_duration,
+            sum(runner.report.durations[i] for i in runner.report.critical_path)
+        )
+        self.assertIn('Critical path', runner.report.summary())
+
+    def test_learned_durations(self):
+        from treetl import JobRunner
+
+        # durations learned from previous runs of the runner are used when there are no hints
+        runner = JobRunner(self.jobs, executor='threads', max_workers=1, scheduler='critical_path').run()
+        self.assertEqual(sorted(runner.learned_durations), [ 'JobLong1', 'JobLong2', 'JobLong3', 'JobShort' ])
+
+        runner.learned_durations.update({ 'JobShort': 100.0, 'JobLong1': 0.1, 'JobLong2': 0.1, 'JobLong3': 0.1 })
+        self.execution_order[:] = [ ]
+        runner.reset_jobs()
+        runner.run()
+        self.assertEqual(self.execution_order[0], 'JobShort')
+
+        # runners don't share what they learned, and forget it with their jobs
+        self.assertEqual(JobRunner(self.jobs).learned_durations, { })
+        runner.clear_jobs()
+        self.assertEqual(runner.learned_durations, { })
+
+
+if __name__ == '__main__':
+    unittest.main()
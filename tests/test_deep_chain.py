@@ -0,0 +1,51 @@
+import sys
+import unittest
+
+
+class TestDeepChain(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+
+        # well past the recursion limit
+        self.length = sys.getrecursionlimit() * 3
+
+        def fail(**kwargs):
+            raise ValueError()
+
+        self.jobs, prev = [ ], None
+        for i in range(self.length):
+            job_type = Job.create(
+                'Step{}'.format(i), transform=fail if i == 1 else (lambda **kwargs: 1),
+                **({ 'prev': prev } if prev else { })
+            )
+            self.jobs.append(job_type())
+            prev = job_type
+
+    def test_deep_chain(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        for executor in [ 'serial', 'threads' ]:
+            runner = JobRunner(self.jobs, executor=executor).run()
+
+            # Step1 fails and takes the rest of the chain with it
+            self.assertEqual(runner.status, JOB_STATUS.FAILED, msg=executor)
+            self.assertEqual(len(runner.failed_jobs()), self.length - 1, msg=executor)
+            self.assertEqual(runner.failed_job_roots(), [ self.jobs[1] ], msg=executor)
+
+            paths = runner.all_paths(self.jobs[-1])
+            self.assertEqual(len(paths), 1)
+            self.assertEqual(paths[0], self.jobs)
+            runner.reset_jobs()
+
+    def test_deep_result_keys(self):
+        import tempfile
+        from treetl import JobRunner
+        from treetl.tools.resultcache import ResultCache
+
+        runner = JobRunner(self.jobs, result_cache=ResultCache(tempfile.mkdtemp()))
+        self.assertTrue(runner._result_key(runner.job_results(self.jobs[-1])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 
+import sys
 import unittest
 
 
@@ -30,5 +31,74 @@ class TestJobInjection(unittest.TestCase):
         self.assertEqual(self.NewJob().extract(x='e', y='d').transform().transformed_data, 27)
 
 
+class TestConcurrentExtractors(unittest.TestCase):
+
+    def test_concurrent_extractors(self):
+        import time
+        from treetl import Job
+
+        def slow(value):
+            def extractor(**kwargs):
+                time.sleep(0.2)
+                return value + kwargs.get('offset', 0)
+            return extractor
+
+        @Job.concurrent_extractors()
+        @Job.extractors(a=slow(1), b=slow(2), c=slow(3))
+        class NewJob(Job):
+            pass
+
+        start = time.time()
+        job = NewJob().extract(offset=10)
+        self.assertLess(time.time() - start, 0.5, msg='Extractors ran one after the other')
+        self.assertEqual((job.a, job.b, job.c), (11, 12, 13))
+        self.assertEqual(sorted(job.extractor_durations), [ 'a', 'b', 'c' ])
+        self.assertGreaterEqual(min(job.extractor_durations.values()), 0.15)
+
+    @unittest.skipIf(sys.version_info < (3, 5), 'coroutines need python 3.5+')
+    def test_coroutine_extractors(self):
+        import time
+        from treetl import Job
+        from tests._async_jobs import slow_read
+
+        def blocking_read(**kwargs):
+            time.sleep(0.2)
+            return 'thread'
+
+        @Job.concurrent_extractors(max_workers=1)
+        @Job.extractors(a=slow_read, b=slow_read, c=blocking_read)
+        class NewJob(Job):
+            pass
+
+        start = time.time()
+        job = NewJob().extract()
+        self.assertLess(time.time() - start, 0.35)
+        self.assertEqual((job.a, job.b, job.c), ('async', 'async', 'thread'))
+
+    def test_extractor_errors(self):
+        from treetl import Job, JobRunner, ExtractorError
+
+        def bad_table(**kwargs):
+            raise IOError('no table')
+
+        def bad_api(**kwargs):
+            raise ValueError('no api')
+
+        @Job.concurrent_extractors()
+        @Job.extractors(good=lambda **kwargs: 1, table=bad_table, api=bad_api)
+        class NewJob(Job):
+            pass
+
+        job = NewJob()
+        with self.assertRaises(ExtractorError) as raised:
+            job.extract()
+        self.assertEqual(sorted(raised.exception.errors), [ 'api', 'table' ])
+        self.assertIsInstance(raised.exception.errors['table'], IOError)
+        self.assertFalse(hasattr(job, 'good'), msg='Attributes set although extractors failed')
+
+        runner = JobRunner([ job ]).run()
+        self.assertIsInstance(runner.job_results(job).error.args[0], ExtractorError)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+
+class TestFailurePaths(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+
+        def fail(**kwargs):
+            raise ValueError()
+
+        # a ladder of diamonds under a job that fails. every rung doubles the paths to the bottom
+        self.rungs = 40
+        self.jobs = [ Job.create('Below0', transform=fail)() ]
+        for i in range(self.rungs):
+            above = self.jobs[-1].__class__
+            left = Job.create('Left{}'.format(i), above=above)
+            right = Job.create('Right{}'.format(i), above=above)
+            self.jobs.extend([ left(), right(), Job.create('Below{}'.format(i + 1), left=left, right=right)() ])
+
+        # the failure is at the bottom of its own ladder
+        self.faulty = Job.create('Faulty', transform=fail, above=self.jobs[-1].__class__)()
+
+    def test_bounded_paths(self):
+        from treetl import JobRunner
+
+        runner = JobRunner(self.jobs).run()
+        self.assertEqual(runner.failed_job_roots(), [ self.jobs[0] ])
+        self.assertEqual(runner.failed_job_root_paths(), { self.jobs[0]: [ [ self.jobs[0] ] ] })
+
+        # succeeds on top, fails at the bottom
+        self.jobs[0].__class__.transform = lambda job, **kwargs: job
+        runner = JobRunner(self.jobs + [ self.faulty ]).run()
+        self.assertEqual(runner.count_paths(self.faulty), 2 ** self.rungs)
+
+        paths = runner.failed_job_root_paths(max_paths=5)[self.faulty]
+        self.assertEqual(len(paths), 5)
+        self.assertTrue(all(p[0] is self.jobs[0] and p[-1] is self.faulty for p in paths))
+        self.assertEqual(len(runner.failed_job_root_paths()[self.faulty]), 100)
+        self.assertEqual(next(runner.iter_paths(self.faulty)), paths[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -53,5 +53,50 @@ class TestJobInjection(unittest.TestCase):
         self.assertEqual(self.patched_job.transformed_data, 70, msg='Incorrect transformed data')
 
 
+class TestInjectionBinding(unittest.TestCase):
+
+    def test_patches_are_bound_once(self):
+        from treetl import Job, JobPatch
+
+        made = [ ]
+
+        class CountedPatch(JobPatch):
+            def __init__(self):
+                made.append(self)
+                self.patch_param = 1
+
+            def load(self, **kwargs):
+                self.loaded = True
+                return self
+
+        @Job.inject(CountedPatch)
+        class BaseJob(Job):
+            pass
+
+        jobs = [ BaseJob(day=d) for d in range(100) ]
+        self.assertEqual(len(made), 1, msg='Patch made per job instead of once')
+        self.assertEqual(jobs[-1].patch_param, 1)
+
+        # only patched methods are wrapped
+        unbound = lambda m: getattr(m, '__func__', m)
+        self.assertIs(unbound(BaseJob.extract), unbound(Job.extract))
+        self.assertTrue(jobs[0].load().loaded)
+
+    def test_patches_with_arguments_are_per_job(self):
+        from treetl import Job, JobPatch
+
+        class ParamPatch(JobPatch):
+            def __init__(self, day=None, **kwargs):
+                self.patched_day = day
+
+        @Job.inject(ParamPatch)
+        class BaseJob(Job):
+            pass
+
+        first, second = BaseJob(day=1), BaseJob(day=2)
+        self.assertEqual((first.patched_day, second.patched_day), (1, 2))
+        self.assertFalse(hasattr(BaseJob, 'patched_day'), msg='Per job patch attributes leaked onto the class')
+
+
 if __name__ == '__main__':
     unittest.main()
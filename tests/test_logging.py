@@ -119,5 +119,87 @@ class TestLogging(unittest.TestCase):
         logger.removeHandler(self.handler)
 
 
+class TestLazyLogging(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job, JobRunner
+        from treetl.tools.testing import MockLoggingHandler
+
+        self.handler = MockLoggingHandler(level='DEBUG')
+        logger.addHandler(self.handler)
+        self.formatted = formatted = [ ]
+
+        class Loud(object):
+            def __repr__(self):
+                formatted.append(self)
+                return 'Loud()'
+
+        class JobA(Job):
+            def transform(self, **kwargs):
+                self.transformed_data = Loud()
+                return self
+
+        @Job.dependency(a=JobA)
+        class JobB(Job):
+            def transform(self, a, **kwargs):
+                self.transformed_data = list(range(100000))
+                return self
+
+        @Job.dependency(b=JobB)
+        class JobC(Job):
+            pass
+
+        self.runner = JobRunner([ JobC(), JobB(), JobA() ])
+
+    def tearDown(self):
+        from treetl.tools import joblogging
+
+        joblogging.configure(structured=False)
+        logging.getLogger('treetl').setLevel(logging.NOTSET)
+        logger.removeHandler(self.handler)
+
+    def test_disabled_levels_format_nothing(self):
+        logging.getLogger('treetl').setLevel(logging.INFO)
+        self.handler.reset()
+        self.runner.run()
+
+        self.assertEqual(self.formatted, [ ])
+        self.assertEqual(self.handler.messages['debug'], [ ])
+        self.assertIn('JobRunner: Completed JobC', self.handler.messages['info'])
+
+    def test_values_are_capped(self):
+        from treetl.tools import joblogging
+
+        self.runner.run()
+
+        self.assertIn('JobB.transform(a=Loud())', self.handler.messages['debug'])
+        # logged by the runner and by the job
+        transform_c = [ m for m in self.handler.messages['debug'] if m.startswith('JobC.transform(') ]
+        self.assertEqual(len(transform_c), 2)
+        for m in transform_c:
+            self.assertLessEqual(len(m), len('JobC.transform(b=)') + joblogging.MAX_REPR)
+
+    def test_structured(self):
+        import json
+        from treetl.tools import joblogging
+
+        joblogging.configure(structured=True)
+        self.handler.reset()
+        self.runner.run()
+
+        records = [ json.loads(m) for m in self.handler.messages['debug'] + self.handler.messages['info'] ]
+        transform_b = [ r for r in records if r.get('job') == 'JobB' and r.get('phase') == 'transform' ]
+        self.assertEqual(transform_b[0], {
+            'event': 'method', 'job': 'JobB', 'phase': 'transform', 'kwargs': { 'a': 'Loud()' }
+        })
+
+        completed = dict((r['job'], r) for r in records if r['event'] == 'completed')
+        self.assertEqual(sorted(completed), [ 'JobA', 'JobB', 'JobC' ])
+        self.assertGreaterEqual(completed['JobC']['duration'], 0)
+
+        statuses = [ r['status'] for r in records if r['event'] == 'status' ]
+        self.assertEqual(statuses, [ 'RUNNING', 'DONE' ])
+
+
 if __name__ == '__main__':
     unittest.main()
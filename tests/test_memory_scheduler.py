@@ -0,0 +1,117 @@
+import unittest
+
+
+class TestMemoryScheduler(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+
+        self.execution_order = [ ]
+
+        def notify(job):
+            self.execution_order.append(job.__class__.__name__)
+
+        class SizedJob(Job):
+            SIZE = 1000
+
+            def transform(self, **kwargs):
+                notify(self)
+                self.transformed_data = self.SIZE
+                return self
+
+            def data_size(self):
+                return self.SIZE
+
+        class JobX1(SizedJob):
+            pass
+
+        @Job.dependency(x=JobX1)
+        class JobX2(SizedJob):
+            pass
+
+        class JobY1(SizedJob):
+            pass
+
+        @Job.dependency(y=JobY1)
+        class JobY2(SizedJob):
+            pass
+
+        self.jobs = [ JobX2(), JobY2(), JobX1(), JobY1() ]
+
+    def test_fifo_baseline(self):
+        from treetl import JobRunner
+
+        runner = JobRunner(self.jobs, executor='threads', max_workers=1).run()
+        self.assertEqual(self.execution_order, [ 'JobX1', 'JobY1', 'JobX2', 'JobY2' ])
+        self.assertEqual(runner.report.peak_cached, 2)
+
+    def test_memory_order(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        for executor in [ 'serial', 'threads' ]:
+            self.execution_order = [ ]
+            runner = JobRunner(self.jobs, executor=executor, max_workers=1, scheduler='memory').run()
+
+            # finish off a branch and free its data before starting the next one
+            self.assertEqual(runner.status, JOB_STATUS.DONE)
+            self.assertEqual(self.execution_order, [ 'JobX1', 'JobX2', 'JobY1', 'JobY2' ], msg=executor)
+            self.assertEqual(runner.report.peak_cached_bytes, 1000, msg=executor)
+            runner.reset_jobs()
+
+    def test_memory_budget(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        # both roots could run at once, but not within budget
+        runner = JobRunner(
+            self.jobs, executor='threads', max_workers=4, scheduler='memory', memory_budget=1500
+        ).run()
+        self.assertEqual(runner.status, JOB_STATUS.DONE)
+        self.assertEqual(runner.report.peak_cached_bytes, 1000)
+
+        # impossible budgets still get the work done
+        runner = JobRunner(self.jobs, scheduler='memory', memory_budget=10).run()
+        self.assertEqual(runner.status, JOB_STATUS.DONE)
+
+    def test_last_consumer_first(self):
+        from treetl import Job, JobRunner
+
+        order = self.execution_order
+
+        def sized(name, size, **parents):
+            def transform(self, **kwargs):
+                order.append(name)
+                self.transformed_data = size
+                return self
+            job_type = type(name, (Job,), { 'transform': transform, 'data_size': lambda self: size })
+            return Job.dependency(**parents)(job_type) if parents else job_type
+
+        P = sized('P', 1000)
+        A = sized('A', 100, p=P)
+        B = sized('B', 50, p=P)
+        W = sized('W', 0, a=A)
+        V = sized('V', 0, b=B)
+
+        # once B has run, A is all that holds on to P and goes ahead of V
+        JobRunner([ W(), V(), A(), B(), P() ], scheduler='memory').run()
+        self.assertEqual(order, [ 'P', 'B', 'A', 'W', 'V' ])
+
+    def test_deep_sizeof(self):
+        import sys
+        from treetl.tools.sizeof import deep_sizeof
+
+        shared = 'x' * 100
+        self.assertEqual(deep_sizeof(shared), sys.getsizeof(shared))
+        self.assertEqual(
+            deep_sizeof([ shared, shared ]),
+            sys.getsizeof([ shared, shared ]) + sys.getsizeof(shared),
+            msg='Shared members counted twice'
+        )
+
+        class Sized(object):
+            nbytes = 12345
+
+        self.assertEqual(deep_sizeof({ 'a': Sized() }) > 12345, True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import sys
+import unittest
+from treetl import Job
+
+
+# shared memory and pickle protocol 5 are python 3.8+
+EXECUTORS = [ 'serial', 'threads' ] + ([ 'processes' ] if sys.version_info >= (3, 8) else [ ])
+
+
+# jobs run by the process executor have to be picklable, so they live at module level
+
+class Extract(Job):
+    def transform(self, **kwargs):
+        self.transformed_data = [ self.params['day'] ] * 2
+        return self
+
+
+@Job.dependency(rows=Job.same(Extract))
+class Clean(Job):
+    def transform(self, rows, **kwargs):
+        self.transformed_data = len(rows)
+        return self
+
+
+@Job.dependency(counts=Job.every(Clean))
+class Total(Job):
+    def transform(self, counts, **kwargs):
+        self.transformed_data = sum(counts)
+        return self
+
+
+class TestPartitions(unittest.TestCase):
+
+    def setUp(self):
+        self.days = [ '2026-10-0{}'.format(d) for d in range(1, 4) ]
+        self.Extract, self.Clean, self.Total = Extract, Clean, Total
+
+    def test_ids(self):
+        from treetl import JobRunner
+
+        runner = JobRunner([ self.Clean(day=d) for d in self.days ])
+        self.assertEqual(
+            sorted(j.__class__.__name__ for j in runner.jobs()), [ 'Clean' ] * 3 + [ 'Extract' ] * 3
+        )
+        self.assertEqual(
+            [ p.id for p in runner.parents(self.Clean(day='2026-10-02')) ], [ "Extract(day='2026-10-02')" ]
+        )
+
+        # same parameters, same job
+        runner.add_job(self.Clean(day='2026-10-02'))
+        self.assertEqual(len(runner.jobs()), 6)
+
+    def test_fan_out_fan_in(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        for executor in EXECUTORS:
+            # the fan in job can be added before or after the partitions it reads
+            total = self.Total()
+            runner = JobRunner([ self.Clean(day=self.days[0]), total ] + [
+                self.Clean(day=d) for d in self.days[1:]
+            ], executor=executor).run()
+
+            self.assertEqual(runner.status, JOB_STATUS.DONE, msg=executor)
+            self.assertEqual(total.transformed_data, 6, msg=executor)
+            self.assertEqual(len(runner.parents(total)), 3, msg=executor)
+
+    def test_subset_of_params(self):
+        from treetl import Job, JobRunner
+
+        @Job.dependency(rows=Job.same(self.Extract, 'day'))
+        class Regional(Job):
+            def transform(self, rows, **kwargs):
+                self.transformed_data = (self.params['region'], rows)
+                return self
+
+        job = Regional(day=self.days[0], region='eu')
+        JobRunner([ job ]).run()
+        self.assertEqual(job.transformed_data, ('eu', [ self.days[0] ] * 2))
+
+    def test_configured_parent(self):
+        from treetl import Job, JobRunner
+
+        class Src(Job):
+            def transform(self, **kwargs):
+                self.transformed_data = self.params.get('table', 'DEFAULT')
+                return self
+
+        @Job.dependency(src=Src)
+        class Child(Job):
+            def transform(self, src, **kwargs):
+                self.transformed_data = src
+                return self
+
+        # a plain job type dependency is the one instance of it that was added, whichever was added first
+        for jobs in [ [ Src(table='orders'), Child() ], [ Child(), Src(table='orders') ] ]:
+            runner = JobRunner(jobs).run()
+            self.assertEqual(sorted(n.id for n in runner.job_results()), [ 'Child', "Src(table='orders')" ])
+            self.assertEqual(runner.job_results(Child()).data.transformed_data, 'orders')
+
+        self.assertRaises(ValueError, JobRunner, [ Src(table='orders'), Src(table='items'), Child() ])
+        self.assertRaises(ValueError, JobRunner, [ Child(), Src(table='orders'), Src(table='items') ])
+
+    def test_clear_and_start_from_type(self):
+        from treetl import JobRunner, JOB_STATUS
+        from treetl.tools.checkpoint import LocalCheckpointStore
+        import shutil
+        import tempfile
+
+        runner = JobRunner([ self.Total(), self.Clean(day=self.days[0]) ])
+        runner.clear_jobs()
+        runner.add_jobs([ self.Clean(day=self.days[1]) ])
+        self.assertEqual(len(runner.jobs()), 2)
+
+        path = tempfile.mkdtemp()
+        try:
+            runner = JobRunner([ self.Clean(day=d) for d in self.days ], checkpoint_store=LocalCheckpointStore(path))
+            runner.run()
+
+            # a job type stands for every instance of it
+            runner.run(start_from=self.Clean)
+            self.assertEqual(runner.status, JOB_STATUS.DONE)
+            self.assertEqual(sorted(runner.report.durations), sorted("Clean(day='{}')".format(d) for d in self.days))
+        finally:
+            shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import pickle
+import unittest
+
+from treetl import Job
+
+
+# plans are pickled along with their jobs, so these live at module level
+
+class JobA(Job):
+    def transform(self, **kwargs):
+        self.transformed_data = 1
+        return self
+
+
+@Job.dependency(a=JobA)
+class JobB(Job):
+    def transform(self, a, **kwargs):
+        self.transformed_data = a + 1
+        return self
+
+
+@Job.dependency(a=JobA, b=JobB)
+class JobC(Job):
+    runs = 0
+
+    def transform(self, a, b, **kwargs):
+        JobC.runs += 1
+        self.transformed_data = a + b
+        return self
+
+
+@Job.dependency(part=Job.same(JobA))
+class JobPart(Job):
+    def transform(self, part, **kwargs):
+        self.transformed_data = part * 10
+        return self
+
+
+@Job.dependency(parts=Job.every(JobPart))
+class JobSum(Job):
+    def transform(self, parts, **kwargs):
+        self.transformed_data = sum(parts)
+        return self
+
+
+class TestPlan(unittest.TestCase):
+
+    def test_repeated_runs(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        job_c = JobC()
+        plan = JobRunner([ job_c ]).compile()
+        self.assertEqual([ j.__class__.__name__ for j in plan.jobs() ], [ 'JobA', 'JobB', 'JobC' ])
+
+        JobC.runs = 0
+        for _ in range(100):
+            self.assertEqual(plan.run().status, JOB_STATUS.DONE)
+        self.assertEqual(JobC.runs, 100)
+        self.assertEqual(job_c.transformed_data, 3)
+
+    def test_pickled_plan(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        plan = JobRunner([ JobSum(), JobPart(n=1), JobPart(n=2) ]).compile()
+        plan = pickle.loads(pickle.dumps(plan)).run()
+        self.assertEqual(plan.status, JOB_STATUS.DONE)
+        self.assertEqual(plan.jobs()[-1].transformed_data, 20)
+
+    def test_cache_points_and_failures(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        events = [ ]
+
+        class Tracked(Job):
+            def transform(self, **kwargs):
+                events.append(self.__class__.__name__ + '.transform')
+                return self
+
+            def cache(self, **kwargs):
+                events.append(self.__class__.__name__ + '.cache')
+                return self
+
+            def uncache(self, **kwargs):
+                events.append(self.__class__.__name__ + '.uncache')
+                return self
+
+        class Top(Tracked):
+            pass
+
+        @Job.dependency(top=Top)
+        class Middle(Tracked):
+            pass
+
+        @Job.dependency(top=Top, middle=Middle)
+        class Bottom(Tracked):
+            pass
+
+        plan = JobRunner([ Bottom(), Middle() ]).compile().run()
+        self.assertEqual(events[:5], [
+            'Top.transform', 'Top.cache',
+            'Middle.transform', 'Middle.cache',
+            'Bottom.transform'
+        ])
+        # parents are released together, in dependency keyword order
+        self.assertEqual(sorted(events[5:]), [ 'Middle.uncache', 'Top.uncache' ])
+
+        def fail(job, **kwargs):
+            raise ValueError()
+
+        Middle.transform = fail
+        del events[:]
+        plan.run()
+        self.assertEqual(plan.status, JOB_STATUS.FAILED)
+        self.assertEqual([ j.__class__.__name__ for j in plan.failed_jobs() ], [ 'Middle', 'Bottom' ])
+        self.assertEqual(events, [ 'Top.transform', 'Top.cache', 'Top.uncache' ])
+
+        # a last consumer that fails after its transform has already released its parents
+        del Middle.transform
+        Bottom.load = fail
+        del events[:]
+        plan.run()
+        self.assertEqual([ j.__class__.__name__ for j in plan.failed_jobs() ], [ 'Bottom' ])
+        self.assertEqual(sorted(events[5:]), [ 'Middle.uncache', 'Top.uncache' ])
+
+
+if __name__ == '__main__':
+    unittest.main()
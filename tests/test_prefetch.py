@@ -0,0 +1,75 @@
+import threading
+import unittest
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+
+        self.events = [ ]
+        self.child_extracting = threading.Event()
+        events, child_extracting = self.events, self.child_extracting
+
+        class Parent(Job):
+            def transform(self, **kwargs):
+                # give the child's extract a chance to start while the parent is busy
+                child_extracting.wait(2)
+                events.append('Parent.transform')
+                self.transformed_data = 1
+                return self
+
+        @Job.dependency(parent=Parent)
+        class Child(Job):
+            def extract(self, **kwargs):
+                child_extracting.set()
+                events.append('Child.extract')
+                self.extracted_data = 2
+                return self
+
+            def transform(self, parent, **kwargs):
+                events.append('Child.transform')
+                self.transformed_data = parent + self.extracted_data
+                return self
+
+        self.Parent, self.Child = Parent, Child
+
+    def test_extract_ahead(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        for executor in [ 'serial', 'threads' ]:
+            del self.events[:]
+            self.child_extracting.clear()
+            child = self.Child()
+            runner = JobRunner([ child ], executor=executor, prefetch=2).run()
+
+            self.assertEqual(runner.status, JOB_STATUS.DONE, msg=executor)
+            self.assertEqual(self.events, [ 'Child.extract', 'Parent.transform', 'Child.transform' ], msg=executor)
+            self.assertEqual(child.transformed_data, 3, msg=executor)
+
+    def test_off_by_default(self):
+        from treetl import JobRunner
+
+        self.child_extracting.set()
+        JobRunner([ self.Child() ]).run()
+        self.assertEqual(self.events, [ 'Parent.transform', 'Child.extract', 'Child.transform' ])
+
+    def test_failures(self):
+        from treetl import Job, JobRunner, JOB_STATUS
+
+        @Job.dependency(parent=self.Parent)
+        class BadExtract(Job):
+            def extract(self, **kwargs):
+                raise ValueError()
+
+        self.child_extracting.set()
+        runner = JobRunner([ BadExtract(), self.Child() ], prefetch=1).run()
+        self.assertEqual(runner.status, JOB_STATUS.FAILED)
+        self.assertEqual([ j.__class__.__name__ for j in runner.failed_jobs() ], [ 'BadExtract' ])
+
+        with self.assertRaises(ValueError):
+            JobRunner(executor='processes', prefetch=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
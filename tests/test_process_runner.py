@@ -0,0 +1,209 @@
+import os
+import pickle
+import sys
+import unittest
+
+from treetl import Job
+
+
+# jobs run by the process executor have to be picklable, so they live at module level
+
+class JobA(Job):
+    def transform(self, **kwargs):
+        self.transformed_data = bytearray(b'treetl' * 1000)
+        self.worker_pid = os.getpid()
+        return self
+
+
+@Job.dependency(a_data=JobA)
+class JobB(Job):
+    def transform(self, a_data=None, **kwargs):
+        self.transformed_data = len(a_data)
+        return self
+
+
+@Job.dependency(a_data=JobA)
+class JobC(Job):
+    def transform(self, a_data=None, **kwargs):
+        self.transformed_data = bytes(a_data[:6]).upper()
+        return self
+
+
+@Job.dependency(b_data=JobB, c_data=JobC)
+class JobD(Job):
+    def transform(self, b_data=None, c_data=None, **kwargs):
+        self.transformed_data = (b_data, c_data)
+        return self
+
+
+class FaultyJob(Job):
+    def extract(self, **kwargs):
+        raise ValueError('bad source')
+
+
+@Job.dependency(faulty_parent=FaultyJob)
+class VictimJob(Job):
+    pass
+
+
+class BufferJob(Job):
+    def transform(self, **kwargs):
+        # handed to children out-of-band, like a numpy array
+        self.transformed_data = pickle.PickleBuffer(bytearray(b'abc' * 1000)) if hasattr(pickle, 'PickleBuffer') else None
+        return self
+
+
+@Job.dependency(buf=BufferJob)
+class WriterJob(Job):
+    def transform(self, buf=None, **kwargs):
+        try:
+            buf[0] = ord('x')
+            self.transformed_data = 'written'
+        except TypeError:
+            self.transformed_data = 'readonly'
+        return self
+
+
+@unittest.skipIf(sys.version_info < (3, 8), 'needs multiprocessing.shared_memory and pickle protocol 5')
+class TestProcessRunner(unittest.TestCase):
+
+    def test_process_runner(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        jobs = [ JobD(), JobC(), JobB(), JobA() ]
+        runner = JobRunner(jobs, executor='processes', max_workers=2).run()
+
+        self.assertEqual(runner.status, JOB_STATUS.DONE)
+        self.assertEqual(jobs[0].transformed_data, (6000, b'TREETL'), msg='Incorrect JobD transformed data')
+        self.assertEqual(runner.job_results(jobs[3]).data.transformed_data, bytearray(b'treetl' * 1000))
+
+        # state set in the worker is merged back into the submitted job
+        self.assertNotEqual(jobs[3].worker_pid, os.getpid(), msg='JobA did not run in a worker process')
+        for job in jobs:
+            self.assertEqual(runner.job_results(job).status, JOB_STATUS.DONE)
+
+    def test_process_failures(self):
+        from treetl import JobRunner, JOB_STATUS, JobException, ParentJobException
+
+        jobs = [ FaultyJob(), VictimJob(), JobA() ]
+        runner = JobRunner(jobs, executor='processes').run()
+
+        self.assertEqual(runner.status, JOB_STATUS.FAILED)
+        self.assertEqual(runner.failed_job_roots(), [ jobs[0] ])
+
+        faulty = runner.job_results(jobs[0])
+        self.assertIsInstance(faulty.error, JobException)
+        self.assertEqual(faulty.status, JOB_STATUS.FAILED)
+
+        victim = runner.job_results(jobs[1])
+        self.assertEqual(victim.status, JOB_STATUS.FAILED)
+        self.assertIsInstance(victim.error, ParentJobException)
+
+        self.assertEqual(runner.job_results(jobs[2]).status, JOB_STATUS.DONE)
+
+
+    def test_readonly_parents(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        for readonly, expected in [ (True, 'readonly'), (False, 'written') ]:
+            jobs = [ WriterJob(), BufferJob() ]
+            runner = JobRunner(jobs, executor='processes', readonly_parents=readonly).run()
+
+            self.assertEqual(runner.status, JOB_STATUS.DONE)
+            self.assertEqual(jobs[0].transformed_data, expected)
+
+            # the driver's copy is mapped from the block the worker wrote and outlives the run
+            self.assertEqual(bytes(jobs[1].transformed_data)[1:], b'bc' + b'abc' * 999)
+
+
+class TestOldPythons(unittest.TestCase):
+
+    @unittest.skipIf(sys.version_info >= (3, 8), 'shared memory is available')
+    def test_processes_unavailable(self):
+        from treetl import JobRunner
+        self.assertRaises(RuntimeError, JobRunner, executor='processes')
+
+    @unittest.skipIf(sys.version_info >= (3, 9), 'tracemalloc.reset_peak is available')
+    def test_profile_unavailable(self):
+        from treetl import JobRunner
+        self.assertRaises(RuntimeError, JobRunner([ JobA() ]).run, profile=True)
+
+
+@unittest.skipIf(sys.version_info < (3, 8), 'needs multiprocessing.shared_memory and pickle protocol 5')
+class TestSharedPayload(unittest.TestCase):
+
+    def test_shared_payload(self):
+        import pickle
+        from treetl.tools.sharedmem import SharedPayload
+
+        # PickleBuffer is what numpy arrays, arrow buffers et c. hand to protocol 5
+        obj = { 'raw': pickle.PickleBuffer(bytearray(b'0123456789')), 'other': [ 1, 2, 3 ] }
+        payload = SharedPayload(obj)
+        self.assertEqual(payload.nbytes, 10, msg='Buffer not moved out-of-band')
+
+        shared, release = payload.attach()
+        self.assertEqual(bytes(shared['raw']), b'0123456789')
+        self.assertEqual(shared['other'], [ 1, 2, 3 ])
+        del shared
+        release()
+
+        self.assertEqual(bytes(payload.load()['raw']), b'0123456789')
+        payload.unlink()
+        self.assertIsNone(payload.name)
+
+        # views stay usable once released and unlinked
+        payload = SharedPayload(obj)
+        shared, release = payload.attach(readonly=True)
+        release()
+        payload.unlink()
+        self.assertEqual(bytes(shared['raw']), b'0123456789')
+        self.assertTrue(memoryview(shared['raw']).readonly)
+
+        # nothing out-of-band, nothing in shared memory
+        in_band = SharedPayload([ 1, 2, 3 ])
+        self.assertIsNone(in_band.name)
+        self.assertEqual(in_band.load(), [ 1, 2, 3 ])
+
+
+@unittest.skipIf(sys.version_info < (3, 8), 'memoryview.toreadonly needs python 3.8+')
+class TestReadonlyView(unittest.TestCase):
+
+    def test_readonly_view(self):
+        from treetl.tools.sharedmem import readonly_view
+
+        raw = bytearray(b'abc')
+        view = readonly_view(memoryview(raw))
+        self.assertTrue(view.readonly)
+
+        # same memory, no copy
+        raw[0] = ord('z')
+        self.assertEqual(bytes(view), b'zbc')
+
+        # containers are handed over as they are rather than copied
+        data = { 'a': [ memoryview(raw), 1 ] }
+        self.assertIs(readonly_view(data), data)
+        rows = list(range(1000))
+        self.assertIs(readonly_view(rows), rows)
+
+    def test_readonly_parents(self):
+        from treetl import Job, JobRunner
+
+        class Parent(Job):
+            def transform(self, **kwargs):
+                self.transformed_data = memoryview(bytearray(b'abc'))
+                return self
+
+        @Job.dependency(data=Parent)
+        class Child(Job):
+            def transform(self, data, **kwargs):
+                self.transformed_data = data.readonly
+                return self
+
+        for readonly in [ True, False ]:
+            child = Child()
+            JobRunner([ child ], executor='threads', readonly_parents=readonly).run()
+            self.assertEqual(child.transformed_data, readonly)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import sys
+import time
+import unittest
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+
+        class JobA(Job):
+            def extract(self, **kwargs):
+                time.sleep(0.05)
+                return self
+
+            def transform(self, **kwargs):
+                self.transformed_data = bytearray(1000000)
+                return self
+
+        @Job.dependency(a=JobA)
+        class JobB(Job):
+            def transform(self, a, **kwargs):
+                # burns cpu, keeps nothing
+                self.transformed_data = sum(len(bytes(a)) for _ in range(20))
+                return self
+
+        self.jobs = [ JobB(), JobA() ]
+
+    @unittest.skipIf(sys.version_info < (3, 9), 'profiling needs tracemalloc.reset_peak')
+    def test_profile(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        for executor in [ 'serial', 'threads' ]:
+            runner = JobRunner(self.jobs, executor=executor).run(profile=True)
+            self.assertEqual(runner.status, JOB_STATUS.DONE)
+
+            phases = runner.report.phases
+            self.assertEqual(sorted(phases['JobA']), [ 'cache', 'extract', 'load', 'transform', 'uncache' ])
+            self.assertEqual(sorted(phases['JobB']), [ 'extract', 'load', 'transform' ])
+
+            self.assertGreaterEqual(phases['JobA']['extract'].wall, 0.05)
+            self.assertLess(phases['JobA']['extract'].cpu, 0.05, msg='Sleeping counted as cpu time')
+            self.assertGreater(phases['JobB']['transform'].cpu, 0)
+            if executor == 'serial':
+                self.assertGreaterEqual(phases['JobA']['transform'].net_bytes, 1000000)
+                self.assertGreaterEqual(phases['JobB']['transform'].peak_bytes, 1000000)
+                self.assertLess(phases['JobB']['transform'].net_bytes, 1000000)
+
+            # sorted summaries
+            self.assertEqual(runner.report.phase_rows()[0][:2], ('JobA', 'extract'))
+            self.assertEqual(runner.report.job_totals('peak_bytes')[0][0], 'JobB')
+            self.assertIn('JobA.extract', runner.report.summary())
+
+    def test_no_profile(self):
+        from treetl import JobRunner
+
+        runner = JobRunner(self.jobs).run()
+        self.assertEqual(runner.report.phases, { })
+        self.assertNotIn('phases', runner.report.summary())
+
+    @unittest.skipIf(sys.version_info < (3, 9), 'profiling needs tracemalloc.reset_peak')
+    def test_profile_dumps(self):
+        import pstats
+        from treetl import JobRunner
+
+        path = tempfile.mkdtemp()
+        try:
+            JobRunner(self.jobs).run(profile=True, profile_dir=path)
+            self.assertEqual(sorted(os.listdir(path)), [ 'JobA.prof', 'JobB.prof' ])
+            self.assertGreater(pstats.Stats(os.path.join(path, 'JobB.prof')).total_calls, 0)
+        finally:
+            shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+import unittest
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        from treetl import Job
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.transform_calls = [ ]
+
+        def notify(job):
+            self.transform_calls.append(job.__class__.__name__)
+
+        class JobA(Job):
+            def transform(self, **kwargs):
+                notify(self)
+                self.transformed_data = 1
+                return self
+
+        @Job.dependency(a_param=JobA)
+        class JobB(Job):
+            CACHE_KEY_ATTRS = ('scale',)
+
+            def __init__(self, scale=2):
+                super(JobB, self).__init__()
+                self.scale = scale
+
+            def transform(self, a_param=None, **kwargs):
+                notify(self)
+                self.transformed_data = a_param * self.scale
+                return self
+
+        @Job.dependency(b_param=JobB)
+        class JobC(Job):
+            def transform(self, b_param=None, **kwargs):
+                notify(self)
+                self.transformed_data = b_param + 1
+                return self
+
+        self.JobA, self.JobB, self.JobC = JobA, JobB, JobC
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir)
+
+    def run_jobs(self, scale=2, **kwargs):
+        from treetl import JobRunner
+        from treetl.tools.resultcache import ResultCache
+
+        self.transform_calls = [ ]
+        jobs = [ self.JobA(), self.JobB(scale), self.JobC() ]
+        runner = JobRunner(jobs, result_cache=ResultCache(self.tmp_dir, **kwargs)).run()
+        return jobs, runner
+
+    def test_result_cache(self):
+        from treetl import JOB_STATUS
+
+        jobs, runner = self.run_jobs()
+        self.assertEqual(self.transform_calls, [ 'JobA', 'JobB', 'JobC' ])
+        self.assertEqual(runner.report.cache_hits, [ ])
+        self.assertEqual(sorted(runner.report.cache_misses), [ 'JobA', 'JobB', 'JobC' ])
+
+        # nothing changed, nothing recomputed
+        jobs, runner = self.run_jobs()
+        self.assertEqual(runner.status, JOB_STATUS.DONE)
+        self.assertEqual(self.transform_calls, [ ])
+        self.assertEqual(sorted(runner.report.cache_hits), [ 'JobA', 'JobB', 'JobC' ])
+        self.assertEqual(jobs[2].transformed_data, 3)
+        self.assertIn('3 hit(s), 0 miss(es)', runner.report.summary())
+
+        # new parameters on JobB invalidate it and everything downstream of it
+        jobs, runner = self.run_jobs(scale=5)
+        self.assertEqual(self.transform_calls, [ 'JobB', 'JobC' ])
+        self.assertEqual(runner.report.cache_hits, [ 'JobA' ])
+        self.assertEqual(jobs[2].transformed_data, 6)
+
+    def test_fingerprint(self):
+        from treetl import Job
+        from treetl.tools.resultcache import job_fingerprint
+
+        def double(extracted_data=None, **kwargs):
+            return extracted_data * 2
+
+        def triple(extracted_data=None, **kwargs):
+            return extracted_data * 3
+
+        self.assertEqual(job_fingerprint(self.JobB()), job_fingerprint(self.JobB()))
+        self.assertNotEqual(job_fingerprint(self.JobB()), job_fingerprint(self.JobB(3)))
+        self.assertNotEqual(job_fingerprint(self.JobA()), job_fingerprint(self.JobC()))
+
+        # functions handed to Job.create are part of the fingerprint
+        self.assertNotEqual(
+            job_fingerprint(Job.create('DynJob', transform=double)()),
+            job_fingerprint(Job.create('DynJob', transform=triple)())
+        )
+
+    def test_changed_extractor(self):
+        from treetl import Job, JobRunner
+        from treetl.tools.resultcache import ResultCache, job_fingerprint
+
+        def make_job(extractor):
+            @Job.extractors(rows=extractor)
+            class Rows(Job):
+                def transform(self, **kwargs):
+                    self.transformed_data = self.rows
+                    return self
+            return Rows()
+
+        def read_v1(**kwargs):
+            return [ 1, 2, 3 ]
+
+        def read_v2(**kwargs):
+            return [ 1, 2, 3, 4 ]
+
+        self.assertEqual(job_fingerprint(make_job(read_v1)), job_fingerprint(make_job(read_v1)))
+        self.assertNotEqual(job_fingerprint(make_job(read_v1)), job_fingerprint(make_job(read_v2)))
+
+        # a changed extractor misses the result cached with the old one
+        for extractor, expected in [ (read_v1, [ 1, 2, 3 ]), (read_v2, [ 1, 2, 3, 4 ]) ]:
+            job = make_job(extractor)
+            runner = JobRunner([ job ], result_cache=ResultCache(self.tmp_dir)).run()
+            self.assertEqual(runner.report.cache_hits, [ ])
+            self.assertEqual(job.transformed_data, expected)
+
+    def test_reused_jobs(self):
+        from treetl import Job, JobRunner
+        from treetl.tools.resultcache import ResultCache
+
+        # what a job sets on itself while running is not part of its key
+        @Job.extractors(rows=lambda **kwargs: [ 1, 2, 3 ])
+        class Rows(Job):
+            def transform(self, **kwargs):
+                self.transformed_data = len(self.rows)
+                return self
+
+        job = Rows(table='orders')
+        hits = [ JobRunner([ job ], result_cache=ResultCache(self.tmp_dir)).run().report.cache_hits for _ in range(2) ]
+        self.assertEqual(hits, [ [ ], [ 'Rows(table=\'orders\')' ] ])
+
+    def test_expiry(self):
+        import os
+        import time
+        from treetl.tools.resultcache import ResultCache
+
+        cache = ResultCache(self.tmp_dir, max_age=60)
+        cache.save('x', 1)
+        self.assertEqual(cache.load('x'), 1)
+
+        # reads don't keep an expired entry alive
+        stale = time.time() - 120
+        os.utime(cache._file('x'), (stale, stale))
+        self.assertNotIn('x', cache)
+        self.assertRaises(KeyError, cache.load, 'x')
+
+    def test_sweeps(self):
+        from treetl.tools.resultcache import ResultCache
+
+        sweeps = [ ]
+
+        class CountingCache(ResultCache):
+            def evict(self):
+                sweeps.append(1)
+                super(CountingCache, self).evict()
+
+        # the directory is listed on the first save and once the cache is full, not on every save
+        cache = CountingCache(self.tmp_dir, max_bytes=10 ** 6)
+        for i in range(20):
+            cache.save(str(i), i)
+        self.assertEqual(len(sweeps), 1)
+
+        cache.save('big', bytearray(10 ** 6))
+        self.assertEqual(len(sweeps), 2)
+        self.assertNotIn('0', cache)
+
+    def test_eviction(self):
+        import os
+        from treetl.tools.resultcache import ResultCache
+
+        self.run_jobs()
+        self.assertEqual(len(os.listdir(self.tmp_dir)), 3)
+
+        # everything is too old
+        ResultCache(self.tmp_dir, max_age=-1).evict()
+        self.assertEqual(os.listdir(self.tmp_dir), [ ])
+
+        # room for a single entry. least recently used go first
+        cache = ResultCache(self.tmp_dir)
+        cache.save('x', 1)
+        cache.save('y', 2)
+        os.utime(cache._file('x'), (0, 0))
+        cache.max_bytes = os.path.getsize(cache._file('y'))
+        cache.evict()
+        self.assertNotIn('x', cache)
+        self.assertIn('y', cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
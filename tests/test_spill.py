@@ -0,0 +1,129 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+
+class TestSpillCache(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+        from treetl.tools.spill import SpillCache
+
+        self.dir = tempfile.mkdtemp()
+        self.seen = seen = { }
+
+        class Tiers(SpillCache):
+            spill_memory_bytes = 1000
+            spill_compress_bytes = 10000
+            spill_directory = self.dir
+
+        def parent(size):
+            @Job.inject(Tiers)
+            class Parent(Job):
+                def transform(self, **kwargs):
+                    self.transformed_data = [ 'x' * 10 ] * size
+                    return self
+
+                def load(self, **kwargs):
+                    seen[type(self).__name__ + '.load'] = self.transformed_data
+                    return self
+            return Parent
+
+        Small, Medium, Large = parent(10), parent(500), parent(5000)
+        Small.__name__, Medium.__name__, Large.__name__ = 'Small', 'Medium', 'Large'
+
+        def child(parent_type, i):
+            @Job.dependency(data=parent_type)
+            class Child(Job):
+                def transform(self, data, **kwargs):
+                    seen.setdefault(parent_type.__name__, [ ]).append(data)
+                    self.transformed_data = len(data)
+                    return self
+            Child.__name__ = '{}Child{}'.format(parent_type.__name__, i)
+            return Child
+
+        self.parents = dict(Small=Small, Medium=Medium, Large=Large)
+        self.children = [ child(p, i)() for p in [ Small, Medium, Large ] for i in range(2) ]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_children_get_original_data(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        for executor in [ 'serial', 'threads' ]:
+            self.seen.clear()
+            runner = JobRunner(self.children, executor=executor).run()
+            self.assertEqual(runner.status, JOB_STATUS.DONE, msg=executor)
+
+            for name, size in [ ('Small', 10), ('Medium', 500), ('Large', 5000) ]:
+                self.assertEqual(self.seen[name + '.load'], [ 'x' * 10 ] * size, msg=name)
+                self.assertEqual(self.seen[name], [ [ 'x' * 10 ] * size ] * 2, msg=name)
+
+                # spilled data is rebuilt once and shared by the children
+                self.assertIs(self.seen[name][0], self.seen[name][1], msg=name)
+
+            self.assertEqual([ c.transformed_data for c in self.children ], [ 10, 10, 500, 500, 5000, 5000 ])
+
+            # spilled and compressed copies are dropped once the children are done, small results stay
+            self.assertEqual(os.listdir(self.dir), [ ])
+            parents = dict((type(j).__name__, j) for j in runner.jobs() if type(j).__name__ in self.parents)
+            self.assertEqual(parents['Small'].transformed_data, [ 'x' * 10 ] * 10)
+            self.assertIsNone(parents['Medium'].transformed_data)
+            self.assertIsNone(parents['Large'].transformed_data)
+
+    def test_tiers(self):
+        from treetl.tools.spill import CompressedData, SpilledData
+
+        for name, tier in [ ('Small', list), ('Medium', CompressedData), ('Large', SpilledData) ]:
+            job = self.parents[name]()
+            job.extract().transform().cache()
+            self.assertIsInstance(job.transformed_data, list, msg='{} spilled before load'.format(name))
+            job.load()
+            self.assertIsInstance(job.transformed_data, tier, msg=name)
+
+        self.assertEqual(len(os.listdir(self.dir)), 1)
+
+
+class TestSpilledData(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    @unittest.skipIf(pickle.HIGHEST_PROTOCOL < 5, 'out-of-band buffers need pickle protocol 5')
+    def test_buffers_are_mapped_copy_on_write(self):
+        from treetl.tools.spill import SpilledData
+
+        data = { 'a': pickle.PickleBuffer(bytearray(b'abc' * 1000)), 'b': pickle.PickleBuffer(bytearray(b'z' * 7)) }
+        handle = SpilledData(data, self.dir)
+
+        first = handle.resolve()
+        self.assertEqual(bytes(first['a']), b'abc' * 1000)
+        self.assertEqual(bytes(first['b']), b'z' * 7)
+
+        # rebuilt once, and what is changed never makes it back to the file
+        self.assertIs(handle.resolve(), first)
+        first['a'][0] = ord('x')
+        with open(handle.path, 'rb') as f:
+            self.assertNotIn(b'xbc', f.read())
+
+        handle.discard()
+        self.assertEqual(os.listdir(self.dir), [ ])
+        self.assertEqual(bytes(first['b']), b'z' * 7)
+        self.assertRaises(ValueError, handle.resolve)
+
+    def test_handles_pickle_as_their_data(self):
+        from treetl.tools.spill import CompressedData, SpilledData
+
+        for handle in [ CompressedData([ 1, 2, 3 ]), SpilledData([ 1, 2, 3 ], self.dir) ]:
+            self.assertEqual(pickle.loads(pickle.dumps(handle)), [ 1, 2, 3 ])
+            handle.discard()
+
+
+if __name__ == '__main__':
+    unittest.main()
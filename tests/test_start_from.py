@@ -0,0 +1,109 @@
+import unittest
+
+
+class TestStartFrom(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        from treetl import Job
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.transform_calls = [ ]
+
+        def notify(job):
+            self.transform_calls.append(job.__class__.__name__)
+
+        class JobA(Job):
+            def transform(self, **kwargs):
+                notify(self)
+                self.transformed_data = 1
+                return self
+
+        @Job.dependency(a_param=JobA)
+        class JobB(Job):
+            def transform(self, a_param=None, **kwargs):
+                notify(self)
+                self.transformed_data = a_param + 1
+                return self
+
+        @Job.dependency(b_param=JobB)
+        class JobC(Job):
+            def transform(self, b_param=None, **kwargs):
+                notify(self)
+                self.transformed_data = b_param * 10
+                return self
+
+        @Job.dependency(input_param=JobA)
+        class JobD(Job):
+            def transform(self, input_param=None, **kwargs):
+                notify(self)
+                self.transformed_data = input_param + 2
+                return self
+
+        @Job.dependency(in_one=JobB, in_two=JobD)
+        class JobE(Job):
+            def transform(self, in_one=None, in_two=None, **kwargs):
+                notify(self)
+                self.transformed_data = in_one + in_two
+                return self
+
+        self.job_types = [ JobA, JobB, JobC, JobD, JobE ]
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir)
+
+    def new_runner(self, **kwargs):
+        from treetl import JobRunner
+        from treetl.tools.checkpoint import LocalCheckpointStore
+
+        jobs = [ job_type() for job_type in self.job_types ]
+        return jobs, JobRunner(jobs, checkpoint_store=LocalCheckpointStore(self.tmp_dir), **kwargs)
+
+    def test_start_from(self):
+        from treetl import JOB_STATUS
+
+        jobs, runner = self.new_runner()
+        runner.run()
+        self.assertEqual(sorted(self.transform_calls), [ 'JobA', 'JobB', 'JobC', 'JobD', 'JobE' ])
+
+        for executor in [ 'serial', 'threads' ]:
+            # fresh runner, as if in a new process
+            self.transform_calls = [ ]
+            jobs, runner = self.new_runner(executor=executor)
+            runner.run(start_from=self.job_types[1])
+
+            self.assertEqual(runner.status, JOB_STATUS.DONE)
+            self.assertEqual(sorted(self.transform_calls), [ 'JobB', 'JobC', 'JobE' ], msg=executor)
+            self.assertEqual(jobs[2].transformed_data, 20, msg='Incorrect JobC transformed data')
+            self.assertEqual(jobs[4].transformed_data, 5, msg='Incorrect JobE transformed data')
+            self.assertEqual(jobs[3].transformed_data, 3, msg='JobD not rehydrated')
+
+    def test_missing_checkpoint(self):
+        import os
+
+        jobs, runner = self.new_runner()
+        runner.run()
+
+        # without a checkpoint JobD is recomputed from JobA's
+        os.remove(os.path.join(self.tmp_dir, 'JobD.pkl'))
+        self.transform_calls = [ ]
+        jobs, runner = self.new_runner()
+        runner.run(start_from=jobs[2])
+        self.assertEqual(self.transform_calls, [ 'JobC' ])
+
+        self.transform_calls = [ ]
+        runner.run(start_from=jobs[4])
+        self.assertEqual(sorted(self.transform_calls), [ 'JobD', 'JobE' ])
+        self.assertEqual(jobs[4].transformed_data, 5)
+
+    def test_start_from_needs_store(self):
+        from treetl import JobRunner
+
+        runner = JobRunner([ job_type() for job_type in self.job_types ])
+        with self.assertRaises(ValueError):
+            runner.run(start_from=self.job_types[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
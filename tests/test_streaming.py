@@ -0,0 +1,149 @@
+import sys
+import unittest
+
+
+# shared memory and pickle protocol 5 are python 3.8+
+EXECUTORS = [ 'serial', 'threads' ] + ([ 'processes' ] if sys.version_info >= (3, 8) else [ ])
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+
+        self.events = [ ]
+        events = self.events
+
+        @Job.streaming(buffer=2)
+        class Numbers(Job):
+            def transform(self, **kwargs):
+                def chunks():
+                    for i in range(10):
+                        events.append('produce {}'.format(i))
+                        yield [ i ]
+                self.transformed_data = chunks()
+                return self
+
+        @Job.streaming(buffer=2)
+        @Job.transformers(lambda chunk, **kwargs: [ x * 2 for x in chunk ])
+        @Job.dependency(numbers=Numbers)
+        class Doubled(Job):
+            def transform(self, numbers, **kwargs):
+                self.transformed_data = numbers
+                return self
+
+        @Job.dependency(doubled=Doubled)
+        class Total(Job):
+            def transform(self, doubled, **kwargs):
+                self.transformed_data = 0
+                for chunk in doubled:
+                    events.append('consume')
+                    self.transformed_data += sum(chunk)
+                return self
+
+        @Job.dependency(numbers=Numbers)
+        class Count(Job):
+            def transform(self, numbers, **kwargs):
+                self.transformed_data = sum(len(c) for c in numbers)
+                return self
+
+        self.Numbers, self.Doubled, self.Total, self.Count = Numbers, Doubled, Total, Count
+
+    def test_chain_and_fan_out(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        for executor in EXECUTORS:
+            del self.events[:]
+            total, count = self.Total(), self.Count()
+            runner = JobRunner([ total, count, self.Doubled() ], executor=executor).run()
+
+            self.assertEqual(runner.status, JOB_STATUS.DONE, msg=executor)
+            self.assertEqual(total.transformed_data, 90, msg=executor)
+            self.assertEqual(count.transformed_data, 10, msg=executor)
+
+            # the consumer starts before the producer is done
+            self.assertTrue(self.events.index('consume') < self.events.index('produce 9'), msg=executor)
+
+    def test_backpressure(self):
+        import threading
+        from treetl import Job, JobRunner
+
+        release = threading.Event()
+        produced = [ ]
+
+        @Job.streaming(buffer=1)
+        class Source(Job):
+            def transform(self, **kwargs):
+                def chunks():
+                    for i in range(100):
+                        produced.append(i)
+                        yield i
+                self.transformed_data = chunks()
+                return self
+
+        @Job.dependency(source=Source)
+        class Slow(Job):
+            def transform(self, source, **kwargs):
+                release.wait(5)
+                self.transformed_data = list(source)
+                return self
+
+        threading.Timer(0.3, lambda: (produced.append('released'), release.set())).start()
+        slow = Slow()
+        JobRunner([ slow ]).run()
+
+        # a chunk per buffer (the child's and the job's own load) plus one waiting to go in
+        self.assertTrue(produced.index('released') <= 4, msg=produced[:10])
+        self.assertEqual(slow.transformed_data, list(range(100)))
+
+    def test_failures(self):
+        from treetl import Job, JobRunner
+
+        @Job.streaming()
+        class Broken(Job):
+            def transform(self, **kwargs):
+                def chunks():
+                    yield 1
+                    raise ValueError('bad chunk')
+                self.transformed_data = chunks()
+                return self
+
+        @Job.dependency(broken=Broken)
+        class Reader(Job):
+            def transform(self, broken, **kwargs):
+                self.transformed_data = list(broken)
+                return self
+
+        @Job.dependency(numbers=self.Numbers)
+        class Quitter(Job):
+            def transform(self, numbers, **kwargs):
+                # stops reading after one chunk without holding up its siblings
+                self.transformed_data = next(iter(numbers))
+                return self
+
+        reader, quitter, count = Reader(), Quitter(), self.Count()
+        runner = JobRunner([ reader, quitter, count ]).run()
+        self.assertEqual(
+            sorted(j.__class__.__name__ for j in runner.failed_jobs()), [ 'Broken', 'Reader' ]
+        )
+        self.assertEqual(quitter.transformed_data, [ 0 ])
+        self.assertEqual(count.transformed_data, 10)
+
+    def test_child_of_stream_and_its_descendant(self):
+        from treetl import Job, JobRunner, JOB_STATUS
+
+        # Both reads the stream but also waits on Count, which reads it too
+        @Job.dependency(numbers=self.Numbers, count=self.Count)
+        class Both(Job):
+            def transform(self, numbers, count, **kwargs):
+                self.transformed_data = sum(len(c) for c in numbers) + count
+                return self
+
+        both = Both()
+        runner = JobRunner([ both, self.Count() ]).run()
+        self.assertEqual(runner.status, JOB_STATUS.DONE)
+        self.assertEqual(both.transformed_data, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+
+class TestTargets(unittest.TestCase):
+
+    def setUp(self):
+        from treetl import Job
+
+        self.created, self.ran = [ ], [ ]
+
+        class TrackedJob(Job):
+            def __init__(tracked, **kwargs):
+                super(TrackedJob, tracked).__init__(**kwargs)
+                self.created.append(tracked.__class__.__name__)
+
+            def transform(tracked, **kwargs):
+                self.ran.append(tracked.__class__.__name__)
+                return tracked
+
+        class Shared(TrackedJob):
+            pass
+
+        class Warehouse(TrackedJob):
+            pass
+
+        @Job.dependency(shared=Shared)
+        class Report(TrackedJob):
+            pass
+
+        @Job.dependency(shared=Shared, warehouse=Warehouse)
+        class Everything(TrackedJob):
+            pass
+
+        self.Report, self.Everything = Report, Everything
+
+    def test_only_ancestors_run(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        for executor in [ 'serial', 'threads' ]:
+            del self.created[:]
+            del self.ran[:]
+
+            runner = JobRunner([ self.Report(), self.Everything() ], executor=executor)
+            self.assertEqual(sorted(self.created), [ 'Everything', 'Report' ], msg='Parents made on add')
+
+            runner.run(targets=[ self.Report ])
+            self.assertEqual(sorted(self.ran), [ 'Report', 'Shared' ], msg=executor)
+            self.assertNotIn('Warehouse', self.created, msg=executor)
+            self.assertEqual(runner.job_results(self.Everything()).status, JOB_STATUS.QUEUE, msg=executor)
+
+            # later runs pick up where the targeted one left off
+            runner.run()
+            self.assertEqual(sorted(self.ran), [ 'Everything', 'Report', 'Shared', 'Warehouse' ], msg=executor)
+
+    def test_unknown_target(self):
+        from treetl import Job, JobRunner
+
+        class Stranger(Job):
+            pass
+
+        with self.assertRaises(KeyError):
+            JobRunner([ self.Report() ]).run(targets=[ Stranger ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+
+
+class TestThreadedRunner(unittest.TestCase):
+
+    def setUp(self):
+        import threading
+        from treetl import Job
+
+        self.event_sequence = [ ]
+        lock = threading.Lock()
+
+        def notify(job, msg=''):
+            with lock:
+                self.event_sequence.append(job.__class__.__name__ + msg)
+
+        # set by JobD and waited on by JobB. only finishes quickly if the siblings overlap
+        d_started = threading.Event()
+        self.b_saw_d = b_saw_d = [ ]
+
+        class NotifyingJob(Job):
+            def transform(self, **kwargs):
+                notify(self, '.transform')
+                return self
+
+            def cache(self, **kwargs):
+                notify(self, '.cache')
+                return self
+
+            def uncache(self, **kwargs):
+                notify(self, '.uncache')
+                return self
+
+        class JobA(NotifyingJob):
+            def transform(self, **kwargs):
+                super(JobA, self).transform()
+                self.transformed_data = 1
+                return self
+
+        @Job.dependency(a_param=JobA)
+        class JobB(NotifyingJob):
+            def transform(self, a_param=None, **kwargs):
+                super(JobB, self).transform()
+                self.transformed_data = a_param + 1
+                return self
+
+            def load(self, **kwargs):
+                b_saw_d.append(d_started.wait(5))
+                return self
+
+        @Job.dependency(input_param=JobA)
+        class JobD(NotifyingJob):
+            def transform(self, input_param=None, **kwargs):
+                super(JobD, self).transform()
+                d_started.set()
+                self.transformed_data = input_param + 1
+                return self
+
+        @Job.dependency(in_one=JobB, in_two=JobD)
+        class JobE(NotifyingJob):
+            def transform(self, in_one=None, in_two=None, **kwargs):
+                super(JobE, self).transform()
+                self.transformed_data = in_one + in_two
+                return self
+
+        @Job.dependency(b_data=JobB)
+        class FaultyJob(NotifyingJob):
+            def transform(self, **kwargs):
+                raise ValueError()
+
+        @Job.dependency(faulty_parent=FaultyJob)
+        class VictimJob(NotifyingJob):
+            pass
+
+        self.jobs = [ JobE(), JobD(), JobB(), JobA() ]
+        self.faulty_jobs = [ FaultyJob(), VictimJob() ]
+
+    def test_threaded_runner(self):
+        from treetl import JobRunner, JOB_STATUS
+
+        runner = JobRunner(self.jobs, executor='threads', max_workers=4).run()
+        self.assertEqual(runner.status, JOB_STATUS.DONE)
+        self.assertEqual(self.jobs[0].transformed_data, 4, msg='Incorrect JobE transformed data')
+        self.assertEqual(self.b_saw_d, [ True ], msg='Sibling jobs JobB and JobD did not overlap')
+
+        for job_name in [ 'JobA', 'JobB', 'JobD', 'JobE' ]:
+            self.assertEqual(
+                self.event_sequence.count(job_name + '.transform'), 1,
+                msg='{} did not transform exactly once'.format(job_name)
+            )
+
+        def a_before_b(a, b):
+            return self.event_sequence.index(a) < self.event_sequence.index(b)
+
+        for a, b in [
+            ('JobA.cache', 'JobB.transform'), ('JobA.cache', 'JobD.transform'),
+            ('JobB.transform', 'JobA.uncache'), ('JobD.transform', 'JobA.uncache'),
+            ('JobE.transform', 'JobB.uncache'), ('JobE.transform', 'JobD.uncache')
+        ]:
+            self.assertTrue(a_before_b(a, b), msg='{} supposed to be before {}'.format(a, b))
+
+        self.assertEqual(self.event_sequence.count('JobA.uncache'), 1, msg='JobA uncached more than once')
+        self.assertNotIn('JobE.cache', self.event_sequence, msg='Erroneous cache call on JobE')
+
+    def test_threaded_failures(self):
+        from treetl import JobRunner, JOB_STATUS, ParentJobException
+
+        runner = JobRunner(self.jobs + self.faulty_jobs, executor='threads').run()
+        self.assertEqual(runner.status, JOB_STATUS.FAILED)
+        self.assertEqual(runner.failed_job_roots(), [ self.faulty_jobs[0] ])
+        self.assertNotIn('VictimJob.transform', self.event_sequence, msg='Child of failed job was executed')
+
+        victim = runner.job_results(self.faulty_jobs[1])
+        self.assertEqual(victim.status, JOB_STATUS.FAILED)
+        self.assertIsInstance(victim.error, ParentJobException)
+
+        # failure in one branch does not stop the others
+        self.assertEqual(runner.job_results(self.jobs[0]).status, JOB_STATUS.DONE)
+
+    def test_unknown_executor(self):
+        from treetl import JobRunner
+
+        with self.assertRaises(ValueError):
+            JobRunner(self.jobs, executor='gpus')
+
+
+if __name__ == '__main__':
+    unittest.main()
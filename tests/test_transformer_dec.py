@@ -2,6 +2,16 @@
 import unittest
 
 
+# chunks run in worker processes need picklable transformers
+
+def double(data, **kwargs):
+    return [ d * 2 for d in data ]
+
+
+def add(data, offset=0, **kwargs):
+    return [ d + offset for d in data ]
+
+
 class TestJobInjection(unittest.TestCase):
 
     def setUp(self):
@@ -26,5 +36,53 @@ class TestJobInjection(unittest.TestCase):
         self.assertEqual(self.NewJob().extract().transform(scale=5).transformed_data, 30)
 
 
+class TestChunkedTransformers(unittest.TestCase):
+
+    def test_chunked_transformers(self):
+        from treetl import Job
+
+        seen = [ ]
+
+        def record(data, **kwargs):
+            seen.append(len(data))
+            return data
+
+        for workers, executor in [ (0, 'threads'), (3, 'threads'), (2, 'processes') ]:
+            transformers = (double, add) if executor == 'processes' else (record, double, add, record)
+
+            @Job.chunked(size=10, workers=workers, executor=executor)
+            @Job.transformers(*transformers)
+            class NewJob(Job):
+                def extract(self, **kwargs):
+                    self.extracted_data = list(range(95))
+                    return self
+
+            del seen[:]
+            job = NewJob().extract().transform(offset=1)
+            self.assertEqual(job.transformed_data, [ d * 2 + 1 for d in range(95) ], msg=executor)
+            if executor == 'threads':
+                # every stage only ever saw a chunk
+                self.assertEqual(sorted(seen), sorted([ 10 ] * 18 + [ 5 ] * 2))
+
+    def test_combine(self):
+        from treetl import Job
+
+        @Job.chunked(size=2, combine=sum)
+        @Job.transformers(lambda data, **kwargs: sum(data))
+        class NewJob(Job):
+            def extract(self, **kwargs):
+                self.extracted_data = (1, 2, 3, 4, 5)
+                return self
+
+        self.assertEqual(NewJob().extract().transform().transformed_data, 15)
+
+    def test_split_and_concat(self):
+        from treetl.tools.chunking import split, concat
+
+        self.assertEqual(list(split((1, 2, 3), 2)), [ (1, 2), (3,) ])
+        self.assertEqual(concat(list(split('abcde', 2))), 'abcde')
+        self.assertRaises(TypeError, concat, [ object() ])
+
+
 if __name__ == '__main__':
     unittest.main()
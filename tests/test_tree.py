@@ -80,3 +80,86 @@ class TestJobExecutionOrder(unittest.TestCase):
             actual_seq=poly_tree.parents(self.nodes[7]),
             msg='Incorrect parents of Node H'
         )
+
+    def test_adjacency_index(self):
+        from treetl.tools.polytree import PolyTree, TreeNode
+
+        poly_tree = PolyTree(nodes=self.nodes)
+        for parent, child in self.node_arcs:
+            poly_tree.add_child(self.nodes[parent], self.nodes[child])
+
+        # repeated edges are only recorded once
+        poly_tree.add_child(self.nodes[0], self.nodes[7])
+        self.assertEqual(poly_tree.in_degree(self.nodes[7]), 3, msg='Incorrect in degree of Node H')
+        self.assertEqual(poly_tree.out_degree(self.nodes[0]), 1, msg='Incorrect out degree of Node A')
+
+        # parents come back in node insertion order regardless of edge order
+        self.assertEqual(
+            poly_tree.parents(self.nodes[8]),
+            [ self.nodes[2], self.nodes[5], self.nodes[6] ],
+            msg='Incorrect parents of Node I'
+        )
+
+        # roots and ends stay current as edges are added
+        new_node = TreeNode(9, 'j')
+        poly_tree.add_node(new_node, parents=[ self.nodes[4] ])
+        self.assertFalse(poly_tree.is_solo_node(self.nodes[4]), msg='Node E still identified as solo')
+        self.assertEqual(poly_tree.solo_nodes(), [], msg='Incorrect solo nodes')
+        self.assertIn(new_node, poly_tree.end_nodes(), msg='New node J not an end node')
+        self.assertNotIn(self.nodes[4], poly_tree.end_nodes(), msg='Node E still an end node')
+
+        # and as edges and nodes are taken out
+        poly_tree.remove_child(self.nodes[4], new_node)
+        self.assertEqual(poly_tree.solo_nodes(), [ self.nodes[4], new_node ], msg='Incorrect solo nodes')
+        poly_tree.add_child(self.nodes[4], new_node)
+        self.assertEqual(poly_tree.parents(new_node), [ self.nodes[4] ], msg='Removed edge not added again')
+        poly_tree.remove_child(self.nodes[4], new_node)
+        poly_tree.remove_node(self.nodes[5])
+        self.assertEqual(poly_tree.parents(self.nodes[8]), [ self.nodes[2], self.nodes[6] ])
+        self.assertIsNone(poly_tree.get_node(5), msg='Node F still in the tree')
+
+        poly_tree.clear_nodes()
+        self.assertEqual(poly_tree.root_nodes(), [], msg='Roots left after clear')
+        self.assertEqual(poly_tree.end_nodes(), [], msg='Ends left after clear')
+
+    def test_topological_order(self):
+        from treetl.tools.polytree import PolyTree
+
+        poly_tree = PolyTree(nodes=self.nodes)
+        for parent, child in self.node_arcs:
+            poly_tree.add_child(self.nodes[parent], self.nodes[child])
+
+        order = poly_tree.topological_order()
+        self.assertEqual(len(order), len(self.nodes), msg='Nodes missing from topological order')
+        for parent, child in self.node_arcs:
+            self.assertLess(order.index(self.nodes[parent]), order.index(self.nodes[child]))
+
+    def test_path_enumeration(self):
+        import itertools
+        from treetl.tools.polytree import PolyTree, TreeNode
+
+        poly_tree = PolyTree(nodes=self.nodes)
+        for parent, child in self.node_arcs:
+            poly_tree.add_child(self.nodes[parent], self.nodes[child])
+
+        for node in self.nodes:
+            self.assertEqual(
+                poly_tree.count_paths(node), len(poly_tree.all_paths(node)), msg='Wrong path count for {}'.format(node.id)
+            )
+        self.assertEqual(list(poly_tree.iter_paths(self.nodes[8])), poly_tree.all_paths(self.nodes[8]))
+
+        # a ladder of 64 diamonds has 2 ** 64 paths. counting them and taking a few is still cheap
+        ladder = PolyTree()
+        bottom = TreeNode('top', None)
+        ladder.add_node(bottom)
+        for i in range(64):
+            left, right, below = TreeNode((i, 'l'), None), TreeNode((i, 'r'), None), TreeNode((i, 'b'), None)
+            ladder.add_node(left, parents=[ bottom ])
+            ladder.add_node(right, parents=[ bottom ])
+            ladder.add_node(below, parents=[ left, right ])
+            bottom = below
+
+        self.assertEqual(ladder.count_paths(bottom), 2 ** 64)
+        first = list(itertools.islice(ladder.iter_paths(bottom), 3))
+        self.assertEqual(len(first), 3)
+        self.assertEqual([ len(p) for p in first ], [ 129 ] * 3)
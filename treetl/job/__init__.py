@@ -1,5 +1,13 @@
 
-from treetl.job._job import Job, JobPatch
+from treetl.job._job import Job, JobPatch, ExtractorError
 from treetl.job._jobrunner import (
     JobRunner, JOB_STATUS, JobException, ParentJobException
 )
+from treetl.job._report import RunReport
+from treetl.job._plan import ExecutionPlan
+
+try:
+    from treetl.job._asyncrunner import AsyncJobRunner
+except SyntaxError:
+    # coroutine support needs python 3.5+
+    pass
@@ -0,0 +1,264 @@
+import asyncio
+import inspect
+import time
+
+from treetl.job._jobrunner import JobRunner, JOB_STATUS, job_runner_logger
+from treetl.job._report import RunReport
+
+
+def async_job_method(m, attr, prior_attr=None):
+    """
+    Coroutine counterpart of the wrapper Job.create puts around plain callables.
+    """
+    async def wrapped(self, **kwargs):
+        if prior_attr is not None:
+            kwargs[prior_attr] = getattr(self, prior_attr)
+        res = await m(**kwargs)
+        if attr is not None:
+            setattr(self, attr, res)
+        return self
+    return wrapped
+
+
+async def _timed_coroutine(f, kwargs):
+    start = time.time()
+    try:
+        return await f(**kwargs), None, time.time() - start
+    except Exception as e:
+        return None, e, time.time() - start
+
+
+def run_timed_coroutines(functions, kwargs):
+    """
+    Await coroutine functions concurrently on a new event loop, for Job.concurrent_extractors.
+    :param functions: [ (name, coroutine function) ]
+    :return: { name: (result, exception, seconds) }
+    """
+    async def gather():
+        return await asyncio.gather(*[ _timed_coroutine(f, kwargs) for _, f in functions ])
+
+    loop = asyncio.new_event_loop()
+    try:
+        results = loop.run_until_complete(gather())
+    finally:
+        loop.close()
+    return dict(zip([ name for name, _ in functions ], results))
+
+
+class AsyncJobRunner(JobRunner):
+    """
+    Runs every job whose parents are done concurrently on a single event loop. `async def` ETL-CU methods are
+    awaited, plain ones are run in the loop's default thread pool.
+    """
+    def __init__(self, jobs=None, max_concurrency=None, **kwargs):
+        """
+        :param jobs: Jobs to add to the runner
+        :param max_concurrency: Maximum number of jobs in flight at once. No limit by default
+        :param kwargs: JobRunner options (checkpoint_store, result_cache, scheduler='critical_path', readonly_parents,
+            et c.). executor, prefetch, background_loads and the memory scheduler are not available
+        """
+        if kwargs.get('executor', 'serial') != 'serial':
+            raise ValueError('AsyncJobRunner runs every job on its event loop and takes no executor')
+        if kwargs.get('prefetch') or kwargs.get('background_loads'):
+            raise ValueError('AsyncJobRunner already overlaps extracts and loads of every job in flight')
+        if kwargs.get('scheduler') == 'memory' or kwargs.get('memory_budget') is not None:
+            raise ValueError('The memory scheduler needs JobRunner')
+
+        super(AsyncJobRunner, self).__init__(jobs, **kwargs)
+        self.max_concurrency = max_concurrency
+
+    async def __phase(self, job_node, method, **kwargs):
+        # plain methods are measured on the thread they run on
+        f = getattr(job_node.data, method)
+        if inspect.iscoroutinefunction(f):
+            with self._measure([ job_node ], method):
+                return await f(**kwargs)
+
+        def measured():
+            with self._measure([ job_node ], method):
+                return f(**kwargs)
+        return await asyncio.get_event_loop().run_in_executor(None, measured)
+
+    async def __off_loop(self, f, job_node):
+        # result cache and checkpoint reads and writes pickle and hit the disk, keep them off the loop
+        return await asyncio.get_event_loop().run_in_executor(None, f, job_node)
+
+    async def __run_single_job(self, job_node, limit):
+        # jobs are started once they get a slot, so their durations leave out the time spent waiting for one
+        async with limit:
+            self._start_job(job_node)
+            try:
+                if await self.__served_from_cache(job_node):
+                    return
+
+                job_runner_logger.log_job_method(job_node.data, 'extract')
+                await self.__phase(job_node, 'extract')
+
+                transform_params = self._get_job_kwargs(job_node.data)
+                job_runner_logger.log_job_method(job_node.data, 'transform', transform_params)
+                await self.__phase(job_node, 'transform', **transform_params)
+
+                del transform_params
+                await self.__after_transform(job_node)
+            except Exception as e:
+                self._fail_job(job_node, e)
+
+    async def __run_batch(self, job_nodes, limit):
+        # same as JobRunner: extract one by one, one transform_batch call, then cache and load one by one
+        async with limit:
+            batch, batch_kwargs = [ ], [ ]
+            for job_node in job_nodes:
+                self._start_job(job_node)
+                try:
+                    if await self.__served_from_cache(job_node):
+                        continue
+
+                    job_runner_logger.log_job_method(job_node.data, 'extract')
+                    await self.__phase(job_node, 'extract')
+                    batch_kwargs.append(self._get_job_kwargs(job_node.data))
+                    batch.append(job_node)
+                except Exception as e:
+                    self._fail_job(job_node, e)
+
+            if not batch:
+                return
+
+            jobs = [ n.data for n in batch ]
+            transform_batch = batch[0].job_type.transform_batch
+            try:
+                job_runner_logger.log_job_method(jobs[0], 'transform_batch', other_info={ 'jobs': len(jobs) })
+                if inspect.iscoroutinefunction(transform_batch):
+                    with self._measure(batch, 'transform_batch'):
+                        results = list(await transform_batch(jobs, batch_kwargs))
+                else:
+                    def measured():
+                        with self._measure(batch, 'transform_batch'):
+                            return list(transform_batch(jobs, batch_kwargs))
+                    results = await asyncio.get_event_loop().run_in_executor(None, measured)
+                if len(results) != len(jobs):
+                    raise ValueError('transform_batch returned {} results for {} jobs'.format(len(results), len(jobs)))
+            except Exception as e:
+                for job_node in batch:
+                    self._fail_job(job_node, e)
+                return
+            finally:
+                del batch_kwargs
+
+            for job_node, result in zip(batch, results):
+                job_node.data.transformed_data = result
+                try:
+                    await self.__after_transform(job_node)
+                except Exception as e:
+                    self._fail_job(job_node, e)
+
+    async def __served_from_cache(self, job_node):
+        if not await self.__off_loop(self._cached_result, job_node):
+            return False
+
+        await self.__release_parents(job_node)
+        await self.__cache_job(job_node)
+        await self.__off_loop(self._complete_job, job_node)
+        return True
+
+    async def __after_transform(self, job_node):
+        await self.__release_parents(job_node)
+
+        await self.__cache_job(job_node)
+
+        job_runner_logger.log_job_method(job_node.data, 'load')
+        await self.__phase(job_node, 'load')
+        await self.__off_loop(self._store_result, job_node)
+
+        await self.__off_loop(self._complete_job, job_node)
+
+    async def __cache_job(self, job_node):
+        rem_children_job_ct = self._children_to_serve(job_node)
+        if rem_children_job_ct > 0:
+            job_runner_logger.log_job_method(job_node.data, 'cache', other_info={'children': rem_children_job_ct})
+            await self.__phase(job_node, 'cache')
+            self._mark_cached(job_node)
+
+    async def __uncache_job(self, job_node):
+        job_runner_logger.log_job_method(job_node.data, 'uncache')
+        await self.__phase(job_node, 'uncache')
+        self._mark_uncached(job_node)
+
+    async def __release_parents(self, job_node):
+        for parent in self._run_schedule.release(job_node):
+            await self.__uncache_job(parent)
+
+    async def run_async(self, start_from=None, targets=None, profile=False, profile_dir=None):
+        """
+        Same as JobRunner.run. Profiled coroutine methods are measured on the loop, so their CPU time includes
+        whatever else ran on the loop while they were waiting.
+        """
+        if self._has_streams():
+            # children of a stream have to run alongside it on their own threads
+            raise ValueError('Streaming jobs need JobRunner')
+
+        nodes = self._run_nodes(start_from, targets)
+
+        self.status = JOB_STATUS.RUNNING
+        job_runner_logger.log_status(self.status)
+
+        schedule = self._run_schedule = self._schedule(nodes)
+        self.report = RunReport()
+        limit = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else _NoLimit()
+        running = { }
+
+        if profile:
+            self._start_profile(profile_dir)
+        try:
+            while schedule.has_ready() or running:
+                while schedule.has_ready():
+                    job_node = schedule.pop_ready()
+                    batch = self._batch_with(job_node)
+
+                    to_run = [ ]
+                    for n in [ job_node ] if batch is None else batch:
+                        for parent in self._failed_parents(n):
+                            self._skip_job(n, parent)
+
+                        if n.status == JOB_STATUS.FAILED:
+                            for parent in schedule.finished(n):
+                                await self.__uncache_job(parent)
+                        else:
+                            to_run.append(n)
+
+                    if batch is not None and to_run:
+                        running[asyncio.ensure_future(self.__run_batch(to_run, limit))] = to_run
+                    elif to_run:
+                        running[asyncio.ensure_future(self.__run_single_job(job_node, limit))] = [ job_node ]
+
+                if running:
+                    done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        job_nodes = running.pop(task)
+                        task.result()
+                        for n in job_nodes:
+                            for parent in schedule.finished(n):
+                                await self.__uncache_job(parent)
+        finally:
+            self._run_schedule = None
+            self._stop_profile()
+
+        self._finish_report()
+        self.status = JOB_STATUS.FAILED if len(self.failed_jobs()) else JOB_STATUS.DONE
+        job_runner_logger.log_status(self.status)
+
+        return self
+
+    def run(self, start_from=None, targets=None, profile=False, profile_dir=None):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.run_async(start_from, targets, profile, profile_dir))
+        finally:
+            loop.close()
+
+
+class _NoLimit(object):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
@@ -1,6 +1,9 @@
 
+import inspect
 import logging
+import time
 from treetl.tools.joblogging import JobLogger
+from treetl.tools.sizeof import deep_sizeof
 
 job_logger = JobLogger(logging.getLogger(__name__))
 
@@ -25,12 +28,164 @@ class JobPatchMeta(type):
 JobPatch = JobPatchMeta(str('JobPatch'), (), {})
 
 
+def job_id(job_type, params=None):
+    """
+    Id of a job in a JobRunner: its class name, followed by its parameters if it has any.
+    """
+    if not params:
+        return job_type.__name__
+    return '{}({})'.format(job_type.__name__, ', '.join('{}={!r}'.format(k, params[k]) for k in sorted(params)))
+
+
+class SameParams(object):
+    """
+    Dependency on the instance of job_type with the same parameters as the dependent job. Made by Job.same
+    """
+    def __init__(self, job_type, names=None):
+        self.job_type = job_type
+        self.names = names
+
+    def params(self, job):
+        params = getattr(job, 'params', None) or { }
+        if self.names:
+            return dict((k, v) for k, v in params.items() if k in self.names)
+        return dict(params)
+
+
+class EveryInstance(object):
+    """
+    Dependency on every instance of job_type added to the runner. Made by Job.every
+    """
+    def __init__(self, job_type):
+        self.job_type = job_type
+
+
+class ExtractorError(Exception):
+    """
+    Raised by Job.extract when concurrent extractors failed. errors maps each failed attribute to its exception.
+    """
+    def __init__(self, errors):
+        super(ExtractorError, self).__init__('Extractors failed: ' + ', '.join(
+            '{} ({!r})'.format(k, errors[k]) for k in sorted(errors)
+        ))
+        self.errors = errors
+
+
+def _timed_call(f, kwargs):
+    start = time.time()
+    try:
+        return f(**kwargs), None, time.time() - start
+    except Exception as e:
+        return None, e, time.time() - start
+
+
+def _run_extractors(extractors, kwargs, max_workers=None):
+    """
+    Run extractors at the same time, plain ones on a thread pool and coroutine functions on an event loop in this
+    thread.
+    :param extractors: [ (attribute name, extractor) ]
+    :return: { attribute name: (data, exception, seconds) }
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    is_coroutine = getattr(inspect, 'iscoroutinefunction', lambda f: False)
+    plain = [ (k, f) for k, f in extractors if not is_coroutine(f) ]
+    coroutines = [ (k, f) for k, f in extractors if is_coroutine(f) ]
+
+    outcomes = { }
+    pool = ThreadPoolExecutor(max_workers=max_workers or len(plain)) if plain else None
+    try:
+        futures = [ (k, pool.submit(_timed_call, f, kwargs)) for k, f in plain ]
+        if coroutines:
+            from treetl.job._asyncrunner import run_timed_coroutines
+            outcomes.update(run_timed_coroutines(coroutines, kwargs))
+        for k, future in futures:
+            outcomes[k] = future.result()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return outcomes
+
+
+def _transform_chunks(chunks, transformers, kwargs):
+    for chunk in chunks:
+        for t in transformers:
+            chunk = t(chunk, **kwargs)
+        yield chunk
+
+
+def _takes_arguments(patch_type):
+    init = patch_type.__init__
+    if init is object.__init__:
+        return False
+    try:
+        spec = inspect.getfullargspec(init)
+    except AttributeError:
+        # python 2
+        spec = inspect.getargspec(init)
+    except TypeError:
+        return True
+    # args, varargs, varkw
+    return len(spec[0]) > 1 or spec[1] is not None or spec[2] is not None
+
+
+def _patch_attributes(patch):
+    # what Job.inject copies from a patch onto a job: everything but ETL-CU and dunder attributes
+    return [
+        (a_name, getattr(patch, a_name))
+        for a_name in dir(patch)
+        if a_name not in _job_methods and 'static_' not in a_name and not a_name.startswith('__')
+    ]
+
+
+def _chain_patches(orig, patches):
+    # an ETL-CU method that runs orig, then each patch's static version of it. None when there is nothing to add
+    if not patches:
+        return None
+
+    if len(patches) == 1:
+        patch = patches[0]
+        def chained(self, **kwargs):
+            orig(self, **kwargs)
+            patch(self, **kwargs)
+            return self
+    else:
+        patches = tuple(patches)
+        def chained(self, **kwargs):
+            orig(self, **kwargs)
+            for patch in patches:
+                patch(self, **kwargs)
+            return self
+
+    return chained
+
+
 class Job(object):
 
     # store the proper param names for transformed
     # data from parent jobs. populated by decorator
     ETL_SIGNATURE = { }
 
+    # set by Job.streaming
+    STREAMING = False
+    STREAM_BUFFER = 8
+
+    # set by Job.concurrent_extractors
+    CONCURRENT_EXTRACTORS = False
+    EXTRACTOR_WORKERS = None
+
+    # set by Job.batched
+    BATCH_SIZE = None
+
+    # set by Job.chunked
+    CHUNK_SIZE = None
+    CHUNK_WORKERS = 0
+    CHUNK_EXECUTOR = 'threads'
+    CHUNK_COMBINE = None
+
+    # names of instance attributes, besides params, that change what a job computes. part of its result cache key
+    CACHE_KEY_ATTRS = ()
+
     # add this decorator to populate ETL_SIGNATURE (in a nice looking way)
     @staticmethod
     def dependency(**kwargs):
@@ -42,6 +197,22 @@ class Job(object):
             return cls
         return class_wrap
 
+    @staticmethod
+    def same(job_type, *names):
+        """
+        Depend on the instance of job_type with the same parameters (or just the named ones) as this job, eg. the same
+        partition. Use in place of a job type in Job.dependency
+        """
+        return SameParams(job_type, names)
+
+    @staticmethod
+    def every(job_type):
+        """
+        Depend on every instance of job_type added to the runner. The parameter gets a list of their transformed_data
+        in the order the jobs were added. Use in place of a job type in Job.dependency
+        """
+        return EveryInstance(job_type)
+
     @staticmethod
     def inject(*args):
         """
@@ -49,46 +220,42 @@ class Job(object):
         cache, and uncache. Adds all non-double underscore attributes and methods from injected classes.
 
         In short, inheritance without MRO changes, extra bases, derived class et c.
+
+        Patches whose __init__ takes no arguments are made once, here, and their attributes are set on the class.
+        Patches that take arguments are made with the job's keyword arguments for every new job and their attributes
+        are set on that job.
         :param args: Patches to be applied
         :return: The decorated class with attributes added/extended
         """
         def class_wrap(cls):
-            def new_by_type(f_type):
-                orig = getattr(cls, f_type)
-                def new_func(self, **kwargs):
-                    orig(self, **kwargs)
-                    for inj in args:
-                        if hasattr(inj, 'static_' + f_type):
-                            getattr(inj, 'static_' + f_type)(self, **kwargs)
-                    return self
-                return new_func
-
-            d = cls.__dict__.copy()
-            d.update({
-                m: new_by_type(m)
-                for m in _job_methods
-            })
-
-            # build new init
-            orig_init = cls.__init__
-            def new_init(self, *init_args, **kwargs):
-                orig_init(self, *init_args, **kwargs)
+            for f_type in _job_methods:
+                chained = _chain_patches(getattr(cls, f_type), [
+                    getattr(inj, 'static_' + f_type) for inj in args if hasattr(inj, 'static_' + f_type)
+                ])
+                if chained is not None:
+                    setattr(cls, f_type, chained)
+
+            per_job = [ a for a in args if _takes_arguments(a) ]
+            for a in args:
+                if a not in per_job:
+                    for a_name, value in _patch_attributes(a()):
+                        setattr(cls, a_name, value)
+
+            if per_job:
+                orig_init = cls.__init__
+                def new_init(self, *init_args, **kwargs):
+                    orig_init(self, *init_args, **kwargs)
+                    for a in per_job:
+                        try:
+                            patch = a(**kwargs)
+                        except TypeError:
+                            patch = a()
+                        for a_name, value in _patch_attributes(patch):
+                            # attributes the job set for itself win, as they would over class attributes
+                            if a_name not in self.__dict__:
+                                setattr(self, a_name, value)
+                cls.__init__ = new_init
 
-                # create patch jobs and append class methods and attributes to base job
-                for a in args:
-                    try:
-                        next_patch = a(**kwargs)
-                    except:
-                        next_patch = a()
-
-                    for a_name in dir(next_patch):
-                        if a_name not in _job_methods and 'static_' not in a_name and not a_name.startswith('__'):
-                            setattr(cls, a_name, getattr(next_patch, a_name))
-
-            # make sure __init__ and ETL-CU are appended
-            cls.__init__ = new_init
-            for attr in _job_methods:
-                setattr(cls, attr, d[attr])
             return cls
 
         return class_wrap
@@ -105,6 +272,16 @@ class Job(object):
             def new_function(self, **nf_kwargs):
                 # call parent extract
                 orig_f(self, **nf_kwargs)
+                if getattr(self, 'CONCURRENT_EXTRACTORS', False):
+                    outcomes = _run_extractors(list(kwargs.items()), nf_kwargs, self.EXTRACTOR_WORKERS)
+                    self.extractor_durations = dict((k, o[2]) for k, o in outcomes.items())
+                    errors = dict((k, o[1]) for k, o in outcomes.items() if o[1] is not None)
+                    if errors:
+                        raise ExtractorError(errors)
+                    for k, o in outcomes.items():
+                        setattr(self, k, o[0])
+                    return self
+
                 for k, v in kwargs.items():
                     setattr(self, k, v(**nf_kwargs))
                 return self
@@ -132,6 +309,19 @@ class Job(object):
                     # otherwise the first *args transformer should start with extracted_data
                     next_data = getattr(self, 'extracted_data')
 
+                if getattr(self, 'STREAMING', False):
+                    # applied chunk by chunk as the stream is read
+                    setattr(self, 'transformed_data', _transform_chunks(next_data, args, nf_kwargs))
+                    return self
+
+                if getattr(self, 'CHUNK_SIZE', None):
+                    from treetl.tools.chunking import transform_chunked
+                    setattr(self, 'transformed_data', transform_chunked(
+                        next_data, args, nf_kwargs, self.CHUNK_SIZE,
+                        self.CHUNK_WORKERS, self.CHUNK_EXECUTOR, self.CHUNK_COMBINE
+                    ))
+                    return self
+
                 for a in args:
                     setattr(self, 'transformed_data', a(next_data, **nf_kwargs))
                     next_data = getattr(self, 'transformed_data')
@@ -141,9 +331,82 @@ class Job(object):
         return class_wrap
 
     @staticmethod
-    def create(job_name, extract=None, transform=None, load=None, cache=None, uncache=None, **kwargs):
+    def chunked(size, workers=0, executor='threads', combine=None):
+        """
+        Apply Job.transformers chunk by chunk instead of to the whole of the data at each step. Chunks of `size` rows
+        go through the whole chain one at a time, so no full size intermediate results are made. Only for transformers
+        that work row by row.
+        :param size: Rows per chunk
+        :param workers: Spread chunks over a pool of this many workers. 0 (the default) runs them one after the other
+        :param executor: 'threads' or 'processes'. Transformers run in processes have to be picklable
+        :param combine: Function that puts the list of transformed chunks together. Lists, tuples, numpy arrays,
+            pandas and arrow objects are concatenated by default
+        :return: wrapped class
+        """
+        if executor not in ('threads', 'processes'):
+            raise ValueError('Unknown executor {}. Expected threads or processes'.format(executor))
+
+        def class_wrap(cls):
+            cls.CHUNK_SIZE = size
+            cls.CHUNK_WORKERS = workers
+            cls.CHUNK_EXECUTOR = executor
+            cls.CHUNK_COMBINE = staticmethod(combine) if combine is not None else None
+            return cls
+        return class_wrap
+
+    @staticmethod
+    def batched(size=256):
+        """
+        Let JobRunner transform ready instances of a job together. Up to `size` of them are extracted one by one,
+        then transformed with a single call to the job type's transform_batch and loaded one by one. Only the serial
+        and threads executors batch, elsewhere jobs are transformed on their own.
+        :param size: Most jobs transformed in one batch
+        :return: wrapped class
+        """
+        def class_wrap(cls):
+            cls.BATCH_SIZE = size
+            return cls
+        return class_wrap
+
+    @staticmethod
+    def streaming(buffer=8):
+        """
+        Make a job stream its data to its children. Its transform leaves an iterable of chunks in transformed_data
+        (a generator, say) and every child gets an iterator over those chunks for the corresponding parameter instead
+        of the whole thing. Children start as soon as the first chunks are ready and run alongside the job.
+        :param buffer: Most chunks held for any one child (or the job's own load) that has not read them yet
+        :return: wrapped class
+        """
+        def class_wrap(cls):
+            cls.STREAMING = True
+            cls.STREAM_BUFFER = buffer
+            return cls
+        return class_wrap
+
+    @staticmethod
+    def concurrent_extractors(max_workers=None):
+        """
+        Run the functions added by Job.extractors at the same time instead of one after the other: plain functions on
+        a thread pool, coroutine functions on an event loop. Attributes are set once all of them have finished, how
+        long each took is kept in extractor_durations and if any failed an ExtractorError with all of their errors is
+        raised.
+        :param max_workers: Most plain extractors run at once. All of them by default
+        :return: wrapped class
+        """
+        def class_wrap(cls):
+            cls.CONCURRENT_EXTRACTORS = True
+            cls.EXTRACTOR_WORKERS = max_workers
+            return cls
+        return class_wrap
+
+    @staticmethod
+    def create(job_name, extract=None, transform=None, load=None, cache=None, uncache=None, transform_batch=None,
+               **kwargs):
         def as_job_m(m, attr, prior_attr=None):
-            if m is not None:
+            if m is not None and getattr(inspect, 'iscoroutinefunction', lambda f: False)(m):
+                from treetl.job._asyncrunner import async_job_method
+                return async_job_method(m, attr, prior_attr)
+            elif m is not None:
                 def wrapped(self, **kwargs):
                     if prior_attr is not None:
                         kwargs[prior_attr] = getattr(self, prior_attr)
@@ -155,13 +418,27 @@ class Job(object):
             else:
                 return lambda self, **kwargs: self
 
-        new_job_type = type(job_name, (Job,), {
+        methods = {
             'extract': as_job_m(extract, 'extracted_data'),
             'transform': as_job_m(transform, 'transformed_data', 'extracted_data'),
             'load': as_job_m(load, None, 'transformed_data'),
             'cache': as_job_m(cache, None, 'transformed_data'),
             'uncache': as_job_m(uncache, None, 'transformed_data')
-        })
+        }
+
+        if transform_batch is not None:
+            # transform_batch gets what transform would have, one kwargs dict per job
+            def batch(cls, jobs, batch_kwargs):
+                return transform_batch([
+                    dict(kwargs, extracted_data=job.extracted_data) for job, kwargs in zip(jobs, batch_kwargs)
+                ])
+            methods['transform_batch'] = classmethod(batch)
+            if transform is None:
+                methods['transform'] = as_job_m(
+                    lambda **kwargs: transform_batch([ kwargs ])[0], 'transformed_data', 'extracted_data'
+                )
+
+        new_job_type = type(job_name, (Job,), methods)
 
         return Job.dependency(**kwargs)(new_job_type) if kwargs else new_job_type
 
@@ -169,6 +446,26 @@ class Job(object):
         self.extracted_data = None
         self.transformed_data = None
 
+        # keyword arguments tell instances of the same job apart, eg. JobA(partition='2026-10-01')
+        self.params = kwargs
+
+    def data_size(self):
+        """
+        Size in bytes of transformed_data, used by memory aware scheduling. Override to report a cheaper or more
+        accurate figure, or an estimate before the job has run.
+        """
+        return deep_sizeof(self.transformed_data)
+
+    @classmethod
+    def transform_batch(cls, jobs, batch_kwargs):
+        """
+        Transform several jobs of this type at once, for Job.batched. Override with a vectorised version.
+        :param jobs: Jobs to transform, already extracted
+        :param batch_kwargs: What each job's transform would have been called with, in the same order
+        :return: transformed_data for each job, in the same order
+        """
+        return [ job.transform(**kwargs).transformed_data for job, kwargs in zip(jobs, batch_kwargs) ]
+
     def extract(self, **kwargs):
         job_logger.log_method(self, 'extract', inp_kwargs=kwargs)
         return self
@@ -1,10 +1,20 @@
 
+import time
+import hashlib
+import inspect
+import itertools
 import logging
+import threading
+from collections import OrderedDict, deque
 from treetl.tools.joblogging import JobRunnerLogger
 
-from treetl.job._job import Job
+from treetl.job._job import Job, SameParams, EveryInstance, job_id
+from treetl.job._report import RunReport
+from treetl.job._schedule import JobSchedule
 from treetl.tools import build_enum
 from treetl.tools.polytree import PolyTree, TreeNode
+from treetl.tools.sharedmem import readonly_view, check_shared_memory
+from treetl.tools.spill import resolve
 
 
 job_runner_logger = JobRunnerLogger(logging.getLogger(__name__))
@@ -12,6 +22,22 @@ job_runner_logger = JobRunnerLogger(logging.getLogger(__name__))
 
 JOB_STATUS = build_enum('QUEUE', 'RUNNING', 'DONE', 'FAILED')
 
+# ways JobRunner can execute a job tree
+EXECUTORS = ('serial', 'threads', 'processes')
+
+# ways JobRunner can pick the next job to run among those that are ready
+SCHEDULERS = ('fifo', 'memory', 'critical_path')
+
+_is_coroutine = getattr(inspect, 'iscoroutine', lambda o: False)
+
+
+def _cpu_count():
+    import multiprocessing
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
 
 class JobException(Exception):
     def __init__(self, job=None, *args, **kwargs):
@@ -25,19 +51,192 @@ class ParentJobException(JobException):
         self.parent_job = parent_job
 
 
+def _call_method(job, method, **kwargs):
+    # calls one of a job's ETL-CU methods. coroutines are only awaited by AsyncJobRunner, anywhere else they would be
+    # dropped without ever running
+    result = getattr(job, method)(**kwargs)
+    if _is_coroutine(result):
+        result.close()
+        raise TypeError('{}.{} is a coroutine function. Run jobs with async methods with AsyncJobRunner'.format(
+            job.__class__.__name__, method
+        ))
+    return result
+
+
 class JobNode(TreeNode):
-    def __init__(self, job):
-        assert isinstance(job, Job)
-        super(JobNode, self).__init__(job.__class__.__name__, job)
+    def __init__(self, job, job_type=None, params=None):
+        """
+        :param job: Job instance, or None to only make one from job_type and params once it is needed
+        """
+        if job is not None:
+            job_type, params = job.__class__, getattr(job, 'params', None)
+
+        self.job_type = job_type
+        self.__params = params or { }
+        super(JobNode, self).__init__(job_id(job_type, params), job)
         self.status = JOB_STATUS.QUEUE
         self.error = None
 
+    @property
+    def data(self):
+        if self.__job is None:
+            self.__job = self.job_type(**self.__params) if self.__params else self.job_type()
+        return self.__job
+
+    @data.setter
+    def data(self, job):
+        assert job is None or isinstance(job, Job)
+        self.__job = job
+
+
+def _run_job_in_process(job, parent_payloads, readonly=False):
+    """
+    Worker process side of the 'processes' executor. Runs extract, transform and load on a copy of the job with
+    parent data mapped from shared memory (read-only if readonly is set). Returns shared memory handles to the job's
+    transformed_data and the rest of its state.
+    """
+    from treetl.tools.sharedmem import SharedPayload
+
+    releases, transform_params = [ ], { }
+    try:
+        def attach(payload):
+            data, release = payload.attach(readonly)
+            releases.append(release)
+            return data
+
+        for param, payload in parent_payloads.items():
+            transform_params[param] = [ attach(p) for p in payload ] if isinstance(payload, list) else attach(payload)
+
+        job_runner_logger.log_job_method(job, 'extract')
+        _call_method(job, 'extract')
+
+        job_runner_logger.log_job_method(job, 'transform', transform_params)
+        _call_method(job, 'transform', **transform_params)
+
+        job_runner_logger.log_job_method(job, 'load')
+        _call_method(job, 'load')
+
+        data = SharedPayload(job.transformed_data)
+        job.transformed_data = None
+        return SharedPayload(job.__dict__), data
+    finally:
+        transform_params.clear()
+        for release in releases:
+            release()
+
 
 class JobRunner(object):
-    def __init__(self, jobs=None):
+    def __init__(self, jobs=None, executor='serial', max_workers=None, checkpoint_store=None, result_cache=None,
+                 scheduler='fifo', memory_budget=None, duration_hints=None, prefetch=0, background_loads=0,
+                 readonly_parents=False):
+        """
+        :param jobs: Jobs to add to the runner
+        :param executor: One of EXECUTORS. 'serial' runs one job at a time, 'threads' runs every job whose parents
+            are done on a thread pool and 'processes' runs extract, transform and load of those jobs in worker
+            processes. Jobs run by 'processes' must be picklable (defined at module level)
+        :param max_workers: Size of the pool used by pooled executors. Defaults to the concurrent.futures default
+        :param checkpoint_store: A treetl.tools.checkpoint.CheckpointStore. When set, the transformed_data of every
+            successful job is saved to it and run(start_from=...) can be used
+        :param result_cache: A treetl.tools.resultcache.ResultCache. Jobs whose class, source, parameters and parents
+            are unchanged since a previous run skip extract, transform and load and hand the cached transformed_data to
+            their children
+        :param scheduler: One of SCHEDULERS. 'fifo' runs ready jobs in the order they became ready. 'memory' picks the
+            ready job that keeps the data held for children (cached jobs) smallest, using Job.data_size().
+            'critical_path' runs the ready job with the longest expected time left to a leaf first
+        :param memory_budget: Bytes of cached data the 'memory' scheduler tries to stay under. Ready jobs that would go
+            over it are held back while other jobs are in flight
+        :param duration_hints: { job or job type: expected seconds } for 'critical_path' scheduling. Jobs without a
+            hint use how long they took the last time this runner ran them
+        :param prefetch: Number of jobs whose extract may run ahead, on their own threads, while their parents are
+            still running. Only transform waits on parents then. 0 (the default) extracts once parents are done.
+            Not available with the 'processes' executor
+        :param background_loads: Number of threads to run load() on in the background. Children start as soon as a
+            job has transformed (and cached) instead of waiting for its load, run() returns once every load is done.
+            Failed loads fail the job but not its children. 0 (the default) loads before children start. Not available
+            with the 'processes' executor
+        :param readonly_parents: Hand children read-only views of their parents' numpy arrays and memoryviews so one
+            child can't change what its siblings see. With the 'processes' executor every buffer in the parent's data,
+            also those in lists, tuples and dicts, is a read-only view of the shared memory block
+        """
+        if executor not in EXECUTORS:
+            raise ValueError('Unknown executor {}. Expected one of {}'.format(executor, EXECUTORS))
+        if scheduler not in SCHEDULERS:
+            raise ValueError('Unknown scheduler {}. Expected one of {}'.format(scheduler, SCHEDULERS))
+        if prefetch and executor == 'processes':
+            raise ValueError('Extracts run in worker processes with the processes executor and cannot be prefetched')
+        if background_loads and executor == 'processes':
+            raise ValueError('Loads run in worker processes with the processes executor and cannot be moved off')
+        if executor == 'processes':
+            # shared memory and pickle protocol 5, python 3.8+
+            check_shared_memory()
+
+        self.executor = executor
+        self.max_workers = max_workers
+        self.checkpoint_store = checkpoint_store
+        self.result_cache = result_cache
+        self.scheduler = scheduler
+        self.memory_budget = memory_budget
+        self.duration_hints = duration_hints or { }
+        self.prefetch = prefetch
+        self.background_loads = background_loads
+        self.readonly_parents = readonly_parents
+        self.report = RunReport()
+
+        # result cache key per job id
+        self.__result_keys = { }
+
+        # bookkeeping for the run in progress. ids of jobs currently cached
+        self._run_schedule = None
+        self.__cached_ids = set()
+        self.__cached_lock = threading.Lock()
+
+        # bytes of data held for children per job id (in flight jobs hold their estimate), their total and
+        # the last measured size of each job's data, which is the estimate for the next run
+        self.__held_bytes = { }
+        self.__held_total = 0
+        self.__data_sizes = { }
+
+        # start time per job id
+        self.__started_at = { }
+
+        # seconds each job id took the last time this runner ran it. estimates for 'critical_path' scheduling
+        self.learned_durations = { }
+
+        # treetl.tools.profiling.PhaseProfiler of a run(profile=True) in progress
+        self.__profiler = None
+
+        # ChunkTee per streaming job id, and a future per streaming job that is set once its children can start
+        self.__streams = { }
+        self.__stream_opened = { }
+
+        # extracts running ahead of their parents: future per job id, jobs that may still be prefetched (in run
+        # order) and ids of jobs that already started their own extract
+        self.__prefetch_pool = None
+        self.__prefetched = { }
+        self.__prefetch_queue = deque()
+        self.__extract_started = set()
+        self.__prefetch_lock = threading.Lock()
+
+        # loads running in the background: the pool, ids of jobs with a load in flight, ids of those to uncache once
+        # it is done and ids of jobs that only failed on load
+        self.__load_pool = None
+        self.__loading = set()
+        self.__uncache_after_load = set()
+        self.__load_failed = set()
+        self.__load_lock = threading.Lock()
+
         # maintain order of explicitly submitted
         # so that they can easily be retrieved
         self._submitted_job_ids = [ ]
+        self.__submitted = set()
+
+        # ids of jobs that depend on every instance of a job type, and of jobs that depend on a job type as such
+        # (the only added instance of it), by type name. OrderedDicts of id: None, as ordered sets
+        self.__fan_ins = { }
+        self.__plain_deps = { }
+
+        # ids of explicitly added jobs by type name
+        self.__added = { }
 
         self.__ptree = PolyTree()
         if jobs:
@@ -48,6 +247,7 @@ class JobRunner(object):
     def add_job(self, job):
         # create job node
         job_node = JobNode(job)
+        self.__result_keys = { }
         if self.__ptree.node_exists(job_node):
             # explicitly added jobs >> implicit
             # result:
@@ -55,116 +255,1018 @@ class JobRunner(object):
             #   if job was added by parent inference, it's overwritten
             self.__ptree.get_node(job_node.id).data = job
 
-        def get_or_create(parent):
-            r = self.__ptree.get_node(parent.__name__)
+        def get_or_create(parent, params=None):
+            r = self.__ptree.get_node(job_id(parent, params))
             if r is not None:
                 return r
             else:
-                return JobNode(parent())
+                # parents are only instantiated if they end up being run (or looked at)
+                return JobNode(None, parent, params)
+
+        type_name = job.__class__.__name__
+        if job_node.id not in self.__submitted and self.__added.get(type_name) and self.__plain_deps.get(type_name):
+            raise ValueError(self.__ambiguous(next(iter(self.__plain_deps[type_name])), type_name))
 
         # get parents
-        parents = [
-            get_or_create(parent)
-            for parent in job.ETL_SIGNATURE.values()
-        ] if hasattr(job, 'ETL_SIGNATURE') else []
+        parents = [ ]
+        for source in getattr(job, 'ETL_SIGNATURE', {}).values():
+            if isinstance(source, EveryInstance):
+                # instances added later are linked up as they come
+                self.__fan_ins.setdefault(source.job_type.__name__, OrderedDict())[job_node.id] = None
+                parents.extend(self.__instances(source.job_type))
+            elif isinstance(source, SameParams):
+                parents.append(get_or_create(source.job_type, source.params(job)))
+            else:
+                # the instance of the job type that was added, whatever its parameters. a default one otherwise
+                added = self.__added.get(source.__name__, [ ])
+                if len(added) > 1:
+                    raise ValueError(self.__ambiguous(job_node.id, source.__name__))
+                parents.append(self.__ptree.get_node(added[0]) if added else get_or_create(source))
+
+                self.__plain_deps.setdefault(source.__name__, OrderedDict())[job_node.id] = None
 
         job_runner_logger.add_jobs(job, parents)
 
         # add to job poly tree
         self.__ptree.add_node(job_node, parents)
-        if job_node.id not in self._submitted_job_ids:
+        for child_id in self.__fan_ins.get(type_name, ()):
+            self.__ptree.add_child(job_node, self.__ptree.get_node(child_id))
+
+        if job_node.id not in self.__submitted:
+            self.__submitted.add(job_node.id)
             self._submitted_job_ids.append(job_node.id)
+            self.__added.setdefault(type_name, [ ]).append(job_node.id)
+            self.__adopt_plain_deps(job_node)
 
         return self
 
+    def __ambiguous(self, dependent_id, type_name):
+        return (
+            '{} depends on {} and several instances of it were added. Depend on one of them with Job.same or on all '
+            'of them with Job.every'.format(dependent_id, type_name)
+        )
+
+    def __adopt_plain_deps(self, job_node):
+        # jobs that depend on this job's type were handed a default instance of it before this one was added
+        default = self.__ptree.get_node(job_node.job_type.__name__)
+        if default is None or default is job_node or default.id in self.__submitted:
+            return
+
+        for child_id in self.__plain_deps.get(default.id, ()):
+            child = self.__ptree.get_node(child_id)
+            if default in self.__ptree.parents(child):
+                self.__ptree.remove_child(default, child)
+                self.__ptree.add_child(job_node, child)
+
+        # drop the default instance, and whatever was only inferred for it
+        stack = [ default ]
+        while stack:
+            n = stack.pop()
+            if n.id not in self.__submitted and not self.__ptree.children(n):
+                parents = self.__ptree.parents(n)
+                self.__ptree.remove_node(n)
+                stack.extend(parents)
+
+    def __instances(self, job_type):
+        return [ n for n in self.__ptree.nodes() if n.job_type.__name__ == job_type.__name__ ]
+
+    def __signature_parents(self, job):
+        """
+        (param, parent job node) for each of a job's dependencies. Dependencies on every instance of a job type get a
+        list of nodes.
+        """
+        for param, source in sorted(getattr(job, 'ETL_SIGNATURE', {}).items()):
+            if isinstance(source, EveryInstance):
+                yield param, self.__instances(source.job_type)
+            elif isinstance(source, SameParams):
+                yield param, self.__ptree.get_node(job_id(source.job_type, source.params(job)))
+            else:
+                added = self.__added.get(source.__name__, [ ])
+                yield param, self.__ptree.get_node(added[0] if added else source.__name__)
+
     def add_jobs(self, jobs):
         [ self.add_job(j) for j in jobs ]
         return self
 
-    def __get_job_kwargs(self, job):
-        if hasattr(job, 'ETL_SIGNATURE'):
-            return {
-                param: self.__ptree.get_node(type_source.__name__).data.transformed_data
-                for param, type_source in job.ETL_SIGNATURE.items()
-            }
-        else:
-            return {}
+    def _get_job_kwargs(self, job):
+        return {
+            param: [ self.__parent_data(p, job) for p in parent ]
+            if isinstance(parent, list) else self.__parent_data(parent, job)
+            for param, parent in self.__signature_parents(job)
+        }
+
+    def __parent_data(self, parent, job):
+        # children of a streaming parent each read from their own queue of chunks
+        if parent.id in self.__streams:
+            return self.__streams[parent.id].reader(JobNode(job).id)
+        data = resolve(parent.data.transformed_data)
+        return readonly_view(data) if self.readonly_parents else data
 
     def parents(self, job):
         return self.__ptree.parents(JobNode(job))
 
+    def _result_key(self, job_node):
+        # content address of a job's result: its own fingerprint and the keys of the parents feeding it
+        from treetl.tools.resultcache import job_fingerprint
+
+        keys = self.__result_keys
+        pending = [ job_node ]
+        while pending:
+            n = pending[-1]
+            if n.id in keys:
+                pending.pop()
+                continue
+
+            parents = [
+                (param, p)
+                for param, parent in self.__signature_parents(n.data)
+                for p in (parent if isinstance(parent, list) else [ parent ])
+            ]
+
+            # parents first, without recursing up long chains
+            missing = [ p for _, p in parents if p.id not in keys ]
+            if missing:
+                pending.extend(missing)
+                continue
+
+            h = hashlib.sha256(job_fingerprint(n.data).encode('utf-8'))
+            for param, p in parents:
+                h.update('{}={}'.format(param, keys[p.id]).encode('utf-8'))
+            keys[n.id] = h.hexdigest()
+            pending.pop()
+
+        return keys[job_node.id]
+
+    def _cached_result(self, job_node):
+        """
+        Serve a job's transformed_data from the result cache.
+        :return: True on a hit
+        """
+        if self.result_cache is None or job_node.data.STREAMING:
+            return False
+
+        try:
+            job_node.data.transformed_data = self.result_cache.load(self._result_key(job_node))
+        except KeyError:
+            self.report.cache_misses.append(job_node.id)
+            return False
+
+        self.report.cache_hits.append(job_node.id)
+        job_runner_logger.result_cache_hit(job_node.data)
+        return True
+
+    def _store_result(self, job_node):
+        if self.result_cache is not None and not job_node.data.STREAMING:
+            self.result_cache.save(self._result_key(job_node), job_node.data.transformed_data)
+
     # runs a job and caches if needed
     def __run_single_job(self, job_node):
-        job_runner_logger.start_job(job_node.data)
-
-        job_node.status = JOB_STATUS.RUNNING
+        self._start_job(job_node)
         try:
+            if self._cached_result(job_node):
+                self._release_parents(job_node)
+                self._cache_job(job_node)
+                self._complete_job(job_node)
+                return
+
             # stage/run job
-            job_runner_logger.log_job_method(job_node.data, 'extract')
-            job_node.data.extract()
+            self.__extract(job_node)
 
-            transform_params = self.__get_job_kwargs(job_node.data)
+            transform_params = self._get_job_kwargs(job_node.data)
             job_runner_logger.log_job_method(job_node.data, 'transform', transform_params)
-            job_node.data.transform(**transform_params)
+            self.__phase(job_node, 'transform', **transform_params)
+            del transform_params
+
+            self.__after_transform(job_node)
+        except Exception as e:
+            if job_node.id in self.__streams:
+                self.__streams[job_node.id].abort(e)
+            self._fail_job(job_node, e)
+        finally:
+            self.__close_readers(job_node)
+
+    # hands a transformed job's data on to its children and loads it
+    def __after_transform(self, job_node):
+        if self.__opens_stream(job_node):
+            # children start reading right away. parent data is only consumed once the stream is done
+            self.__open_stream(job_node)
+        else:
+            # parent data is consumed, parents w/o any other children waiting can go
+            self._release_parents(job_node)
 
             # if there are queued up children jobs, cache results
-            rem_children_job_ct = len(self.children_in_queue(job_node.data))
-            if rem_children_job_ct > 0:
-                job_runner_logger.log_job_method(job_node.data, 'cache', other_info={'children': rem_children_job_ct})
-                job_node.data.cache()
-
-            # load results
-            job_runner_logger.log_job_method(job_node.data, 'load')
-            job_node.data.load()
-
-            # mark job as done and move on
-            job_node.status = JOB_STATUS.DONE
-            job_runner_logger.completed_job(job_node.data)
+            self._cache_job(job_node)
+
+        if self.__load_pool is not None and not job_node.data.STREAMING:
+            # children only need transformed_data
+            with self.__load_lock:
+                self.__loading.add(job_node.id)
+            self.__load_pool.submit(self.__load, job_node)
+            return
+
+        # load results
+        job_runner_logger.log_job_method(job_node.data, 'load')
+        self.__phase(job_node, 'load')
+        self.__finish_stream(job_node)
+        self._store_result(job_node)
+
+        # mark job as done and move on
+        self._complete_job(job_node)
+
+    # runs ready jobs of one batched job type with a single transform_batch call
+    def __run_batch(self, job_nodes):
+        batch, batch_kwargs = [ ], [ ]
+        for job_node in job_nodes:
+            self._start_job(job_node)
+            try:
+                if self._cached_result(job_node):
+                    self._release_parents(job_node)
+                    self._cache_job(job_node)
+                    self._complete_job(job_node)
+                    continue
+
+                self.__extract(job_node)
+                batch_kwargs.append(self._get_job_kwargs(job_node.data))
+                batch.append(job_node)
+            except Exception as e:
+                self._fail_job(job_node, e)
+
+        if not batch:
+            return
+
+        jobs = [ n.data for n in batch ]
+        try:
+            job_runner_logger.log_job_method(jobs[0], 'transform_batch', other_info={ 'jobs': len(jobs) })
+            with self._measure(batch, 'transform_batch'):
+                results = list(batch[0].job_type.transform_batch(jobs, batch_kwargs))
+            if len(results) != len(jobs):
+                raise ValueError('transform_batch returned {} results for {} jobs'.format(len(results), len(jobs)))
+        except Exception as e:
+            for job_node in batch:
+                self._fail_job(job_node, e)
+            return
+        finally:
+            del batch_kwargs
+
+        for job_node, result in zip(batch, results):
+            job_node.data.transformed_data = result
+            try:
+                self.__after_transform(job_node)
+            except Exception as e:
+                self._fail_job(job_node, e)
+
+    def _batch_with(self, job_node):
+        # other ready jobs to run along with job_node in one transform_batch call
+        # jobs on a stream have to run on their own threads alongside their siblings
+        size = job_node.job_type.BATCH_SIZE
+        if not size or size < 2 or self.executor == 'processes' or self.__runs_on_stream(job_node):
+            return None
+
+        return [ job_node ] + self._run_schedule.pop_like(lambda n: n.job_type is job_node.job_type, size - 1)
+
+    def __load(self, job_node):
+        try:
+            job_runner_logger.log_job_method(job_node.data, 'load', other_info={ 'background': True })
+            self.__phase(job_node, 'load')
+            self._store_result(job_node)
+            self._complete_job(job_node)
         except Exception as e:
-            job_runner_logger.job_error(job_node.data)
-            job_node.error = JobException(job_node.data, e)
-            job_node.status = JOB_STATUS.FAILED
-
-    # runs a job and all its parents
-    def __run_job_line(self, job_node):
-        # run parent jobs
-        for parent in self.parents(job_node.data):
-            # no need to walk the whole chain if immediate parent is already done
-            check_status = self.__run_job_line(parent) if parent.status == JOB_STATUS.QUEUE else parent.status
-            if check_status == JOB_STATUS.FAILED:
-                job_runner_logger.skip_job(job_node.data, parent.data)
-                job_node.status = JOB_STATUS.FAILED
-                job_node.error = ParentJobException(job=job_node.data, parent_job=parent.data)
-
-
-        # run current job
-        if job_node.status == JOB_STATUS.QUEUE:
-            self.__run_single_job(job_node)
-
-        # uncache parents that are no longer needed
+            with self.__load_lock:
+                self.__load_failed.add(job_node.id)
+            self._fail_job(job_node, e)
+        finally:
+            with self.__load_lock:
+                self.__loading.discard(job_node.id)
+                uncache = job_node.id in self.__uncache_after_load
+                self.__uncache_after_load.discard(job_node.id)
+            if uncache:
+                self._uncache_job(job_node)
+
+    def __start_loads(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.__loading, self.__uncache_after_load, self.__load_failed = set(), set(), set()
+        self.__load_pool = ThreadPoolExecutor(max_workers=self.background_loads) if self.background_loads else None
+
+    def __finish_loads(self):
+        if self.__load_pool is not None:
+            self.__load_pool.shutdown()
+            self.__load_pool = None
+
+    def __extract(self, job_node):
+        with self.__prefetch_lock:
+            prefetched = self.__prefetched.pop(job_node.id, None)
+            self.__extract_started.add(job_node.id)
+
+        if prefetched is None:
+            job_runner_logger.log_job_method(job_node.data, 'extract')
+            self.__phase(job_node, 'extract')
+        else:
+            # room for the next one
+            self.__prefetch_next()
+            prefetched.result()
+
+    def __start_prefetch(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.__prefetched, self.__extract_started = { }, set()
+        if not self.prefetch:
+            self.__prefetch_pool = None
+            return
+
+        # jobs that have to wait on parents, in the order they are likely to run. no point extracting ahead when the
+        # result cache will serve the job
+        self.__prefetch_queue = deque(
+            n for n in self.__ptree.topological_order()
+            if self._run_schedule.waiting_on(n) > 0
+            and not (self.result_cache is not None and self._result_key(n) in self.result_cache)
+        )
+        self.__prefetch_pool = ThreadPoolExecutor(max_workers=self.prefetch)
+        self.__prefetch_next()
+
+    def __prefetch_next(self):
+        with self.__prefetch_lock:
+            while self.__prefetch_pool and self.__prefetch_queue and len(self.__prefetched) < self.prefetch:
+                job_node = self.__prefetch_queue.popleft()
+                if job_node.id not in self.__extract_started:
+                    self.__prefetched[job_node.id] = self.__prefetch_pool.submit(self.__prefetch_extract, job_node)
+
+    def __prefetch_extract(self, job_node):
+        job_runner_logger.log_job_method(job_node.data, 'extract', other_info={ 'prefetch': True })
+        self.__phase(job_node, 'extract')
+
+    def __drop_prefetch(self, job_node):
+        # a job that will never run
+        with self.__prefetch_lock:
+            dropped = self.__prefetched.pop(job_node.id, None)
+            self.__extract_started.add(job_node.id)
+        if dropped is not None:
+            self.__prefetch_next()
+
+    def __stop_prefetch(self):
+        if self.__prefetch_pool is not None:
+            self.__prefetch_queue.clear()
+            self.__prefetch_pool.shutdown()
+            self.__prefetch_pool = None
+        self.__prefetched = { }
+
+    def __opens_stream(self, job_node):
+        return job_node.data.STREAMING and self._run_schedule.consumers(job_node) > 0
+
+    def __open_stream(self, job_node):
+        from treetl.tools.stream import ChunkTee
+
+        children = self._run_schedule.queued_children(job_node)
+        below = set([ n.id for n in self.__ptree.descendants(job_node) ])
+
+        # a child that also waits on another child of this job can only start reading once that one is done. it gets
+        # no buffer limit, the others would wait on it forever otherwise
+        unbounded = [
+            c.id for c in children
+            if any(p.id in below for p in self.__ptree.parents(c) if p is not job_node)
+        ]
+
+        tee = ChunkTee(
+            job_node.data.transformed_data, [ c.id for c in children ] + [ job_node.id ],
+            buffer=job_node.data.STREAM_BUFFER, unbounded=unbounded
+        )
+        self.__streams[job_node.id] = tee
+        job_node.data.transformed_data = tee.reader(job_node.id)
+        job_runner_logger.open_stream(job_node.data, len(children))
+
+        opened = self.__stream_opened.get(job_node.id)
+        if opened is not None:
+            opened.set_result(job_node)
+
+    def __finish_stream(self, job_node):
+        if job_node.id not in self.__streams:
+            return
+
+        # whatever load did not read is dropped. wait until the children have everything
+        tee = self.__streams[job_node.id]
+        tee.reader(job_node.id).close()
+        tee.join()
+        job_node.data.transformed_data = None
+        if tee.error is not None:
+            raise tee.error
+
+    def __close_readers(self, job_node):
+        # let streaming parents know a child is done reading, whether it read everything or not
         for parent in self.__ptree.parents(job_node):
-            if len(self.children_in_queue(parent.data)) == 0:
-                job_runner_logger.log_job_method(parent.data, 'uncache')
-                parent.data.uncache()
+            if parent.id in self.__streams:
+                self.__streams[parent.id].close(job_node.id)
+
+    def __runs_on_stream(self, job_node):
+        return job_node.job_type.STREAMING or any(p.job_type.STREAMING for p in self.__ptree.parents(job_node))
+
+    def _start_job(self, job_node):
+        job_runner_logger.start_job(job_node.data)
+        job_node.status = JOB_STATUS.RUNNING
+        self.__started_at[job_node.id] = time.time()
+
+    def __record_duration(self, job_node):
+        if job_node.id in self.__started_at:
+            duration = time.time() - self.__started_at.pop(job_node.id)
+            self.report.durations[job_node.id] = duration
+            self.learned_durations[job_node.id] = duration
+
+    # calls one of a job's ETL-CU methods, measuring it when the run is profiled
+    def __phase(self, job_node, method, **kwargs):
+        if self.__profiler is None:
+            return _call_method(job_node.data, method, **kwargs)
+        with self.__profiler.measure(job_node.id, method):
+            return _call_method(job_node.data, method, **kwargs)
+
+    def _measure(self, job_nodes, phase):
+        # a phase run once for several jobs is charged to each of them in equal parts
+        if self.__profiler is None:
+            return _NotMeasured()
+        return self.__profiler.measure([ n.id for n in job_nodes ], phase)
 
-        return job_node.status
+    def _start_profile(self, profile_dir=None):
+        from treetl.tools.profiling import PhaseProfiler
+        self.__profiler = PhaseProfiler(profile_dir)
+        self.__profiler.start()
 
-    def run(self, start_from=None):
+    def _stop_profile(self):
+        if self.__profiler is not None:
+            self.__profiler.stop()
+            self.report.phases = self.__profiler.phases
+            self.__profiler = None
 
-        if start_from is not None:
-            raise NotImplementedError()
+    def _children_to_serve(self, job_node):
+        return self._run_schedule.consumers(job_node)
 
+    def _cache_job(self, job_node):
+        rem_children_job_ct = self._children_to_serve(job_node)
+        if rem_children_job_ct > 0 and not job_node.data.STREAMING:
+            job_runner_logger.log_job_method(job_node.data, 'cache', other_info={'children': rem_children_job_ct})
+            self.__phase(job_node, 'cache')
+            self._mark_cached(job_node)
+
+    def __tracks_memory(self):
+        return self.scheduler == 'memory' or self.memory_budget is not None
+
+    def _mark_cached(self, job_node):
+        size = job_node.data.data_size() if self.__tracks_memory() else 0
+
+        with self.__cached_lock:
+            self.__cached_ids.add(job_node.id)
+            self.report.peak_cached = max(self.report.peak_cached, len(self.__cached_ids))
+
+            if self.__tracks_memory():
+                self.__data_sizes[job_node.id] = size
+                self.__hold(job_node, size)
+                self.report.peak_cached_bytes = max(self.report.peak_cached_bytes, self.__held_total)
+
+    def _mark_uncached(self, job_node):
+        with self.__cached_lock:
+            self.__cached_ids.discard(job_node.id)
+            self.__hold(job_node, None)
+
+    def __hold(self, job_node, size):
+        # bytes held for a job's children, None once it holds nothing. call with __cached_lock held
+        self.__held_total -= self.__held_bytes.pop(job_node.id, 0)
+        if size is not None:
+            self.__held_bytes[job_node.id] = size
+            self.__held_total += size
+
+    def __estimated_size(self, job_node):
+        if job_node.id not in self.__data_sizes:
+            self.__data_sizes[job_node.id] = job_node.data.data_size()
+        return self.__data_sizes[job_node.id]
+
+    def __growth(self, schedule, job_node):
+        """
+        Change in the data held for children once job_node has run: its own data if it has children to serve, less
+        what the parents it is the last consumer of hold. The 'memory' scheduler runs ready jobs in this order.
+        """
+        added = self.__estimated_size(job_node) if schedule.consumers(job_node) > 0 else 0
+        with self.__cached_lock:
+            freed = sum(
+                self.__held_bytes.get(p.id, 0)
+                for p in self.__ptree.parents(job_node)
+                if schedule.consumers(p) == 1
+            )
+        return added - freed
+
+    def __pop_within_budget(self, schedule, in_flight):
+        """
+        Take the ready job that grows the data held for children the least, if it fits in the memory budget. None of
+        the others would fit either then, so nothing is taken while other jobs are in flight.
+        """
+        job_node = schedule.peek_ready()
+        change = self.__growth(schedule, job_node)
+        with self.__cached_lock:
+            held = self.__held_total
+
+        if held + max(change, 0) > self.memory_budget:
+            if in_flight:
+                return None
+            # nothing else will ever free memory up
+            job_runner_logger.over_memory_budget(job_node.data, held, self.memory_budget)
+
+        return schedule.pop_ready()
+
+    def __reserve_memory(self, job_node):
+        # jobs with children will hold on to their data. count their estimate until it is measured
+        if self.__tracks_memory() and self._run_schedule.consumers(job_node) > 0:
+            size = self.__estimated_size(job_node)
+            with self.__cached_lock:
+                self.__hold(job_node, size)
+
+    def _release_parents(self, job_node):
+        for parent in self._run_schedule.release(job_node):
+            self._uncache_job(parent)
+
+    def __defer_uncache(self, job_node):
+        # a job's data is kept cached until its background load is done with it
+        with self.__load_lock:
+            if job_node.id in self.__loading:
+                self.__uncache_after_load.add(job_node.id)
+                return True
+        return False
+
+    def _complete_job(self, job_node):
+        if self.checkpoint_store is not None and not job_node.data.STREAMING:
+            self.checkpoint_store.save(job_node.id, job_node.data.transformed_data)
+
+        job_node.status = JOB_STATUS.DONE
+        self.__record_duration(job_node)
+        job_runner_logger.completed_job(job_node.data, self.report.durations.get(job_node.id))
+
+    def _fail_job(self, job_node, e, exc_info=True):
+        self.__record_duration(job_node)
+        job_runner_logger.job_error(
+            job_node.data, exc_info=exc_info, duration=self.report.durations.get(job_node.id)
+        )
+        job_node.error = JobException(job_node.data, e)
+        job_node.status = JOB_STATUS.FAILED
+
+    # hands a job and shared memory handles to its parents' data off to a worker process
+    def __submit_to_process(self, pool, job_node, exports):
+        from treetl.tools.sharedmem import SharedPayload
+
+        self._start_job(job_node)
+        try:
+            if self._cached_result(job_node):
+                self._release_parents(job_node)
+                self._cache_job(job_node)
+                self._complete_job(job_node)
+                return None
+        except Exception as e:
+            self._fail_job(job_node, e)
+            return None
+
+        def export(parent):
+            if parent.id not in exports:
+                exports[parent.id] = SharedPayload(resolve(parent.data.transformed_data))
+            return exports[parent.id]
+
+        parent_payloads = { }
+        for param, parent in self.__signature_parents(job_node.data):
+            parent_payloads[param] = [ export(p) for p in parent ] if isinstance(parent, list) else export(parent)
+
+        return pool.submit(_run_job_in_process, job_node.data, parent_payloads, self.readonly_parents)
+
+    # merges the state of a job run in a worker process back into the submitted job
+    def __collect_from_process(self, future, job_node, exports):
+        try:
+            state, data = future.result()
+        except Exception as e:
+            # the worker's traceback is chained onto e by concurrent.futures
+            self._fail_job(job_node, e, exc_info=e)
+            return
+
+        try:
+            job_node.data.__dict__.update(state.load())
+
+            # the job's data stays on the block the worker wrote instead of being copied out. the mapping outlives
+            # unlink and is freed once the data is collected
+            job_node.data.transformed_data, release = data.attach()
+            release()
+        except Exception as e:
+            data.unlink()
+            self._fail_job(job_node, e)
+            return
+        finally:
+            state.unlink()
+
+        # children read straight from the block the worker wrote
+        exports[job_node.id] = data
+
+        try:
+            self._release_parents(job_node)
+            self._store_result(job_node)
+            self._cache_job(job_node)
+            self._complete_job(job_node)
+        except Exception as e:
+            self._fail_job(job_node, e)
+
+    def _skip_job(self, job_node, parent):
+        job_runner_logger.skip_job(job_node.data, parent.data)
+        job_node.status = JOB_STATUS.FAILED
+        job_node.error = ParentJobException(job=job_node.data, parent_job=parent.data)
+
+    def _uncache_job(self, job_node):
+        if self.__defer_uncache(job_node):
+            return
+
+        # streams hold nothing for their children
+        if not job_node.data.STREAMING:
+            job_runner_logger.log_job_method(job_node.data, 'uncache')
+            self.__phase(job_node, 'uncache')
+        self._mark_uncached(job_node)
+
+    def _schedule(self, nodes=None):
+        priority = None
+        if self.scheduler == 'critical_path':
+            ranks = self.__time_to_leaf(self.__expected_durations())
+            priority = lambda schedule, job_node: -ranks[job_node.id]
+        elif self.scheduler == 'memory':
+            priority = self.__growth
+
+        return JobSchedule(
+            self.__ptree,
+            [
+                node
+                for node in (self.__ptree.nodes() if nodes is None else nodes)
+                if node.status == JOB_STATUS.QUEUE
+            ],
+            priority=priority,
+            rekey_last_consumers=self.scheduler == 'memory'
+        )
+
+    def __expected_durations(self):
+        # hints for a job type cover every instance of it
+        by_id, by_type = { }, { }
+        for h, seconds in self.duration_hints.items():
+            if isinstance(h, type):
+                by_type[h.__name__] = seconds
+            else:
+                by_id[h if isinstance(h, str) else JobNode(h).id] = seconds
+
+        def known(job_node):
+            if job_node.id in by_id:
+                return by_id[job_node.id]
+            elif job_node.job_type.__name__ in by_type:
+                return by_type[job_node.job_type.__name__]
+            return self.learned_durations.get(job_node.id)
+
+        durations = dict((n.id, known(n)) for n in self.__ptree.nodes())
+
+        # jobs we know nothing about are assumed to be average
+        estimates = [ d for d in durations.values() if d is not None ]
+        default = sum(estimates) / len(estimates) if estimates else 1.0
+        return dict((i, default if d is None else d) for i, d in durations.items())
+
+    def __time_to_leaf(self, durations):
+        # upward rank: a job's own duration plus the longest chain of durations below it
+        ranks = { }
+        for job_node in reversed(self.__ptree.topological_order()):
+            ranks[job_node.id] = durations[job_node.id] + max(
+                [ ranks[c.id] for c in self.__ptree.children(job_node) ] or [ 0 ]
+            )
+        return ranks
+
+    def __critical_path(self, durations):
+        # longest chain of durations from a root to a leaf
+        best, via = { }, { }
+        for job_node in self.__ptree.topological_order():
+            parents = self.__ptree.parents(job_node)
+            prior = max(parents, key=lambda p: best[p.id]) if parents else None
+            via[job_node.id] = prior
+            best[job_node.id] = durations.get(job_node.id, 0.0) + (best[prior.id] if prior else 0.0)
+
+        if not best:
+            return [ ], 0.0
+
+        job_node = self.__ptree.get_node(max(best, key=best.get))
+        total, path = best[job_node.id], [ ]
+        while job_node is not None:
+            path.append(job_node.id)
+            job_node = via[job_node.id]
+        return path[::-1], total
+
+    def __get_nodes(self, job):
+        # the node of a job instance, or every instance of a job type
+        if isinstance(job, type) and self.__instances(job):
+            return self.__instances(job)
+
+        node_id = job.__name__ if isinstance(job, type) else JobNode(job).id
+        job_node = self.__ptree.get_node(node_id)
+        if job_node is None:
+            raise KeyError('{} has not been added to the runner'.format(node_id))
+        return [ job_node ]
+
+    def _start_from(self, start_from):
+        """
+        Queue up start_from and everything downstream of it. Parents outside of that set that are not already done are
+        rehydrated from their last checkpoint, or queued up too when there is none.
+        :return: job nodes that need to run
+        """
+        if self.checkpoint_store is None:
+            raise ValueError('run(start_from=...) needs a checkpoint_store')
+
+        to_run, stack = OrderedDict(), self.__get_nodes(start_from)
+        while stack:
+            job_node = stack.pop()
+            if job_node.id not in to_run:
+                to_run[job_node.id] = job_node
+                stack.extend(self.__ptree.children(job_node))
+
+        stack = list(to_run.values())
+        while stack:
+            for parent in self.__ptree.parents(stack.pop()):
+                if parent.id in to_run or parent.status == JOB_STATUS.DONE:
+                    continue
+                elif parent.id in self.checkpoint_store:
+                    parent.data.transformed_data = self.checkpoint_store.load(parent.id)
+                    parent.status = JOB_STATUS.DONE
+                    parent.error = None
+                    job_runner_logger.rehydrated_job(parent.data)
+                else:
+                    to_run[parent.id] = parent
+                    stack.append(parent)
+
+        for job_node in to_run.values():
+            job_node.status = JOB_STATUS.QUEUE
+            job_node.error = None
+
+        return list(to_run.values())
+
+    def _targets(self, targets):
+        """
+        The targets and every ancestor of them that still has to run. A job type stands for every instance of it.
+        :return: job nodes that need to run
+        """
+        to_run, stack = OrderedDict(), [ ]
+        for target in targets:
+            stack.extend(self.__get_nodes(target))
+
+        while stack:
+            job_node = stack.pop()
+            if job_node.id not in to_run and job_node.status != JOB_STATUS.DONE:
+                to_run[job_node.id] = job_node
+                stack.extend(self.__ptree.parents(job_node))
+
+        return list(to_run.values())
+
+    def _run_nodes(self, start_from=None, targets=None):
+        """
+        Job nodes a run is limited to, or None to run everything queued.
+        """
+        nodes = self._start_from(start_from) if start_from is not None else None
+        if targets is None:
+            return nodes
+
+        needed = self._targets(targets)
+        if nodes is None:
+            return needed
+
+        run_ids = set([ n.id for n in nodes ])
+        return [ n for n in needed if n.id in run_ids ]
+
+    def _failed_parents(self, job_node):
+        # parents that only failed to load still handed their data over
+        return [
+            p for p in self.__ptree.parents(job_node)
+            if p.status == JOB_STATUS.FAILED and p.id not in self.__load_failed
+        ]
+
+    # runs every queued job, dispatching each one (to a pool if given) as soon as all of its parents have finished
+    def __run_scheduled(self, pool=None, slots=1):
+        from concurrent.futures import wait, Future, FIRST_COMPLETED
+
+        schedule = self._run_schedule
+        budgeted = self.scheduler == 'memory' and self.memory_budget is not None
+        running = { }
+
+        # streaming jobs and their children all run at once on their own threads, outside of the worker slots.
+        # opening maps the futures streaming jobs set once their children can start
+        stream_pool = self.__stream_pool()
+        streaming, opening = { }, { }
+
+        # shared memory copies of transformed_data handed to worker processes
+        exports = { }
+
+        def job_finished(job_node):
+            if job_node.status == JOB_STATUS.FAILED:
+                self._mark_uncached(job_node)
+
+            for parent in schedule.finished(job_node):
+                self._uncache_job(parent)
+
+            for n in [ job_node ] + self.__ptree.parents(job_node):
+                if n.id in exports and schedule.consumers(n) == 0:
+                    exports.pop(n.id).unlink()
+
+            # skipped children of a stream never read from it
+            self.__close_readers(job_node)
+
+        def next_ready():
+            if budgeted:
+                return self.__pop_within_budget(schedule, len(running) > 0)
+            return schedule.pop_ready()
+
+        self.__start_prefetch()
+        self.__start_loads()
+        try:
+            while schedule.has_ready() or running or streaming:
+                # only hand out as many jobs as there are workers so the next pick is made with the latest state
+                while schedule.has_ready() and len(running) < slots:
+                    job_node = next_ready()
+                    if job_node is None:
+                        break
+
+                    batch = self._batch_with(job_node)
+                    if batch is not None:
+                        batch = [ n for n in batch if not self.__skip_failed(n, job_finished) ]
+                        for n in batch:
+                            self.__reserve_memory(n)
+                            n.status = JOB_STATUS.RUNNING
+                        if not batch:
+                            continue
+                        elif pool is None:
+                            self.__run_batch(batch)
+                            for n in batch:
+                                job_finished(n)
+                        else:
+                            running[pool.submit(self.__run_batch, batch)] = batch
+                        continue
+
+                    if self.__skip_failed(job_node, job_finished):
+                        continue
+
+                    self.__reserve_memory(job_node)
+                    if stream_pool is not None and self.__runs_on_stream(job_node):
+                        if self.__opens_stream(job_node):
+                            opened = self.__stream_opened[job_node.id] = Future()
+                            opening[opened] = job_node
+                        job_node.status = JOB_STATUS.RUNNING
+                        streaming[stream_pool.submit(self.__run_single_job, job_node)] = job_node
+                    elif pool is None:
+                        self.__run_single_job(job_node)
+                        job_finished(job_node)
+                    elif self.executor == 'processes':
+                        future = self.__submit_to_process(pool, job_node, exports)
+                        if future is None:
+                            job_finished(job_node)
+                        else:
+                            running[future] = job_node
+                    else:
+                        # mark before dispatch so siblings never see a submitted job as queued
+                        job_node.status = JOB_STATUS.RUNNING
+                        running[pool.submit(self.__run_single_job, job_node)] = job_node
+
+                if running or streaming:
+                    done, _ = wait(list(running) + list(streaming) + list(opening), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in opening:
+                            schedule.opened(opening.pop(future))
+                        elif future in streaming:
+                            job_node = streaming.pop(future)
+                            future.result()
+
+                            # failed before its children could start
+                            opened = self.__stream_opened.pop(job_node.id, None)
+                            opening.pop(opened, None)
+                            job_finished(job_node)
+                        elif future in running:
+                            job_node = running.pop(future)
+                            if self.executor == 'processes':
+                                self.__collect_from_process(future, job_node, exports)
+                            else:
+                                future.result()
+                            for n in job_node if isinstance(job_node, list) else [ job_node ]:
+                                job_finished(n)
+        finally:
+            # the run is only done once everything is loaded
+            self.__finish_loads()
+            for payload in exports.values():
+                payload.unlink()
+            if stream_pool is not None:
+                stream_pool.shutdown()
+            self.__stop_prefetch()
+
+    def __skip_failed(self, job_node, job_finished):
+        # skips a job with a failed parent. True if it was skipped
+        for parent in self._failed_parents(job_node):
+            self._skip_job(job_node, parent)
+
+        if job_node.status == JOB_STATUS.FAILED:
+            self.__drop_prefetch(job_node)
+            job_finished(job_node)
+            return True
+        return False
+
+    def __stream_pool(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        on_stream = [
+            n for n in self.__ptree.nodes()
+            if n.status == JOB_STATUS.QUEUE and self.__runs_on_stream(n)
+        ]
+        return ThreadPoolExecutor(max_workers=len(on_stream)) if on_stream else None
+
+    def _has_streams(self):
+        return any(n.job_type.STREAMING for n in self.__ptree.nodes() if n.status == JOB_STATUS.QUEUE)
+
+    def __run_pooled(self):
+        from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+        if self.executor == 'processes':
+            from treetl.tools.sharedmem import ensure_tracker
+            ensure_tracker()
+            slots = self.max_workers or _cpu_count()
+            pool = ProcessPoolExecutor(max_workers=slots)
+        else:
+            # concurrent.futures default
+            slots = self.max_workers or min(32, _cpu_count() + 4)
+            pool = ThreadPoolExecutor(max_workers=slots)
+
+        try:
+            self.__run_scheduled(pool, slots)
+        finally:
+            pool.shutdown()
+
+    def compile(self):
+        """
+        Flatten the job tree into an ExecutionPlan. Parents, kwarg bindings and cache/uncache points are worked out
+        once so the plan can be run over and over (or pickled and run elsewhere) without walking the tree again.
+        """
+        from treetl.job._plan import ExecutionPlan, PlanStep
+
+        if any(n.job_type.STREAMING for n in self.__ptree.nodes()):
+            raise ValueError('Streaming jobs need JobRunner')
+
+        order = self.__ptree.topological_order()
+        position = dict((n.id, i) for i, n in enumerate(order))
+
+        # position of the last job to read each job's data
+        last_consumer = { }
+        for i, job_node in enumerate(order):
+            for parent in self.__ptree.parents(job_node):
+                last_consumer[parent.id] = i
+
+        steps = [ ]
+        for i, job_node in enumerate(order):
+            parents = self.__ptree.parents(job_node)
+            steps.append(PlanStep(
+                job=job_node.data,
+                bindings=tuple(
+                    (param, tuple(position[p.id] for p in parent) if isinstance(parent, list) else position[parent.id])
+                    for param, parent in self.__signature_parents(job_node.data)
+                ),
+                parents=tuple(position[p.id] for p in parents),
+                cache=job_node.id in last_consumer,
+                release=tuple(position[p.id] for p in parents if last_consumer[p.id] == i)
+            ))
+
+        return ExecutionPlan(steps)
+
+    def run(self, start_from=None, targets=None, profile=False, profile_dir=None):
+        """
+        Run every queued job.
+        :param start_from: Job (or job type) to rerun along with everything downstream of it. Its ancestors are loaded
+            from checkpoint_store instead of being recomputed
+        :param targets: Jobs (or job types) to run. Only they and the ancestors they need are run, everything else is
+            left queued (and parents that are never run are never instantiated)
+        :param profile: Record wall time, CPU time and tracemalloc peak and net allocations of every phase of every
+            job in report.phases. Phases run in worker processes by the 'processes' executor are not recorded
+        :param profile_dir: With profile, also write a cProfile dump of each job to this directory
+        """
+        nodes = self._run_nodes(start_from, targets)
+
+        self.report = RunReport()
         self.status = JOB_STATUS.RUNNING
         job_runner_logger.log_status(self.status)
 
-        for jn in self.__ptree.end_nodes():
-            self.__run_job_line(jn)
+        self.__held_bytes, self.__held_total = { }, 0
+        self._run_schedule = self._schedule(nodes)
+        self.__streams = { }
+        self.__stream_opened = { }
+        if profile:
+            self._start_profile(profile_dir)
+        try:
+            if self.executor == 'serial':
+                self.__run_scheduled()
+            else:
+                self.__run_pooled()
+        finally:
+            self._run_schedule = None
+            self.__streams = { }
+            self._stop_profile()
 
+        self._finish_report()
         self.status = JOB_STATUS.FAILED if len(self.failed_jobs()) else JOB_STATUS.DONE
         job_runner_logger.log_status(self.status)
 
         return self
 
+    def _finish_report(self):
+        self.report.critical_path, self.report.critical_path_duration = self.__critical_path(self.report.durations)
+
     def children_in_queue(self, job):
         return [
             child_job_node.data
@@ -193,17 +1295,26 @@ class JobRunner(object):
             if isinstance(node.error, JobException) and not isinstance(node.error, ParentJobException)
         ]
 
-    def failed_job_root_paths(self):
+    def failed_job_root_paths(self, max_paths=100):
+        """
+        { failed root job: paths from a root job down to it }
+        :param max_paths: Most paths listed per failed root, None for all of them. Diamond heavy trees can have
+            exponentially many. count_paths tells how many there are
+        """
         return {
-            fail_root: self.all_paths(fail_root)
+            fail_root: list(itertools.islice(self.iter_paths(fail_root), max_paths))
             for fail_root in self.failed_job_roots()
         }
 
+    def iter_paths(self, job):
+        for path in self.__ptree.iter_paths(JobNode(job)):
+            yield [ path_item.data for path_item in path ]
+
     def all_paths(self, job):
-        return [
-            [ path_item.data for path_item in path ]
-            for path in self.__ptree.all_paths(JobNode(job))
-        ]
+        return list(self.iter_paths(job))
+
+    def count_paths(self, job):
+        return self.__ptree.count_paths(JobNode(job))
 
     def submitted_jobs(self):
         return [ j.data for j in self.job_results(submitted_only=True) ]
@@ -217,4 +1328,18 @@ class JobRunner(object):
 
     def clear_jobs(self):
         self._submitted_job_ids = []
+        self.__submitted = set()
+        self.__added = { }
+        self.__fan_ins = { }
+        self.__plain_deps = { }
+        self.__result_keys = { }
+        self.learned_durations = { }
         return self.__ptree.clear_nodes()
+
+
+class _NotMeasured(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
@@ -0,0 +1,78 @@
+from collections import namedtuple
+
+from treetl.job._jobrunner import JOB_STATUS, JobException, ParentJobException, job_runner_logger, _call_method
+from treetl.tools.spill import resolve
+
+
+# one job in an ExecutionPlan. everything but the job is a position in ExecutionPlan.steps
+#   bindings: (param, parent position or tuple of positions for dependencies on every instance of a job type)
+#   parents: positions of all parents, checked for failures
+#   cache: whether the job has children to cache its data for
+#   release: parents with no children left once this job has transformed
+PlanStep = namedtuple('PlanStep', [ 'job', 'bindings', 'parents', 'cache', 'release' ])
+
+
+class ExecutionPlan(object):
+    """
+    A job tree flattened into a list of steps in topological order, made by JobRunner.compile(). Parent lookups,
+    kwarg bindings and cache/uncache points are worked out once, so running the plan again only runs the jobs. Plans
+    are picklable as long as their jobs are.
+
+    Jobs run one at a time, in order. Checkpoints, the result cache and streaming are left to JobRunner.
+    """
+    def __init__(self, steps):
+        self.steps = tuple(steps)
+        self.status = JOB_STATUS.QUEUE
+        self.statuses = [ JOB_STATUS.QUEUE ] * len(self.steps)
+        self.errors = [ None ] * len(self.steps)
+
+    def jobs(self):
+        return [ step.job for step in self.steps ]
+
+    def failed_jobs(self):
+        return [ step.job for step, status in zip(self.steps, self.statuses) if status == JOB_STATUS.FAILED ]
+
+    def run(self):
+        steps, statuses, errors = self.steps, [ JOB_STATUS.QUEUE ] * len(self.steps), [ None ] * len(self.steps)
+        self.status = JOB_STATUS.RUNNING
+        job_runner_logger.log_status(self.status)
+
+        def uncache(positions):
+            for p in positions:
+                if statuses[p] == JOB_STATUS.DONE:
+                    _call_method(steps[p].job, 'uncache')
+
+        for i, (job, bindings, parents, cache, release) in enumerate(steps):
+            failed = [ p for p in parents if statuses[p] == JOB_STATUS.FAILED ]
+            if failed:
+                parent = steps[failed[0]].job
+                job_runner_logger.skip_job(job, parent)
+                statuses[i], errors[i] = JOB_STATUS.FAILED, ParentJobException(job=job, parent_job=parent)
+                uncache(release)
+                continue
+
+            # parents are released once, after transform or when the job fails before getting that far
+            released = False
+            try:
+                _call_method(job, 'extract')
+                _call_method(job, 'transform', **{
+                    param: [ resolve(steps[p].job.transformed_data) for p in source ]
+                    if isinstance(source, tuple) else resolve(steps[source].job.transformed_data)
+                    for param, source in bindings
+                })
+                released = True
+                uncache(release)
+                if cache:
+                    _call_method(job, 'cache')
+                _call_method(job, 'load')
+                statuses[i] = JOB_STATUS.DONE
+            except Exception as e:
+                job_runner_logger.job_error(job)
+                statuses[i], errors[i] = JOB_STATUS.FAILED, JobException(job, e)
+                if not released:
+                    uncache(release)
+
+        self.statuses, self.errors = statuses, errors
+        self.status = JOB_STATUS.FAILED if JOB_STATUS.FAILED in statuses else JOB_STATUS.DONE
+        job_runner_logger.log_status(self.status)
+        return self
@@ -0,0 +1,81 @@
+from treetl.tools.profiling import combine_stats
+
+
+class RunReport(object):
+    """
+    What happened during the most recent JobRunner.run(). Available as JobRunner.report.
+    """
+    def __init__(self):
+        # ids of jobs served from / missed in the result cache
+        self.cache_hits = [ ]
+        self.cache_misses = [ ]
+
+        # most jobs holding cached data for their children at any one time
+        self.peak_cached = 0
+
+        # most bytes of cached data at any one time. only tracked by memory aware scheduling
+        self.peak_cached_bytes = 0
+
+        # seconds each job took, start to done (or failed)
+        self.durations = { }
+
+        # ids of the chain of jobs from a root to a leaf that took the longest, and how long it took
+        self.critical_path = [ ]
+        self.critical_path_duration = 0.0
+
+        # { job id: { phase: treetl.tools.profiling.PhaseStats } }. only filled by run(profile=True)
+        self.phases = { }
+
+    def phase_rows(self, sort='wall'):
+        """
+        (job id, phase, stats) for every phase profiled, most expensive first.
+        :param sort: PhaseStats field to sort by: wall, cpu, peak_bytes or net_bytes
+        """
+        rows = [ (job_id, phase, stats) for job_id, phases in self.phases.items() for phase, stats in phases.items() ]
+        return sorted(rows, key=lambda r: getattr(r[2], sort), reverse=True)
+
+    def job_totals(self, sort='wall'):
+        """
+        (job id, stats of all of its phases together) for every job profiled, most expensive first.
+        """
+        totals = [ ]
+        for job_id, phases in self.phases.items():
+            stats = list(phases.values())
+            total = stats[0]
+            for s in stats[1:]:
+                total = combine_stats(total, s)
+            totals.append((job_id, total))
+        return sorted(totals, key=lambda t: getattr(t[1], sort), reverse=True)
+
+    def profile_summary(self, sort='wall', limit=10):
+        """
+        Table of the `limit` most expensive job phases.
+        """
+        lines = [ '{:>10} {:>10} {:>12} {:>12}  {}'.format('wall (s)', 'cpu (s)', 'peak (B)', 'net (B)', 'job.phase') ]
+        for job_id, phase, stats in self.phase_rows(sort)[:limit]:
+            lines.append('{:>10.3f} {:>10.3f} {:>12} {:>12}  {}.{}'.format(
+                stats.wall, stats.cpu, stats.peak_bytes, stats.net_bytes, job_id, phase
+            ))
+        return '\n'.join(lines)
+
+    def summary(self):
+        lines = [ 'Peak cached jobs: {}'.format(self.peak_cached) ]
+        if self.peak_cached_bytes:
+            lines.append('Peak cached bytes: {}'.format(self.peak_cached_bytes))
+        if self.critical_path:
+            lines.append('Critical path ({:.3f}s): {}'.format(
+                self.critical_path_duration, ' -> '.join(str(i) for i in self.critical_path)
+            ))
+        if self.cache_hits or self.cache_misses:
+            lines.append('Result cache: {} hit(s), {} miss(es)'.format(len(self.cache_hits), len(self.cache_misses)))
+            if self.cache_hits:
+                lines.append('  hits  : ' + ', '.join(str(i) for i in self.cache_hits))
+            if self.cache_misses:
+                lines.append('  misses: ' + ', '.join(str(i) for i in self.cache_misses))
+        if self.phases:
+            lines.append('Most expensive phases:')
+            lines.extend('  ' + l for l in self.profile_summary().split('\n'))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.summary()
@@ -0,0 +1,187 @@
+import heapq
+import itertools
+import threading
+from collections import deque
+
+
+class JobSchedule(object):
+    """
+    Kahn style bookkeeping for a single run over a tree of job nodes. Tracks how many unfinished parents each queued
+    node is waiting on and how many queued children each node still has to serve. Nodes become ready as soon as their
+    last parent finishes and parents are released as soon as their last child has consumed their data.
+
+    release may be called from worker threads, everything else from the thread driving the run.
+    """
+    def __init__(self, ptree, queued, priority=None, rekey_last_consumers=False):
+        """
+        :param ptree: PolyTree of job nodes
+        :param queued: Nodes to run
+        :param priority: Optional f(schedule, node) -> sort key. Ready nodes with the lowest key are handed out first.
+            First come first served otherwise
+        :param rekey_last_consumers: The priority of a node depends on which of its parents it is the last consumer
+            of. A ready node's key is worked out again once it becomes the last consumer of a parent
+        """
+        self.__ptree = ptree
+        self.__priority = priority
+        self.__rekey_last_consumers = rekey_last_consumers
+        self.__sequence = itertools.count()
+
+        queued_ids = set([ node.id for node in queued ])
+
+        # number of parents each queued node is still waiting on
+        self.__waiting_on = {
+            node.id: len([ p for p in ptree.parents(node) if p.id in queued_ids ])
+            for node in queued
+        }
+
+        # number of queued children each node still has to serve
+        self.__consumers = { }
+        for node in queued:
+            for parent in ptree.parents(node):
+                self.__consumers[parent.id] = self.__consumers.get(parent.id, 0) + 1
+
+        # with a priority, a heap of (key, ready order, version, node). re-keyed nodes are pushed again with a new
+        # version and entries that are not the current version of a ready node are skipped when they come up
+        self.__ready = [ ] if priority else deque()
+        self.__order = { }
+        self.__versions = { }
+
+        # parents down to their last consumer since the ready nodes were last re-keyed
+        self.__last_consumer_of = [ ]
+
+        # nodes that let their children start before they finished
+        self.__opened = set()
+
+        # nodes that already let go of their parents
+        self.__released = set()
+        self.__lock = threading.Lock()
+
+        for node in queued:
+            if self.__waiting_on[node.id] == 0:
+                self.__push_ready(node)
+
+    def __push_ready(self, node):
+        if not self.__priority:
+            self.__ready.append(node)
+            return
+
+        if node.id not in self.__order:
+            self.__order[node.id] = next(self.__sequence)
+        version = self.__versions[node.id] = self.__versions.get(node.id, -1) + 1
+        heapq.heappush(self.__ready, (self.__priority(self, node), self.__order[node.id], version, node))
+
+    def __current(self, entry):
+        return self.__versions.get(entry[3].id) == entry[2]
+
+    def __rekey(self):
+        with self.__lock:
+            parents, self.__last_consumer_of = self.__last_consumer_of, [ ]
+        for parent in parents:
+            for child in self.__ptree.children(parent):
+                if child.id in self.__versions:
+                    self.__push_ready(child)
+
+        # drop outdated entries off the top
+        while self.__ready and not self.__current(self.__ready[0]):
+            heapq.heappop(self.__ready)
+
+    def has_ready(self):
+        if self.__priority:
+            self.__rekey()
+        return len(self.__ready) > 0
+
+    def peek_ready(self):
+        """
+        The node pop_ready would hand out next, without taking it.
+        """
+        if not self.__priority:
+            return self.__ready[0]
+        self.__rekey()
+        return self.__ready[0][3]
+
+    def pop_ready(self):
+        """
+        Hand out the ready node with the lowest priority key, or the one that became ready first without a priority.
+        """
+        if not self.__priority:
+            return self.__ready.popleft()
+
+        self.__rekey()
+        node = heapq.heappop(self.__ready)[3]
+        del self.__versions[node.id]
+        return node
+
+    def pop_like(self, match, limit):
+        """
+        Take up to limit ready nodes that match(node), in the order they would have been handed out.
+        """
+        if self.__priority:
+            self.__rekey()
+            entries = sorted(e for e in self.__ready if self.__current(e))
+            taken = [ e[3] for e in entries if match(e[3]) ][:limit]
+            if taken:
+                for n in taken:
+                    del self.__versions[n.id]
+                self.__ready = [ e for e in entries if self.__current(e) ]
+                heapq.heapify(self.__ready)
+            return taken
+
+        taken = [ n for n in self.__ready if match(n) ][:limit]
+        if taken:
+            taken_ids = set(id(n) for n in taken)
+            self.__ready = deque(n for n in self.__ready if id(n) not in taken_ids)
+        return taken
+
+    def waiting_on(self, node):
+        """
+        Number of parents a queued node is still waiting on. 0 for nodes that are not queued.
+        """
+        return self.__waiting_on.get(node.id, 0)
+
+    def consumers(self, node):
+        return self.__consumers.get(node.id, 0)
+
+    def queued_children(self, node):
+        return [ c for c in self.__ptree.children(node) if c.id in self.__waiting_on ]
+
+    def release(self, node):
+        """
+        Record that node no longer needs its parents' data. Only the first call per node counts.
+        :return: parents of node that have no children left to serve
+        """
+        released = [ ]
+        with self.__lock:
+            if node.id in self.__released or node.id not in self.__waiting_on:
+                return released
+            self.__released.add(node.id)
+
+            for parent in self.__ptree.parents(node):
+                self.__consumers[parent.id] -= 1
+                if self.__consumers[parent.id] == 0:
+                    released.append(parent)
+                elif self.__consumers[parent.id] == 1 and self.__rekey_last_consumers:
+                    self.__last_consumer_of.append(parent)
+
+        return released
+
+    def opened(self, node):
+        """
+        Record that a node's children can start before it is done, as they do for a streaming node, and queue up
+        children that no longer wait on anything.
+        """
+        if node.id in self.__opened:
+            return
+        self.__opened.add(node.id)
+
+        for child in self.queued_children(node):
+            self.__waiting_on[child.id] -= 1
+            if self.__waiting_on[child.id] == 0:
+                self.__push_ready(child)
+
+    def finished(self, node):
+        """
+        Record that a node is done (or failed, or skipped) and queue up children that no longer wait on anything.
+        :return: parents of node that have no children left to serve, if node had not released them already
+        """
+        self.opened(node)
+        return self.release(node)
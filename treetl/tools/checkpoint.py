@@ -0,0 +1,70 @@
+import os
+import pickle
+import tempfile
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+
+def _replace(src, dst):
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # python 2. rename only overwrites on posix
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+class CheckpointStore(object):
+    """
+    Where JobRunner keeps the transformed_data of successful jobs so later runs can start part way down the tree.
+    Subclass and implement save, load and __contains__ to plug in another backend.
+    """
+    def save(self, key, data):
+        raise NotImplementedError()
+
+    def load(self, key):
+        """
+        :raises KeyError: if there is no checkpoint for key
+        """
+        raise NotImplementedError()
+
+    def __contains__(self, key):
+        raise NotImplementedError()
+
+
+class LocalCheckpointStore(CheckpointStore):
+    """
+    One pickle file per job in a local directory. Files are replaced atomically so an interrupted save never leaves
+    behind a partial checkpoint.
+    """
+    def __init__(self, path):
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _file(self, key):
+        return os.path.join(self.path, quote(str(key), safe='') + '.pkl')
+
+    def save(self, key, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            _replace(tmp_path, self._file(key))
+        except:
+            os.remove(tmp_path)
+            raise
+
+    def load(self, key):
+        try:
+            with open(self._file(key), 'rb') as f:
+                return pickle.load(f)
+        except IOError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return os.path.isfile(self._file(key))
@@ -0,0 +1,94 @@
+"""
+Run a chain of row-wise transformers over data one chunk at a time.
+
+The data is cut into slices of `size` rows and every chunk goes through the whole chain before the next one starts, so
+only one chunk per stage (per worker) is held on top of the input and the output. Chunks can be spread over a thread
+or process pool. Results are put back together in order.
+"""
+import itertools
+from collections import deque
+
+
+def apply_chain(chunk, transformers, kwargs):
+    for t in transformers:
+        chunk = t(chunk, **kwargs)
+    return chunk
+
+
+def split(data, size):
+    """
+    Slices of at most size rows. Works on anything with len() that can be sliced: lists, tuples, numpy arrays, pandas
+    objects (by position) and arrow tables or arrays.
+    """
+    iloc = getattr(data, 'iloc', None)
+    arrow_slice = getattr(data, 'slice', None) if not isinstance(data, (list, tuple)) else None
+    for start in range(0, len(data), size):
+        if iloc is not None:
+            yield iloc[start:start + size]
+        elif callable(arrow_slice):
+            yield arrow_slice(start, size)
+        else:
+            yield data[start:start + size]
+
+
+def concat(chunks):
+    """
+    Put transformed chunks back together into one object of the same kind.
+    """
+    first = chunks[0]
+    if isinstance(first, list):
+        return list(itertools.chain.from_iterable(chunks))
+    if isinstance(first, tuple):
+        return tuple(itertools.chain.from_iterable(chunks))
+    if isinstance(first, (str, bytes)):
+        return first[:0].join(chunks)
+
+    module = type(first).__module__.split('.')[0]
+    if module == 'numpy':
+        import numpy
+        return numpy.concatenate(chunks)
+    if module == 'pandas':
+        import pandas
+        return pandas.concat(chunks)
+    if module == 'pyarrow':
+        import pyarrow
+        return pyarrow.concat_tables(chunks) if isinstance(first, pyarrow.Table) else pyarrow.concat_arrays(chunks)
+
+    raise TypeError('Cannot combine chunks of type {}. Pass combine= to Job.chunked'.format(type(first).__name__))
+
+
+def _bounded_map(pool, chunks, transformers, kwargs, window):
+    # like pool.map but only window chunks are sliced off and in flight at once
+    pending = deque()
+    for chunk in chunks:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(apply_chain, chunk, transformers, kwargs))
+    while pending:
+        yield pending.popleft().result()
+
+
+def transform_chunked(data, transformers, kwargs, size, workers=0, executor='threads', combine=None):
+    """
+    :param data: Data to transform
+    :param transformers: Functions f(chunk, **kwargs) that each return a transformed chunk
+    :param kwargs: Keyword arguments passed to every transformer
+    :param size: Rows per chunk
+    :param workers: Size of the pool chunks are spread over. 0 transforms them one after the other in this thread
+    :param executor: 'threads' or 'processes'. Transformers run in processes have to be picklable
+    :param combine: Function that puts the list of transformed chunks together. concat by default
+    """
+    if not len(data):
+        return apply_chain(data, transformers, kwargs)
+
+    chunks = split(data, size)
+    if not workers:
+        results = [ apply_chain(chunk, transformers, kwargs) for chunk in chunks ]
+    else:
+        from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+        pool_type = ProcessPoolExecutor if executor == 'processes' else ThreadPoolExecutor
+        with pool_type(max_workers=workers) as pool:
+            results = list(_bounded_map(pool, chunks, transformers, kwargs, 2 * workers))
+
+    return (combine or concat)(results)
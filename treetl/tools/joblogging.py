@@ -1,16 +1,79 @@
-
 # a few helpers to get the log message structure out of the main job code
+#
+# nothing is formatted unless the logger is enabled for the message's level, and values (parent transformed_data and
+# the like) are cut down to at most MAX_REPR characters. call configure(structured=True) to log one JSON object per
+# message instead of text
+import json
+import logging
+
+try:
+    from reprlib import Repr
+except ImportError:
+    from repr import Repr
+
+
+# longest text logged for a single value
+MAX_REPR = 80
+
+# log JSON records instead of text
+STRUCTURED = False
+
+
+def configure(structured=None, max_repr=None):
+    """
+    Change how treetl logs.
+    :param structured: Log each message as a JSON object with the event, job, phase and whatever else is known
+        (timings, children, et c.). Records are also attached to log records as `treetl`
+    :param max_repr: Longest text logged for a single value
+    """
+    global STRUCTURED, MAX_REPR, _repr
+    if structured is not None:
+        STRUCTURED = structured
+    if max_repr is not None:
+        MAX_REPR = max_repr
+        _repr = _limited_repr()
+
+
+def _limited_repr():
+    r = Repr()
+    r.maxstring = r.maxother = r.maxlong = MAX_REPR
+    return r
+
+
+_repr = _limited_repr()
+
+
+def short_repr(value):
+    """
+    Text for value of at most MAX_REPR characters. Containers are only walked as far as needed.
+    """
+    text = value if isinstance(value, str) else _repr.repr(value)
+    return text if len(text) <= MAX_REPR else text[:max(MAX_REPR - 3, 0)] + '...'
 
 
 def kwargs_as_pretty_string(delim='=', **kwargs):
     if kwargs:
-        return ', '.join([ '{}{}{}'.format(k, delim, v) for k, v in kwargs.items() ])
+        return ', '.join([ '{}{}{}'.format(k, delim, short_repr(v)) for k, v in kwargs.items() ])
     else:
         return ''
 
 
 def _name(job):
-    return job.__class__.__name__
+    from treetl.job._job import job_id
+    return job_id(job.__class__, getattr(job, 'params', None))
+
+
+def _log(logger, level, text, record, **kwargs):
+    # text and record are only called for enabled levels
+    if not logger.isEnabledFor(level):
+        return
+
+    if STRUCTURED:
+        rec = record()
+        extra = dict(kwargs.pop('extra', None) or { }, treetl=rec)
+        logger.log(level, json.dumps(rec, sort_keys=True, default=short_repr), extra=extra, **kwargs)
+    else:
+        logger.log(level, text(), **kwargs)
 
 
 class JobLogger(object):
@@ -18,13 +81,19 @@ class JobLogger(object):
         self.logger = logger
 
     def log_method(self, job, method, inp_kwargs=None, other_info=None, **kwargs):
-        self.logger.debug(
-            msg='{}.{}({}){}'.format(
+        _log(
+            self.logger, logging.DEBUG,
+            lambda: '{}.{}({}){}'.format(
                 _name(job),
                 method,
                 kwargs_as_pretty_string(**inp_kwargs) if inp_kwargs else '',
                 ' | ' + kwargs_as_pretty_string(':', **other_info) if other_info else '',
             ),
+            lambda: dict(
+                other_info or { },
+                event='method', job=_name(job), phase=method,
+                kwargs=dict((k, short_repr(v)) for k, v in (inp_kwargs or { }).items())
+            ),
             **kwargs
         )
 
@@ -33,33 +102,70 @@ class JobRunnerLogger(object):
     def __init__(self, logger):
         self.prefix = 'JobRunner: '
         self.logger = logger
+        self.job_logger = JobLogger(logger)
+
+    def __log(self, level, event, text, job, exc_info=None, **fields):
+        # fields are only for the structured record, and have to be cheap to get
+        def record():
+            rec = dict(fields, event=event, job=_name(job))
+            if 'parent' in rec:
+                rec['parent'] = _name(rec['parent'])
+            return rec
+
+        _log(self.logger, level, lambda: self.prefix + text(), record, exc_info=exc_info)
 
     def log_status(self, status, **kwargs):
         from treetl.job import JOB_STATUS
-        self.logger.info(self.prefix + 'JOB_STATUS.{}'.format(JOB_STATUS.Name[status]), **kwargs)
+        _log(
+            self.logger, logging.INFO,
+            lambda: self.prefix + 'JOB_STATUS.{}'.format(JOB_STATUS.Name[status]),
+            lambda: { 'event': 'status', 'status': JOB_STATUS.Name[status] },
+            **kwargs
+        )
 
     def start_job(self, job):
-        self.logger.info(self.prefix + 'Running {}'.format(_name(job)))
+        self.__log(logging.INFO, 'start', lambda: 'Running {}'.format(_name(job)), job)
 
-    def completed_job(self, job):
-        self.logger.info(self.prefix + 'Completed {}'.format(_name(job)))
+    def completed_job(self, job, duration=None):
+        self.__log(logging.INFO, 'completed', lambda: 'Completed {}'.format(_name(job)), job, duration=duration)
 
-    def job_error(self, job):
-        self.logger.error(
-            self.prefix + 'Error on {}'.format(_name(job)),
-            exc_info=True
+    def job_error(self, job, exc_info=True, duration=None):
+        self.__log(
+            logging.ERROR, 'error', lambda: 'Error on {}'.format(_name(job)), job, duration=duration, exc_info=exc_info
+        )
+
+    def rehydrated_job(self, job):
+        self.__log(logging.INFO, 'checkpoint', lambda: 'Loaded {} from checkpoint'.format(_name(job)), job)
+
+    def result_cache_hit(self, job):
+        self.__log(logging.INFO, 'cache_hit', lambda: 'Served {} from result cache'.format(_name(job)), job)
+
+    def over_memory_budget(self, job, held, budget):
+        self.__log(
+            logging.WARNING, 'over_budget',
+            lambda: 'Running {} over memory budget ({} of {} bytes held)'.format(_name(job), held, budget),
+            job, held=held, budget=budget
+        )
+
+    def open_stream(self, job, consumers):
+        self.__log(
+            logging.INFO, 'stream',
+            lambda: 'Streaming {} to {} child job(s)'.format(_name(job), consumers), job, consumers=consumers
         )
 
     def skip_job(self, job, parent):
-        self.logger.info(self.prefix + 'Skipped {} due to failure in parent {}'.format(
-            _name(job),
-            _name(parent)
-        ))
+        self.__log(
+            logging.INFO, 'skip',
+            lambda: 'Skipped {} due to failure in parent {}'.format(_name(job), _name(parent)),
+            job, parent=parent
+        )
 
     def add_jobs(self, job, parents):
-        self.logger.debug(self.prefix + 'Adding job {} with {} parent(s)'.format(
-            job.__class__.__name__, len(parents)
-        ))
+        self.__log(
+            logging.DEBUG, 'add',
+            lambda: 'Adding job {} with {} parent(s)'.format(job.__class__.__name__, len(parents)),
+            job, parents=len(parents)
+        )
 
     def log_job_method(self, *args, **kwargs):
-        JobLogger(self.logger).log_method(*args, **kwargs)
+        self.job_logger.log_method(*args, **kwargs)
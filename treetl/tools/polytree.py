@@ -1,3 +1,5 @@
+import bisect
+from collections import OrderedDict
 
 
 class TreeNode(object):
@@ -8,8 +10,31 @@ class TreeNode(object):
 
 class PolyTree(object):
     def __init__(self, nodes=None):
-        self.__node_map = { }
+        # nodes in the order they were added
+        self.__node_map = OrderedDict()
+
+        # forward (parent -> children) and reverse (child -> parents) adjacency
         self.__graph = { }
+        self.__parent_graph = { }
+
+        # child ids of each node as a set for edge lookups and the insertion positions of each node's parents, in
+        # step with __parent_graph
+        self.__child_ids = { }
+        self.__parent_positions = { }
+
+        # ordered sets of node ids w/o parents and w/o children. kept up to date
+        # on every add so the lookups below never have to scan the whole graph
+        self.__roots = OrderedDict()
+        self.__ends = OrderedDict()
+
+        # nodes that rejoin the roots or ends (remove_child) go in at the back. they are put back in insertion order
+        # on the next lookup rather than on every removal
+        self.__roots_sorted = True
+        self.__ends_sorted = True
+
+        # insertion position of each node. parents are listed in this order
+        self.__position = { }
+
         if nodes:
             for node in nodes:
                 self.add_node(node)
@@ -20,8 +45,14 @@ class PolyTree(object):
     # allows for creation of new dependencies on add
     def add_node(self, node, parents=None, children=None):
         if node.id not in self.__node_map:
+            self.__position[node.id] = len(self.__node_map)
             self.__node_map[node.id] = node
             self.__graph[node.id] = []
+            self.__parent_graph[node.id] = []
+            self.__child_ids[node.id] = set()
+            self.__parent_positions[node.id] = []
+            self.__roots[node.id] = None
+            self.__ends[node.id] = None
 
         if parents is not None:
             for p in parents:
@@ -29,7 +60,7 @@ class PolyTree(object):
 
         if children is not None:
             for c in children:
-                self.add_child(c)
+                self.add_child(node, c)
 
         return self
 
@@ -40,10 +71,73 @@ class PolyTree(object):
         if not self.node_exists(node):
             self.add_node(node)
 
+        # an edge is only ever recorded once
+        if child_node.id in self.__child_ids[node.id]:
+            return self
+
         self.__graph[node.id].append(child_node.id)
+        self.__child_ids[node.id].add(child_node.id)
+
+        # parents are listed in insertion order
+        position = self.__position[node.id]
+        positions = self.__parent_positions[child_node.id]
+        at = bisect.bisect(positions, position)
+        positions.insert(at, position)
+        self.__parent_graph[child_node.id].insert(at, node.id)
+        self.__ends.pop(node.id, None)
+        self.__roots.pop(child_node.id, None)
+
+        return self
+
+    def remove_child(self, node, child_node):
+        if child_node.id not in self.__child_ids.get(node.id, ()):
+            return self
+
+        self.__graph[node.id].remove(child_node.id)
+        self.__child_ids[node.id].discard(child_node.id)
+        at = self.__parent_graph[child_node.id].index(node.id)
+        del self.__parent_graph[child_node.id][at]
+        del self.__parent_positions[child_node.id][at]
+
+        if not self.__graph[node.id]:
+            self.__ends[node.id] = None
+            self.__ends_sorted = False
+        if not self.__parent_graph[child_node.id]:
+            self.__roots[child_node.id] = None
+            self.__roots_sorted = False
 
         return self
 
+    def remove_node(self, node):
+        if not self.node_exists(node):
+            return self
+
+        for parent in self.parents(node):
+            self.remove_child(parent, node)
+        for child in self.children(node):
+            self.remove_child(node, child)
+
+        for index in (self.__node_map, self.__graph, self.__parent_graph, self.__child_ids, self.__parent_positions,
+                      self.__roots, self.__ends, self.__position):
+            index.pop(node.id, None)
+
+        return self
+
+    def __in_position(self, ids):
+        return OrderedDict((id, None) for id in sorted(ids, key=self.__position.__getitem__))
+
+    def __root_ids(self):
+        if not self.__roots_sorted:
+            self.__roots = self.__in_position(self.__roots)
+            self.__roots_sorted = True
+        return self.__roots
+
+    def __end_ids(self):
+        if not self.__ends_sorted:
+            self.__ends = self.__in_position(self.__ends)
+            self.__ends_sorted = True
+        return self.__ends
+
     def node_exists(self, node):
         return node.id in self.__node_map
 
@@ -54,56 +148,106 @@ class PolyTree(object):
             return default
 
     def clear_nodes(self):
-        self.__node_map = { }
+        self.__node_map = OrderedDict()
         self.__graph = { }
+        self.__parent_graph = { }
+        self.__child_ids = { }
+        self.__parent_positions = { }
+        self.__roots = OrderedDict()
+        self.__ends = OrderedDict()
+        self.__roots_sorted = True
+        self.__ends_sorted = True
+        self.__position = { }
+
+    def in_degree(self, node):
+        return len(self.__parent_graph[node.id])
+
+    def out_degree(self, node):
+        return len(self.__graph[node.id])
 
     def root_nodes(self):
-        is_a_child_to_someone = set([
-            child_id
-            for children in self.__graph.values()
-            for child_id in children
-        ])
-        return [
-            self.get_node(id)
-            for id in self.__node_map.keys()
-            if id not in is_a_child_to_someone
-        ]
+        return [ self.__node_map[id] for id in self.__root_ids() ]
 
     def end_nodes(self):
-        return [ self.get_node(id) for id, children in self.__graph.items() if len(children) == 0 ]
+        return [ self.__node_map[id] for id in self.__end_ids() ]
 
     def is_solo_node(self, node):
-        return len(self.__graph[node.id]) == 0 and node.id in [ root.id for root in self.root_nodes() ]
+        return node.id in self.__roots and node.id in self.__ends
 
     def solo_nodes(self):
-        return [
-            root_node
-            for root_node in self.root_nodes()
-            if len(self.__graph[root_node.id]) == 0
-        ]
+        return [ self.__node_map[id] for id in self.__root_ids() if id in self.__ends ]
 
     def parents(self, node):
-        return [
-            self.__node_map[parent_id]
-            for parent_id, children in self.__graph.items()
-            if node.id in children
-        ]
+        return [ self.__node_map[id] for id in self.__parent_graph.get(node.id, []) ]
 
     def children(self, node):
         return [ self.__node_map[id] for id in self.__graph[node.id] ]
 
-    def __all_paths(self, end_node):
-        paths, next_path = [], [ end_node ]
-        parents = self.parents(end_node)
-        if parents:
-            for p in parents:
-                for new_path in self.__all_paths(p):
-                    paths.append(next_path + new_path)
-                next_path = [ end_node ]
-        else:
-            paths.append(next_path)
-
-        return paths
+    def descendants(self, node):
+        """
+        Every node below node, each once.
+        """
+        seen, stack = OrderedDict(), self.children(node)
+        while stack:
+            n = stack.pop()
+            if n.id not in seen:
+                seen[n.id] = n
+                stack.extend(self.children(n))
+        return list(seen.values())
+
+    def topological_order(self):
+        """
+        Every node, parents before children (Kahn's algorithm). Ties keep node insertion order.
+        """
+        waiting_on = { id: len(parents) for id, parents in self.__parent_graph.items() }
+        order = [ self.__node_map[id] for id in self.__root_ids() ]
+        for node in order:
+            for child_id in self.__graph[node.id]:
+                waiting_on[child_id] -= 1
+                if waiting_on[child_id] == 0:
+                    order.append(self.__node_map[child_id])
+        return order
+
+    def iter_paths(self, end_node):
+        """
+        Every path from a root down to end_node, in parent order, one at a time.
+        """
+        stack = [ (end_node, None) ]
+        while stack:
+            node, below = stack.pop()
+
+            # (node, link to the node below it). shares the tail of the path instead of copying it for every parent
+            link = (node, below)
+            parents = self.parents(node)
+            if parents:
+                stack.extend((p, link) for p in reversed(parents))
+            else:
+                path = [ ]
+                while link is not None:
+                    path.append(link[0])
+                    link = link[1]
+                yield path
 
     def all_paths(self, end_node):
-        return [ p[::-1] for p in self.__all_paths(end_node) ]
+        return list(self.iter_paths(end_node))
+
+    def count_paths(self, end_node):
+        """
+        Number of paths from a root down to end_node, without listing them.
+        """
+        counts, pending = { }, [ end_node ]
+        while pending:
+            node = pending[-1]
+            if node.id in counts:
+                pending.pop()
+                continue
+
+            parents = self.parents(node)
+            missing = [ p for p in parents if p.id not in counts ]
+            if missing:
+                pending.extend(missing)
+            else:
+                counts[node.id] = sum(counts[p.id] for p in parents) if parents else 1
+                pending.pop()
+
+        return counts[end_node.id]
@@ -0,0 +1,119 @@
+"""
+Time and memory of each phase (extract, transform, cache, load, uncache) of each job, for JobRunner.run(profile=True).
+
+Wall and CPU time are measured on the thread running the phase. Memory comes from tracemalloc: the peak above what was
+allocated when the phase started, and what the phase left allocated when it ended. Peaks are only exact when phases
+don't overlap (the serial executor), tracemalloc has a single peak for the whole process.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    _cpu_time = time.thread_time
+except AttributeError:
+    # python < 3.7 only has process wide cpu time
+    _cpu_time = getattr(time, 'process_time', None) or time.clock
+
+
+# seconds, cpu seconds, bytes
+PhaseStats = namedtuple('PhaseStats', [ 'wall', 'cpu', 'peak_bytes', 'net_bytes' ])
+
+
+def combine_stats(a, b):
+    """
+    Stats of two runs of a phase (or of several phases) taken together.
+    """
+    return PhaseStats(a.wall + b.wall, a.cpu + b.cpu, max(a.peak_bytes, b.peak_bytes), a.net_bytes + b.net_bytes)
+
+
+class PhaseProfiler(object):
+    def __init__(self, dump_dir=None):
+        """
+        :param dump_dir: Directory to write a cProfile dump per job to, named after the job id. No dumps by default
+        """
+        if not hasattr(tracemalloc, 'reset_peak'):
+            # without resetting the peak every phase would report the highest peak of any phase before it
+            raise RuntimeError('Profiling needs tracemalloc.reset_peak, python 3.9+')
+        self.dump_dir = dump_dir
+        # { job id: { phase: PhaseStats } }
+        self.phases = { }
+        self.__profiles = { }
+        self.__lock = threading.Lock()
+        self.__tracing = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__tracing = True
+
+    def stop(self):
+        if self.__tracing:
+            tracemalloc.stop()
+            self.__tracing = False
+
+        if self.dump_dir is not None:
+            if not os.path.isdir(self.dump_dir):
+                os.makedirs(self.dump_dir)
+            for job_id, profile in self.__profiles.items():
+                profile.dump_stats(os.path.join(self.dump_dir, quote(str(job_id), safe='') + '.prof'))
+        self.__profiles = { }
+
+    def __profile(self, job_id):
+        if self.dump_dir is None:
+            return None
+
+        import cProfile
+        with self.__lock:
+            if job_id not in self.__profiles:
+                self.__profiles[job_id] = cProfile.Profile()
+            return self.__profiles[job_id]
+
+    @contextmanager
+    def measure(self, job_id, phase):
+        """
+        Record the stats of the block as phase of job_id. A list of job ids shares the stats out evenly, for phases
+        that run once for several jobs (transform_batch). Their cProfile dumps go to the first of them.
+        """
+        job_ids = job_id if isinstance(job_id, list) else [ job_id ]
+        profile = self.__profile(job_ids[0])
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError:
+                # another profiler is running (on another thread with python 3.12+)
+                profile = None
+
+        tracing = tracemalloc.is_tracing()
+        before = tracemalloc.get_traced_memory()[0] if tracing else 0
+        if tracing:
+            tracemalloc.reset_peak()
+        wall, cpu = time.time(), _cpu_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.time() - wall, _cpu_time() - cpu
+            if profile is not None:
+                profile.disable()
+
+            current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+            share = float(len(job_ids))
+            stats = PhaseStats(
+                wall / share, cpu / share, max(peak - before, 0) // len(job_ids), (current - before) // len(job_ids)
+            )
+            with self.__lock:
+                for i in job_ids:
+                    job_phases = self.phases.setdefault(i, { })
+                    job_phases[phase] = combine_stats(job_phases[phase], stats) if phase in job_phases else stats
@@ -0,0 +1,211 @@
+import os
+import time
+import types
+import hashlib
+import functools
+import inspect
+import pickle
+import threading
+
+from treetl.tools.checkpoint import LocalCheckpointStore
+
+
+def _update_with_code(h, code):
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode('utf-8'))
+    for c in code.co_consts:
+        if isinstance(c, types.CodeType):
+            _update_with_code(h, c)
+        else:
+            h.update(repr(c).encode('utf-8'))
+
+
+def _update_with_function(h, f, seen):
+    if id(f) in seen:
+        return
+    seen.add(id(f))
+
+    try:
+        h.update(inspect.getsource(f).encode('utf-8'))
+    except (IOError, OSError, TypeError):
+        _update_with_code(h, f.__code__)
+
+    # functions wrapped up by Job.create, Job.extractors et c. live in closures
+    for cell in f.__closure__ or ():
+        try:
+            contents = cell.cell_contents
+        except ValueError:
+            continue
+        _update_with_value(h, contents, seen)
+
+
+# closure values hashed by value. anything else that is not a function or a container is left out, its repr may hold
+# a memory address that changes from run to run
+_SCALARS = (type(None), bool, int, float, str, bytes, type(u''))
+
+
+def _update_with_value(h, value, seen):
+    if isinstance(value, types.MethodType):
+        value = value.__func__
+
+    if isinstance(value, types.FunctionType):
+        _update_with_function(h, value, seen)
+    elif isinstance(value, functools.partial):
+        _update_with_value(h, value.func, seen)
+        _update_with_value(h, value.args, seen)
+        _update_with_value(h, value.keywords or { }, seen)
+    elif isinstance(value, _SCALARS):
+        h.update(repr(value).encode('utf-8'))
+    elif isinstance(value, (tuple, list, set, frozenset, dict)):
+        if id(value) in seen:
+            return
+        seen.add(id(value))
+        if isinstance(value, dict):
+            # Job.extractors keeps its extractors in a dict of attribute name: function
+            for k in sorted(value, key=repr):
+                _update_with_value(h, k, seen)
+                _update_with_value(h, value[k], seen)
+        else:
+            for v in (sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value):
+                _update_with_value(h, v, seen)
+
+
+def job_fingerprint(job):
+    """
+    Hash of a job's class, the source of every method it defines or inherits (short of Job itself), its params and the
+    instance attributes named in its CACHE_KEY_ATTRS. Whatever else the job sets on itself while it runs is left out.
+    """
+    from treetl.job import Job
+
+    h, seen = hashlib.sha256(), set()
+    for cls in type(job).__mro__:
+        if cls in (Job, object):
+            continue
+        h.update('{}.{}'.format(cls.__module__, cls.__name__).encode('utf-8'))
+        for name in sorted(cls.__dict__):
+            attr = cls.__dict__[name]
+            if isinstance(attr, (staticmethod, classmethod)):
+                attr = attr.__func__
+            if isinstance(attr, types.FunctionType):
+                h.update(name.encode('utf-8'))
+                _update_with_function(h, attr, seen)
+
+    params = sorted((getattr(job, 'params', None) or { }).items())
+    params.extend(sorted((name, getattr(job, name, None)) for name in getattr(job, 'CACHE_KEY_ATTRS', ())))
+    try:
+        h.update(pickle.dumps(params, protocol=2))
+    except Exception:
+        h.update(repr(params).encode('utf-8'))
+
+    return h.hexdigest()
+
+
+class ResultCache(LocalCheckpointStore):
+    """
+    Content addressed, on disk store of transformed_data shared across runs. Entries are evicted least recently used
+    first once the cache grows past max_bytes. Entries not used for max_age seconds are never served again and are
+    removed the next time the cache is swept.
+    """
+    def __init__(self, path, max_bytes=None, max_age=None):
+        super(ResultCache, self).__init__(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        # bytes in the cache and when it was last swept, None until the first save. saves keep the count up to date so
+        # the directory is only listed when the cache goes over max_bytes or entries may have expired
+        self.__bytes = None
+        self.__swept_at = None
+        self.__lock = threading.Lock()
+
+    def __entries(self):
+        entries = [ ]
+        for name in os.listdir(self.path):
+            if name.endswith('.pkl'):
+                full_path = os.path.join(self.path, name)
+                try:
+                    st = os.stat(full_path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, full_path))
+        return sorted(entries)
+
+    def __expired(self, key):
+        if self.max_age is None:
+            return False
+        try:
+            return os.path.getmtime(self._file(key)) < time.time() - self.max_age
+        except OSError:
+            return False
+
+    def __contains__(self, key):
+        return super(ResultCache, self).__contains__(key) and not self.__expired(key)
+
+    def load(self, key):
+        if self.__expired(key):
+            self.__remove(self._file(key))
+            raise KeyError(key)
+
+        data = super(ResultCache, self).load(key)
+
+        # mtime doubles as last access time for LRU
+        try:
+            os.utime(self._file(key), None)
+        except OSError:
+            pass
+
+        return data
+
+    @staticmethod
+    def __size(full_path):
+        try:
+            return os.path.getsize(full_path)
+        except OSError:
+            return 0
+
+    def save(self, key, data):
+        full_path = self._file(key)
+        replaced = self.__size(full_path)
+        super(ResultCache, self).save(key, data)
+        added = self.__size(full_path) - replaced
+
+        with self.__lock:
+            if self.__bytes is None or (self.max_age is not None and time.time() - self.__swept_at > self.max_age):
+                sweep = True
+            else:
+                self.__bytes += added
+                sweep = self.max_bytes is not None and self.__bytes > self.max_bytes
+
+        if sweep:
+            self.evict()
+
+    def evict(self):
+        """
+        Remove expired entries, then least recently used ones until the cache fits in max_bytes.
+        """
+        swept_at = time.time()
+        entries = self.__entries()
+
+        if self.max_age is not None:
+            oldest = swept_at - self.max_age
+            for mtime, _, full_path in [ e for e in entries if e[0] < oldest ]:
+                self.__remove(full_path)
+            entries = [ e for e in entries if e[0] >= oldest ]
+
+        total = sum(e[1] for e in entries)
+        if self.max_bytes is not None:
+            for _, size, full_path in entries:
+                if total <= self.max_bytes:
+                    break
+                self.__remove(full_path)
+                total -= size
+
+        # the count can miss saves made while sweeping, the next sweep sets it right
+        with self.__lock:
+            self.__bytes, self.__swept_at = total, swept_at
+
+    @staticmethod
+    def __remove(full_path):
+        try:
+            os.remove(full_path)
+        except OSError:
+            pass
@@ -0,0 +1,142 @@
+"""
+Move python objects between processes without copying their large buffers through a pipe.
+
+Objects are pickled with protocol 5. Anything that exposes its memory out-of-band (numpy arrays, bytearrays, arrow
+buffers, et c.) is written once to a single shared memory block and only the small in-band pickle travels with the
+payload. Readers map the block and rebuild the object on top of it.
+"""
+import pickle
+
+if pickle.HIGHEST_PROTOCOL < 5:
+    try:
+        import pickle5 as pickle
+    except ImportError:
+        pickle = None
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+
+def check_shared_memory():
+    if pickle is None or shared_memory is None:
+        raise RuntimeError(
+            'Shared memory transfer needs pickle protocol 5 and multiprocessing.shared_memory, python 3.8+'
+        )
+
+
+def ensure_tracker():
+    """
+    Start the shared memory resource tracker in this process before any workers are forked so that every process
+    registers its blocks with the same tracker. Otherwise a worker's tracker may unlink blocks it did not create.
+    """
+    check_shared_memory()
+    from multiprocessing import resource_tracker
+    resource_tracker.ensure_running()
+
+
+def _release(shm):
+    # objects rebuilt on top of the block may still hold views on it. the mapping is
+    # freed when they are collected, the name stays around until unlink
+    try:
+        shm.close()
+    except BufferError:
+        # hand the mapping over to the views so the handle doesn't try (and fail) to close it again when collected
+        shm._mmap = None
+        shm.close()
+
+
+class SharedPayload(object):
+    """
+    Picklable handle to an object whose out-of-band buffers live in shared memory. The handle itself only carries the
+    in-band pickle, the name of the block and the buffer sizes.
+    """
+    def __init__(self, obj):
+        check_shared_memory()
+
+        buffers = [ ]
+        self.meta = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+
+        raw_buffers = [ b.raw() for b in buffers ]
+        self.sizes = [ r.nbytes for r in raw_buffers ]
+        self.name = None
+
+        total = sum(self.sizes)
+        if total:
+            shm = shared_memory.SharedMemory(create=True, size=total)
+            offset = 0
+            for r in raw_buffers:
+                shm.buf[offset:offset + r.nbytes] = r
+                offset += r.nbytes
+            self.name = shm.name
+            _release(shm)
+
+    @property
+    def nbytes(self):
+        return sum(self.sizes)
+
+    def __views(self, shm, readonly=False):
+        views, offset = [ ], 0
+        for size in self.sizes:
+            view = shm.buf[offset:offset + size]
+            views.append(view.toreadonly() if readonly else view)
+            offset += size
+        return views
+
+    def attach(self, readonly=False):
+        """
+        Rebuild the object on top of the shared block without copying its buffers.
+        :param readonly: Rebuild on read-only views of the block, so numpy arrays and the like can't be written to
+        :return: (obj, release) where release() must be called once the object is no longer needed. The object stays
+            usable after release(), its mapping is freed once it is collected
+        """
+        if self.name is None:
+            return pickle.loads(self.meta), lambda: None
+
+        shm = shared_memory.SharedMemory(name=self.name)
+        obj = pickle.loads(self.meta, buffers=self.__views(shm, readonly))
+        return obj, lambda: _release(shm)
+
+    def load(self):
+        """
+        Rebuild a private copy of the object. The shared block can be unlinked right after.
+        """
+        if self.name is None:
+            return pickle.loads(self.meta)
+
+        shm = shared_memory.SharedMemory(name=self.name)
+        try:
+            return pickle.loads(self.meta, buffers=[ bytearray(v) for v in self.__views(shm) ])
+        finally:
+            _release(shm)
+
+    def unlink(self):
+        if self.name is not None:
+            shm = shared_memory.SharedMemory(name=self.name)
+            _release(shm)
+            shm.unlink()
+            self.name = None
+
+
+def readonly_view(obj):
+    """
+    A read-only view of obj that shares its memory, for handing data to several consumers at no cost. Numpy arrays get
+    a non-writeable view and memoryviews a read-only one. Anything else is returned as is: lists, tuples and dicts are
+    not looked into, rebuilding them would copy them for every consumer, and pandas objects and arrow data are
+    immutable already.
+    """
+    if isinstance(obj, memoryview):
+        if obj.readonly:
+            return obj
+        if not hasattr(obj, 'toreadonly'):
+            raise TypeError('Read-only views of writable memoryviews need python 3.8+')
+        return obj.toreadonly()
+
+    # numpy
+    if callable(getattr(obj, 'setflags', None)) and callable(getattr(obj, 'view', None)):
+        view = obj.view()
+        view.setflags(write=False)
+        return view
+
+    return obj
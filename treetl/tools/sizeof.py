@@ -0,0 +1,36 @@
+import sys
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Best effort size in bytes of obj and everything it holds. Objects that know their own size (numpy arrays, pandas
+    frames, arrow tables, et c.) are asked for it. Builtin containers are walked, shared members are counted once.
+    """
+    if seen is None:
+        seen = set()
+
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    # pandas
+    memory_usage = getattr(obj, 'memory_usage', None)
+    if callable(memory_usage):
+        try:
+            usage = memory_usage(deep=True)
+            return int(usage.sum() if hasattr(usage, 'sum') else usage)
+        except Exception:
+            pass
+
+    # numpy, arrow
+    nbytes = getattr(obj, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(i, seen) for i in obj)
+
+    return size
@@ -0,0 +1,256 @@
+"""
+Keep intermediate transformed_data in tiers so trees with intermediates larger than RAM can run on one box.
+
+Small results stay in memory as they are. Larger ones are pickled and compressed, and the largest are written to a
+local file that is memory-mapped back when a child asks for it, so only the pages a child touches are read in. With
+pickle protocol 5, out-of-band buffers (numpy arrays, the blocks of a pandas frame, arrow buffers, et c.) are mapped
+straight from the file instead of being copied.
+
+Jobs hold a lazy handle in place of the spilled data. JobRunner and ExecutionPlan resolve handles before they are
+handed to children, so children get the original object. A handle is rebuilt once, when the first child asks for it,
+and every other child shares that object until the job is uncached.
+"""
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import zlib
+
+from treetl.job._job import JobPatch
+
+if pickle.HIGHEST_PROTOCOL < 5:
+    try:
+        import pickle5 as _pickle5
+    except ImportError:
+        _pickle5 = None
+else:
+    _pickle5 = pickle
+
+
+# file layout: buffer count, in-band pickle length, each buffer length, the in-band pickle, then each buffer starting
+# on an ALIGN byte boundary so arrays mapped from the file stay aligned
+_HEADER = struct.Struct('<QQ')
+_LENGTH = struct.Struct('<Q')
+ALIGN = 64
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _rebuild(data):
+    return data
+
+
+class LazyData(object):
+    """
+    Stand-in for a job's transformed_data that is rebuilt on demand with resolve(). Pickling a handle pickles the
+    data it stands for, so checkpoints, the result cache and worker processes get the real thing.
+
+    Subclasses implement _load to rebuild the data. resolve() only calls it once and hands the same object to every
+    caller, so children reading the same parent at the same time don't each hold a copy.
+    """
+    def __init__(self):
+        self.__resolved = None
+        self.__is_resolved = False
+        self.__lock = threading.Lock()
+
+    def _load(self):
+        raise NotImplementedError()
+
+    def resolve(self):
+        with self.__lock:
+            if not self.__is_resolved:
+                self.__resolved = self._load()
+                self.__is_resolved = True
+            return self.__resolved
+
+    def discard(self):
+        """
+        Free whatever the handle holds, including the resolved data. The handle can't be resolved afterwards.
+        """
+        with self.__lock:
+            self.__resolved = None
+            self.__is_resolved = False
+
+    def __reduce__(self):
+        # pickling (checkpoints, the result cache) doesn't keep a resolved copy around
+        with self.__lock:
+            data = self.__resolved if self.__is_resolved else self._load()
+        return _rebuild, (data,)
+
+
+class CompressedData(LazyData):
+    """
+    transformed_data pickled and compressed with zlib.
+    """
+    def __init__(self, data, level=1):
+        super(CompressedData, self).__init__()
+        self.payload = zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), level)
+
+    @property
+    def nbytes(self):
+        # what the handle keeps in memory, for Job.data_size()
+        return len(self.payload) if self.payload is not None else 0
+
+    def _load(self):
+        if self.payload is None:
+            raise ValueError('Compressed data has been discarded')
+        return pickle.loads(zlib.decompress(self.payload))
+
+    def discard(self):
+        super(CompressedData, self).discard()
+        self.payload = None
+
+
+class SpilledData(LazyData):
+    """
+    transformed_data written to a local file. resolve() maps the file copy-on-write, so what children change never makes
+    it back to the file.
+    """
+    path = None
+
+    def __init__(self, data, directory=None):
+        super(SpilledData, self).__init__()
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix='treetl-', suffix='.spill')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self.__write(f, data)
+        except:
+            os.remove(self.path)
+            raise
+
+    @staticmethod
+    def __write(f, data):
+        if _pickle5 is None:
+            # no out-of-band buffers, everything goes in-band
+            f.write(_HEADER.pack(0, 0))
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            return
+
+        buffers = [ ]
+        meta = _pickle5.dumps(data, protocol=5, buffer_callback=buffers.append)
+        raw_buffers = [ b.raw() for b in buffers ]
+
+        f.write(_HEADER.pack(len(raw_buffers), len(meta)))
+        for r in raw_buffers:
+            f.write(_LENGTH.pack(r.nbytes))
+        f.write(meta)
+
+        offset = f.tell()
+        for r in raw_buffers:
+            start = _aligned(offset)
+            f.write(b'\0' * (start - offset))
+            f.write(r)
+            offset = start + r.nbytes
+
+    def _load(self):
+        if self.path is None:
+            raise ValueError('Spilled data has been discarded')
+
+        with open(self.path, 'rb') as f:
+            buffer_ct, meta_len = _HEADER.unpack(f.read(_HEADER.size))
+            if not meta_len:
+                return pickle.load(f)
+
+            sizes = [ _LENGTH.unpack(f.read(_LENGTH.size))[0] for _ in range(buffer_ct) ]
+            meta = f.read(meta_len)
+            if not any(sizes):
+                return _pickle5.loads(meta, buffers=[ bytearray(0) for _ in sizes ])
+
+            # objects rebuilt on top of the mapping keep it open after the file is closed (or removed)
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+
+        buffers, offset = [ ], _aligned(_HEADER.size + buffer_ct * _LENGTH.size + meta_len)
+        for size in sizes:
+            buffers.append(view[offset:offset + size])
+            offset = _aligned(offset + size)
+        return _pickle5.loads(meta, buffers=buffers)
+
+    def discard(self):
+        super(SpilledData, self).discard()
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+    def __del__(self):
+        self.discard()
+
+
+def resolve(data):
+    """
+    The object behind data if it is a lazy handle, data otherwise.
+    """
+    return data.resolve() if isinstance(data, LazyData) else data
+
+
+def _spill(job):
+    # move job.transformed_data to the tier its size calls for
+    if job.transformed_data is None or isinstance(job.transformed_data, LazyData):
+        return
+
+    size = job.data_size()
+    if size <= job.spill_memory_bytes:
+        return
+
+    if size <= job.spill_compress_bytes:
+        job.transformed_data = CompressedData(job.transformed_data, job.spill_compress_level)
+    else:
+        job.transformed_data = SpilledData(job.transformed_data, job.spill_directory)
+
+
+class SpillCache(JobPatch):
+    """
+    Job patch that moves a job's transformed_data down the tiers once it is cached for its children and loaded. Use
+    with Job.inject and subclass to change the thresholds:
+
+        class BigSpill(SpillCache):
+            spill_memory_bytes = 1024 ** 3
+            spill_directory = '/scratch'
+
+        @Job.inject(BigSpill)
+        class Join(Job):
+            ...
+
+    Results up to spill_memory_bytes stay as they are, results up to spill_compress_bytes are compressed and anything
+    larger is written to a file in spill_directory (the system temp directory by default). Sizes come from
+    Job.data_size(). The job's own load always sees the original data. On uncache the compressed or spilled copy is
+    freed and transformed_data is set to None, results kept in memory are left alone.
+    """
+    spill_memory_bytes = 64 * 1024 ** 2
+    spill_compress_bytes = 256 * 1024 ** 2
+    spill_directory = None
+    spill_compress_level = 1
+
+    # None, 'cached' or 'loaded', whichever of cache and load ran first since the last extract
+    _spill_state = None
+
+    def extract(self, **kwargs):
+        self._spill_state = None
+        return self
+
+    def cache(self, **kwargs):
+        # JobRunner caches before load unless the job ran in a worker process
+        if self._spill_state == 'loaded':
+            _spill(self)
+        else:
+            self._spill_state = 'cached'
+        return self
+
+    def load(self, **kwargs):
+        if self._spill_state == 'cached':
+            _spill(self)
+        self._spill_state = 'loaded'
+        return self
+
+    def uncache(self, **kwargs):
+        self._spill_state = None
+        if isinstance(self.transformed_data, LazyData):
+            self.transformed_data.discard()
+            self.transformed_data = None
+        return self
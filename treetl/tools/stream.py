@@ -0,0 +1,152 @@
+"""
+Hand chunks of a streaming job's transformed_data to every consumer through bounded queues.
+
+A producer thread pulls chunks from the job's iterable and puts each one on a queue per consumer. When a consumer
+falls behind its queue fills up and the producer waits, so no more than `buffer` chunks are held per consumer. A
+consumer that stops early closes its reader so it never holds the others up.
+"""
+import sys
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+# marks the end of a stream on a consumer queue
+_END = object()
+
+
+class _StreamError(object):
+    def __init__(self, error):
+        self.error = error
+
+
+class ChunkReader(object):
+    """
+    One consumer's view of a stream. Iterate it to get the chunks.
+    """
+    # seconds between checks for a failed stream while waiting on a queue
+    POLL = 0.1
+
+    def __init__(self, buffer):
+        self._queue = queue.Queue(maxsize=buffer)
+        self._error = None
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while not self.closed:
+            if self._error is not None:
+                self.closed = True
+                raise self._error
+
+            try:
+                chunk = self._queue.get(timeout=self.POLL)
+            except queue.Empty:
+                continue
+
+            if chunk is _END:
+                self.closed = True
+            elif isinstance(chunk, _StreamError):
+                self._error = chunk.error
+            else:
+                return chunk
+
+        raise StopIteration
+
+    # python 2
+    next = __next__
+
+    def close(self):
+        """
+        Stop receiving chunks. Anything already buffered is dropped.
+        """
+        self.closed = True
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _put(self, item):
+        # give up on readers closed or failed while waiting for room
+        while not self.closed and self._error is None:
+            try:
+                self._queue.put(item, timeout=self.POLL)
+                return
+            except queue.Full:
+                continue
+
+
+class ChunkTee(object):
+    """
+    Fan a single iterable of chunks out to named consumers.
+    """
+    def __init__(self, chunks, consumers, buffer=8, unbounded=()):
+        """
+        :param chunks: Iterable of chunks
+        :param consumers: Names of the consumers. One reader is made for each
+        :param buffer: Most chunks held for a consumer that has not read them yet
+        :param unbounded: Consumers that get no limit, for consumers that may only start reading once the others have
+            read everything
+        """
+        self.__chunks = chunks
+        self.__readers = dict(
+            (name, ChunkReader(0 if name in unbounded else buffer))
+            for name in consumers
+        )
+        self.error = None
+        self.__thread = threading.Thread(target=self.__produce)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def reader(self, consumer):
+        return self.__readers[consumer]
+
+    def close(self, consumer):
+        """
+        Stop handing chunks to a consumer, if it has not stopped already.
+        """
+        if consumer in self.__readers:
+            self.__readers[consumer].close()
+
+    def __open_readers(self):
+        return [ r for r in self.__readers.values() if not r.closed ]
+
+    def __produce(self):
+        try:
+            for chunk in self.__chunks:
+                readers = self.__open_readers()
+                if not readers or self.error is not None:
+                    break
+                for r in readers:
+                    r._put(chunk)
+        except Exception:
+            self.error = sys.exc_info()[1]
+            for r in self.__open_readers():
+                r._put(_StreamError(self.error))
+        else:
+            for r in self.__open_readers():
+                r._put(_END)
+        finally:
+            close = getattr(self.__chunks, 'close', None)
+            if callable(close):
+                close()
+
+    def abort(self, error):
+        """
+        Stop producing and fail every reader that has not finished yet.
+        """
+        self.error = error
+        for r in self.__open_readers():
+            r._error = error
+
+    def join(self):
+        """
+        Wait until every chunk has been handed out (or dropped by a closed reader).
+        """
+        self.__thread.join()